@@ -0,0 +1,48 @@
+"""sharded table versions
+
+Revision ID: 0d9e6b2f4a18
+Revises: f3b8a1c5d702
+Create Date: 2026-10-19 17:48:12.913405
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '0d9e6b2f4a18'
+down_revision: Union[str, Sequence[str], None] = 'f3b8a1c5d702'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+# app.db.versions.SHARDS when this migration was written.
+SHARDS = 16
+TABLES = ('events', 'users')
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    # The counters only validate ETags, so restarting them from zero just
+    # makes clients fetch their listings once more.
+    op.drop_table('table_versions')
+    op.create_table('table_versions',
+    sa.Column('name', sa.String(length=50), nullable=False),
+    sa.Column('shard', sa.Integer(), autoincrement=False, nullable=False),
+    sa.Column('version', sa.BigInteger(), nullable=False),
+    sa.PrimaryKeyConstraint('name', 'shard')
+    )
+    rows = ', '.join(f"('{name}', {shard}, 0)" for name in TABLES for shard in range(SHARDS))
+    op.execute(f"INSERT INTO table_versions (name, shard, version) VALUES {rows}")
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_table('table_versions')
+    op.create_table('table_versions',
+    sa.Column('name', sa.String(length=50), nullable=False),
+    sa.Column('version', sa.BigInteger(), nullable=False),
+    sa.PrimaryKeyConstraint('name')
+    )
+    op.execute("INSERT INTO table_versions (name, version) VALUES ('events', 0), ('users', 0)")
@@ -0,0 +1,69 @@
+"""named, sharded funds
+
+Revision ID: 3f6a0d2e8b54
+Revises: e91f4a7c3b08
+Create Date: 2026-10-19 11:36:02.918455
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '3f6a0d2e8b54'
+down_revision: Union[str, Sequence[str], None] = 'e91f4a7c3b08'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.create_table('fund_shards',
+    sa.Column('fund_id', sa.Integer(), nullable=False),
+    sa.Column('shard', sa.Integer(), autoincrement=False, nullable=False),
+    sa.Column('balance', sa.Float(), nullable=False),
+    sa.ForeignKeyConstraint(['fund_id'], ['funds.id'], ondelete='CASCADE'),
+    sa.PrimaryKeyConstraint('fund_id', 'shard')
+    )
+    # Every existing fund becomes a single-shard fund holding its balance;
+    # the oldest one is the default fund the legacy endpoints operate on.
+    op.execute("INSERT INTO fund_shards (fund_id, shard, balance) SELECT id, 0, balance FROM funds")
+
+    with op.batch_alter_table('funds') as batch_op:
+        batch_op.add_column(sa.Column('name', sa.String(length=50), nullable=True))
+        batch_op.add_column(sa.Column('shard_count', sa.Integer(), server_default='1', nullable=False))
+    op.execute("UPDATE funds SET name = CONCAT('fund-', id)" if op.get_bind().dialect.name == 'mysql'
+               else "UPDATE funds SET name = 'fund-' || id")
+    op.execute("UPDATE funds SET name = 'default' WHERE id = (SELECT min_id FROM (SELECT MIN(id) AS min_id FROM funds) AS oldest)")
+    with op.batch_alter_table('funds') as batch_op:
+        batch_op.alter_column('name', existing_type=sa.String(length=50), nullable=False)
+        batch_op.create_index(batch_op.f('ix_funds_name'), ['name'], unique=True)
+        batch_op.drop_column('balance')
+
+    with op.batch_alter_table('events') as batch_op:
+        batch_op.add_column(sa.Column('fund_id', sa.Integer(), nullable=True))
+        batch_op.create_index(batch_op.f('ix_events_fund_id'), ['fund_id'], unique=False)
+        batch_op.create_foreign_key('fk_events_fund_id_funds', 'funds', ['fund_id'], ['id'])
+    op.execute("UPDATE events SET fund_id = (SELECT min_id FROM (SELECT MIN(id) AS min_id FROM funds) AS oldest)")
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    with op.batch_alter_table('events') as batch_op:
+        batch_op.drop_constraint('fk_events_fund_id_funds', type_='foreignkey')
+        batch_op.drop_index(batch_op.f('ix_events_fund_id'))
+        batch_op.drop_column('fund_id')
+
+    with op.batch_alter_table('funds') as batch_op:
+        batch_op.add_column(sa.Column('balance', sa.Float(), server_default='0', nullable=False))
+    op.execute(
+        "UPDATE funds SET balance = ("
+        "SELECT COALESCE(SUM(fund_shards.balance), 0) FROM fund_shards WHERE fund_shards.fund_id = funds.id)"
+    )
+    with op.batch_alter_table('funds') as batch_op:
+        batch_op.drop_index(batch_op.f('ix_funds_name'))
+        batch_op.drop_column('shard_count')
+        batch_op.drop_column('name')
+    op.drop_table('fund_shards')
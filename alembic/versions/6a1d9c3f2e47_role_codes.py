@@ -0,0 +1,109 @@
+"""role codes
+
+Revision ID: 6a1d9c3f2e47
+Revises: 2c7f4e9a1b63
+Create Date: 2026-10-19 15:02:44.175930
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+from app.db.online_migration import run_online_change
+
+
+# revision identifiers, used by Alembic.
+revision: str = '6a1d9c3f2e47'
+down_revision: Union[str, Sequence[str], None] = '2c7f4e9a1b63'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+# Every role column stored the upper case member name; RoleCode in
+# app/db/models/role.py is the new shared SMALLINT representation.
+ROLE_CODES = {'ALL': 0, 'ADMIN': 1, 'CEO': 2, 'HR': 3, 'FINANCE': 4, 'EVENT_MANAGER': 5, 'EMPLOYEE': 6}
+ALL_ROLES = ('ALL', 'CEO', 'HR', 'FINANCE', 'EVENT_MANAGER', 'EMPLOYEE')
+USER_ROLES = ('ADMIN', 'CEO', 'HR', 'FINANCE', 'EVENT_MANAGER', 'EMPLOYEE')
+RECIPIENT_ROLES = ('ALL', 'CEO', 'HR', 'FINANCE', 'EVENT_MANAGER', 'EMPLOYEE', 'ADMIN')
+
+# Small tables converted in place: (table, column, old type, nullable).
+IN_PLACE = (
+    ('users', 'role', sa.Enum(*USER_ROLES, name='role'), False),
+    ('events', 'audience_role', sa.Enum(*ALL_ROLES, name='audiencerole'), False),
+    ('budget_summaries', 'audience_role', sa.Enum(*ALL_ROLES, name='audiencerole'), False),
+    # Only the retention job writes the archive, so a blocking rebuild is fine.
+    ('messages_archive', 'recipient_role', sa.Enum(*RECIPIENT_ROLES, name='recipientrole', native_enum=False), False),
+)
+
+
+# Rows written before the enums were upper case may hold lower case or
+# padded names; check_values refuses to run on anything these don't map,
+# since the ELSE NULL would only fail later on the NOT NULL column.
+def normalized(column: str) -> str:
+    return f"UPPER(TRIM({column}))"
+
+
+def to_codes(column: str) -> str:
+    cases = ' '.join(f"WHEN '{name}' THEN {code}" for name, code in ROLE_CODES.items())
+    return f"CASE {normalized(column)} {cases} ELSE NULL END"
+
+
+def to_names(column: str) -> str:
+    cases = ' '.join(f"WHEN {code} THEN '{name}'" for name, code in ROLE_CODES.items())
+    return f"CASE {column} {cases} ELSE NULL END"
+
+
+def check_values(tables, expression) -> None:
+    """Raise before changing anything if some row's role has no mapping."""
+    bind = op.get_bind()
+    for table, column in tables:
+        unmapped = bind.execute(sa.text(
+            f"SELECT DISTINCT {column} FROM {table} WHERE {expression(column)} IS NULL"
+        )).scalars().all()
+        if unmapped:
+            raise RuntimeError(
+                f"{table}.{column} holds values with no role mapping: {sorted(map(str, unmapped))}; "
+                f"fix those rows before running this migration"
+            )
+
+
+def convert(table: str, column: str, old_type, new_type, nullable: bool, expression):
+    # Go through a wide VARCHAR so both the names and the codes fit while
+    # the UPDATE rewrites them, keeping the column in its indexes and keys.
+    with op.batch_alter_table(table) as batch_op:
+        batch_op.alter_column(column, existing_type=old_type, type_=sa.String(20), existing_nullable=nullable)
+    op.execute(f"UPDATE {table} SET {column} = {expression(column)}")
+    with op.batch_alter_table(table) as batch_op:
+        batch_op.alter_column(column, existing_type=sa.String(20), type_=new_type, existing_nullable=nullable)
+
+
+def rebuild_messages(column_type: str, expression):
+    if op.get_bind().dialect.name == 'mysql':
+        alter = [f"ALTER TABLE {{table}} MODIFY recipient_role {column_type} NOT NULL"]
+    else:
+        # SQLite can't change a column's type; the shadow has no indexes yet,
+        # so the column can be dropped and re-added.
+        alter = [
+            "ALTER TABLE {table} DROP COLUMN recipient_role",
+            f"ALTER TABLE {{table}} ADD COLUMN recipient_role {column_type} NOT NULL DEFAULT 0",
+        ]
+    run_online_change(op, 'messages', alter=alter, columns={'recipient_role': expression('{src}.recipient_role')})
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    check_values([('messages', 'recipient_role'), *((table, column) for table, column, _, _ in IN_PLACE)], to_codes)
+    # First, so an online_dry_run stops before anything has changed.
+    rebuild_messages('SMALLINT', to_codes)
+    for table, column, old_type, nullable in IN_PLACE:
+        convert(table, column, old_type, sa.SmallInteger(), nullable, to_codes)
+    op.create_index(op.f('ix_users_role'), 'users', ['role'], unique=False)
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    check_values([('messages', 'recipient_role'), *((table, column) for table, column, _, _ in IN_PLACE)], to_names)
+    rebuild_messages('VARCHAR(13)', to_names)
+    op.drop_index(op.f('ix_users_role'), table_name='users')
+    for table, column, old_type, nullable in IN_PLACE:
+        convert(table, column, sa.SmallInteger(), old_type, nullable, to_names)
@@ -0,0 +1,58 @@
+"""message retention archive
+
+Revision ID: 7c2e9b41d5a3
+Revises: 4ed4160d84d3
+Create Date: 2026-10-19 09:12:40.512233
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '7c2e9b41d5a3'
+down_revision: Union[str, Sequence[str], None] = '4ed4160d84d3'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+RECIPIENT_ROLE = sa.Enum('ALL', 'CEO', 'HR', 'FINANCE', 'EVENT_MANAGER', 'EMPLOYEE', 'ADMIN', name='recipientrole', native_enum=False)
+
+# Yearly RANGE partitions for the archive on MySQL; anything newer lands in
+# pmax until it is reorganized. Dropping an old partition purges a year of
+# archived messages without a row-by-row DELETE. `messages` itself stays
+# unpartitioned: InnoDB cannot partition a table with a FULLTEXT index or
+# foreign keys, and it has both. Compaction keeps it small instead.
+ARCHIVE_PARTITION_YEARS = range(2024, 2031)
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.create_index('ix_messages_recipient_role_timestamp', 'messages', ['recipient_role', 'timestamp'], unique=False)
+    op.create_table('messages_archive',
+    sa.Column('id', sa.Integer(), autoincrement=False, nullable=False),
+    sa.Column('timestamp', sa.DateTime(), nullable=False),
+    sa.Column('sender_id', sa.Integer(), nullable=True),
+    sa.Column('recipient_role', RECIPIENT_ROLE, nullable=False),
+    sa.Column('content', sa.String(length=255), nullable=False),
+    sa.Column('archived_at', sa.DateTime(), nullable=False),
+    sa.PrimaryKeyConstraint('id', 'timestamp'),
+    mysql_row_format='COMPRESSED',
+    )
+    if op.get_bind().dialect.name == 'mysql':
+        partitions = ', '.join(
+            f'PARTITION p{year} VALUES LESS THAN ({year + 1})'
+            for year in ARCHIVE_PARTITION_YEARS
+        )
+        op.execute(
+            'ALTER TABLE messages_archive PARTITION BY RANGE (YEAR(`timestamp`)) '
+            f'(PARTITION p_old VALUES LESS THAN ({ARCHIVE_PARTITION_YEARS[0]}), '
+            f'{partitions}, PARTITION pmax VALUES LESS THAN MAXVALUE)'
+        )
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_table('messages_archive')
+    op.drop_index('ix_messages_recipient_role_timestamp', table_name='messages')
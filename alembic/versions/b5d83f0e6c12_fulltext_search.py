@@ -0,0 +1,36 @@
+"""fulltext search indexes
+
+Revision ID: b5d83f0e6c12
+Revises: 7c2e9b41d5a3
+Create Date: 2026-10-19 10:03:11.684120
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'b5d83f0e6c12'
+down_revision: Union[str, Sequence[str], None] = '7c2e9b41d5a3'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    # FULLTEXT is MySQL only; other backends use the in-process index in
+    # app.db.search.
+    if op.get_bind().dialect.name != 'mysql':
+        return
+    op.create_index('ix_messages_content_fulltext', 'messages', ['content'], unique=False, mysql_prefix='FULLTEXT')
+    op.create_index('ix_events_name_description_fulltext', 'events', ['name', 'description'], unique=False, mysql_prefix='FULLTEXT')
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    if op.get_bind().dialect.name != 'mysql':
+        return
+    op.drop_index('ix_events_name_description_fulltext', table_name='events')
+    op.drop_index('ix_messages_content_fulltext', table_name='messages')
@@ -1,34 +1,40 @@
-from typing import Generator, Optional
+import hashlib
+from typing import AsyncGenerator, Generator, Optional
 
-from fastapi import Depends, HTTPException, status
+from fastapi import Depends, HTTPException, Request, Response, status
 from fastapi.security import OAuth2PasswordBearer
-from jose import jwt
 from pydantic import ValidationError
-from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.ext.asyncio import AsyncConnection, AsyncSession
 
 from app.core.config import settings
+from app.core.http_cache import etag_matches
+from app.core.security import TokenError, decode_token
+from app.core.token_versions import token_versions
+from app.db import versions
+from app.db.routing import PIN_COOKIE, pinned_until, read_router
 from app.db.session import AsyncSessionLocal
 from app.db.models.user import User, Role
-from app.schemas.token import TokenPayload
+from app.schemas.token import TokenClaims, TokenPayload
 
 reusable_oauth2 = OAuth2PasswordBearer(
     tokenUrl=f"/api/v1/auth/login"
 )
 
-async def get_db() -> Generator[AsyncSession, None, None]:
+async def get_db(request: Request) -> Generator[AsyncSession, None, None]:
     async with AsyncSessionLocal() as session:
+        # Lets a committed write pin the caller's reads to the primary.
+        session.info["request_state"] = request.state
         yield session
 
 async def get_current_user(
+    request: Request,
     db: AsyncSession = Depends(get_db),
     token: str = Depends(reusable_oauth2)
 ) -> User:
     try:
-        payload = jwt.decode(
-            token, settings.SECRET_KEY, algorithms=[settings.ALGORITHM]
-        )
+        payload = decode_token(token)
         token_data = TokenPayload(**payload)
-    except (jwt.JWTError, ValidationError):
+    except (TokenError, ValidationError):
         raise HTTPException(
             status_code=status.HTTP_403_FORBIDDEN,
             detail="Could not validate credentials",
@@ -36,6 +42,7 @@ async def get_current_user(
     user = await db.get(User, token_data.sub)
     if not user:
         raise HTTPException(status_code=404, detail="User not found")
+    request.state.user_id = user.id
     return user
 
 
@@ -43,11 +50,9 @@ async def get_current_user_from_token(
     db: AsyncSession, token: str
 ) -> Optional[User]:
     try:
-        payload = jwt.decode(
-            token, settings.SECRET_KEY, algorithms=[settings.ALGORITHM]
-        )
+        payload = decode_token(token)
         token_data = TokenPayload(**payload)
-    except (jwt.JWTError, ValidationError):
+    except (TokenError, ValidationError):
         return None
     user = await db.get(User, token_data.sub)
     return user
@@ -61,19 +66,110 @@ async def get_current_active_user(
     return current_user
 
 
-def is_finance(current_user: User = Depends(get_current_active_user)) -> bool:
-    if current_user.role != Role.FINANCE:
-        raise HTTPException(status_code=403, detail="Not enough permissions")
-    return True
+async def read_claims(token: str) -> TokenClaims:
+    """
+    Authorization claims of a bearer token, straight from the signed token.
+
+    Only tokens without claims, or whose version predates a bump of the
+    user's token_version, cost a database load.
+    """
+    try:
+        payload = decode_token(token)
+        claims = TokenClaims(**payload)
+    except (TokenError, ValidationError):
+        raise HTTPException(
+            status_code=status.HTTP_403_FORBIDDEN,
+            detail="Could not validate credentials",
+        )
+    if claims.role is None or not await token_versions.is_current(int(claims.sub), claims.ver):
+        async with AsyncSessionLocal() as db:
+            user = await db.get(User, int(claims.sub))
+        if not user:
+            raise HTTPException(status_code=404, detail="User not found")
+        claims = TokenClaims(
+            sub=claims.sub, role=user.role, active=bool(user.is_active), ver=user.token_version
+        )
+    return claims
+
+
+async def get_current_claims(
+    request: Request,
+    token: str = Depends(reusable_oauth2)
+) -> TokenClaims:
+    """Authorization claims of the caller; see read_claims."""
+    claims = await read_claims(token)
+    request.state.user_id = claims.sub
+    return claims
+
+
+async def get_current_active_claims(
+    claims: TokenClaims = Depends(get_current_claims),
+) -> TokenClaims:
+    if not claims.active:
+        raise HTTPException(status_code=400, detail="Inactive user")
+    return claims
+
+
+async def get_read_db(
+    request: Request,
+    claims: TokenClaims = Depends(get_current_claims),
+) -> AsyncGenerator[AsyncConnection, None]:
+    """
+    Autocommit connection for read-only endpoints. Run Core statements on it;
+    rows are plain tuples, not ORM objects. It comes from the read replica
+    when one is configured and healthy, unless the caller wrote recently.
+    """
+    conn = await read_router.connect(claims.sub, pinned_until(request.cookies.get(PIN_COOKIE)))
+    try:
+        yield conn
+    finally:
+        await conn.close()
+
+
+def require_roles(*roles: Role):
+    def check(claims: TokenClaims = Depends(get_current_active_claims)) -> bool:
+        if claims.role not in roles:
+            raise HTTPException(status_code=403, detail="Not enough permissions")
+        return True
+    return check
+
+
+is_finance = require_roles(Role.FINANCE)
+is_event_manager = require_roles(Role.EVENT_MANAGER)
+is_finance_or_event_manager = require_roles(Role.FINANCE, Role.EVENT_MANAGER)
+is_admin = require_roles(Role.ADMIN)
 
 
-def is_event_manager(current_user: User = Depends(get_current_active_user)) -> bool:
-    if current_user.role != Role.EVENT_MANAGER:
-        raise HTTPException(status_code=403, detail="Not enough permissions")
-    return True
+def conditional_get(*tables: str, source=get_read_db):
+    """
+    ETag a read by the versions of `tables`, the caller and the URL, and
+    answer a matching If-None-Match with 304 before the endpoint queries or
+    serializes anything. `source` is the dependency the versions are read
+    through, so they come from the same database as the endpoint's rows.
+    """
+    async def check(
+        request: Request,
+        response: Response,
+        db=Depends(source),
+        claims: TokenClaims = Depends(get_current_active_claims),
+    ):
+        current = await versions.current(db, tables)
+        if current is None:
+            return
+        key = f"{current}|{claims.sub}|{claims.role}|{request.url.path}?{request.url.query}"
+        etag = f'W/"v{hashlib.blake2b(key.encode(), digest_size=16).hexdigest()}"'
+        headers = {"ETag": etag, "Cache-Control": "private, no-cache"}
+        if etag_matches(request.headers.get("if-none-match", ""), etag):
+            raise HTTPException(status_code=status.HTTP_304_NOT_MODIFIED, headers=headers)
+        response.headers.update(headers)
+    return check
 
 
-def is_finance_or_event_manager(current_user: User = Depends(get_current_active_user)) -> bool:
-    if current_user.role not in [Role.FINANCE, Role.EVENT_MANAGER]:
-        raise HTTPException(status_code=403, detail="Not enough permissions")
-    return True
+def query_budget(statements: int):
+    """
+    Declare how many SQL statements a route may run. Only checked when
+    QUERY_AUDIT is on; see QueryAuditMiddleware.
+    """
+    def declare(request: Request):
+        request.state.query_budget = statements
+    return declare
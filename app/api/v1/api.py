@@ -1,6 +1,7 @@
 from fastapi import APIRouter
 
-from app.api.v1.endpoints import auth, events, funds, chat, users
+from app.core.config import settings
+from app.api.v1.endpoints import auth, events, funds, chat, users, search, analytics, changes, jobs, debug
 
 api_router = APIRouter()
 api_router.include_router(auth.router, prefix="/auth", tags=["auth"])
@@ -8,3 +9,9 @@ api_router.include_router(events.router, prefix="/events", tags=["events"])
 api_router.include_router(funds.router, prefix="/funds", tags=["funds"])
 api_router.include_router(chat.router, prefix="/chat", tags=["chat"])
 api_router.include_router(users.router, prefix="/users", tags=["users"])
+api_router.include_router(search.router, prefix="/search", tags=["search"])
+api_router.include_router(analytics.router, prefix="/analytics", tags=["analytics"])
+if settings.REALTIME:
+    api_router.include_router(changes.router, prefix="/changes", tags=["changes"])
+api_router.include_router(jobs.router, prefix="/jobs", tags=["jobs"])
+api_router.include_router(debug.router, prefix="/debug", tags=["debug"])
@@ -0,0 +1,36 @@
+from datetime import date
+from typing import List, Optional
+
+from fastapi import APIRouter, Depends
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app import schemas
+from app.api import deps
+from app.db import analytics
+from app.db.models.budget_summary import BudgetSummary
+from app.db.models.event import AudienceRole
+
+router = APIRouter()
+
+@router.get("/budget", response_model=List[schemas.BudgetSummaryRead], dependencies=[Depends(deps.is_finance_or_event_manager)])
+async def read_budget_summary(
+    start: Optional[date] = None,
+    end: Optional[date] = None,
+    audience_role: Optional[AudienceRole] = None,
+    db: AsyncSession = Depends(deps.get_db),
+) -> List[BudgetSummary]:
+    """
+    Event spend per audience role and month, optionally limited to the months
+    between `start` and `end`.
+    """
+    return await analytics.budget_report(db, start, end, audience_role)
+
+@router.post("/budget/rebuild", dependencies=[Depends(deps.is_finance)])
+async def rebuild_budget_summary(
+    db: AsyncSession = Depends(deps.get_db),
+):
+    """
+    Recompute the budget summary from the events table.
+    """
+    rows = await analytics.rebuild_budget_summary(db)
+    return {"rows": rows}
@@ -1,10 +1,9 @@
 from datetime import timedelta
 import logging
-from fastapi import APIRouter, Depends, HTTPException, Body
+from fastapi import APIRouter, Depends, HTTPException, Body, status
 from fastapi.security import OAuth2PasswordRequestForm
 from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy import select
-from jose import jwt
 from pydantic import ValidationError
 
 from app import schemas
@@ -55,7 +54,7 @@ async def login(
     access_token_expires = timedelta(minutes=security.settings.ACCESS_TOKEN_EXPIRE_MINUTES)
     return {
         "access_token": security.create_access_token(
-            db_user.id, expires_delta=access_token_expires
+            db_user.id, expires_delta=access_token_expires, claims=security.user_claims(db_user)
         ),
         "refresh_token": security.create_refresh_token(db_user.id),
         "token_type": "bearer",
@@ -68,11 +67,9 @@ async def refresh_token(
     refresh_token: str = Body(...)
 ) -> schemas.Token:
     try:
-        payload = jwt.decode(
-            refresh_token, security.settings.SECRET_KEY, algorithms=[security.settings.ALGORITHM]
-        )
+        payload = security.decode_token(refresh_token)
         token_data = schemas.TokenPayload(**payload)
-    except (jwt.JWTError, ValidationError):
+    except (security.TokenError, ValidationError):
         raise HTTPException(
             status_code=status.HTTP_403_FORBIDDEN,
             detail="Invalid refresh token",
@@ -84,7 +81,7 @@ async def refresh_token(
     access_token_expires = timedelta(minutes=security.settings.ACCESS_TOKEN_EXPIRE_MINUTES)
     return {
         "access_token": security.create_access_token(
-            user.id, expires_delta=access_token_expires
+            user.id, expires_delta=access_token_expires, claims=security.user_claims(user)
         ),
         "refresh_token": refresh_token,
         "token_type": "bearer",
@@ -0,0 +1,62 @@
+from typing import Optional
+
+from fastapi import APIRouter, Depends, Header, Query
+from fastapi.responses import StreamingResponse
+
+from app import schemas
+from app.api import deps
+from app.core.change_feed import EVENTS, FUNDS, change_feed
+from app.core.config import settings
+from app.db.models.user import Role
+
+router = APIRouter()
+
+# Same audience as GET /funds/balance.
+FUND_READERS = {Role.FINANCE, Role.EVENT_MANAGER}
+RESET_FRAME = b"event: reset\ndata: {}\n\n"
+KEEPALIVE_FRAME = b": keepalive\n\n"
+
+
+@router.get("/stream", response_class=StreamingResponse)
+async def stream_changes(
+    claims: schemas.TokenClaims = Depends(deps.get_current_active_claims),
+    topics: Optional[str] = Query(None, description=f"Comma separated subset of {EVENTS}, {FUNDS}"),
+    last_event_id: Optional[int] = Header(None),
+    after: Optional[int] = Query(None, description="Resume after this sequence; overrides Last-Event-ID"),
+) -> StreamingResponse:
+    """
+    Server-sent events for event writes (`event.created`, `event.updated`,
+    `event.deleted`, carrying the event) and fund balance changes
+    (`fund.balance`, carrying the fund), for dashboards that would otherwise
+    poll `GET /events/` and `GET /funds/balance`.
+
+    Each change's `id` is its sequence number, so a reconnecting
+    EventSource resumes where it left off. An `event: reset` means changes
+    were missed and the client should reload its data before carrying on;
+    its `id` is where the stream carries on from. Fund changes are only sent
+    to finance and event managers.
+
+    Changes are streamed by the server worker that made them, so this needs
+    a single worker (WEB_CONCURRENCY=1) to see every write.
+    """
+    wanted = {EVENTS, FUNDS} if not topics else {topic.strip() for topic in topics.split(",")}
+    if claims.role not in FUND_READERS:
+        wanted.discard(FUNDS)
+    resume = after if after is not None else last_event_id
+
+    async def frames():
+        async for changes in change_feed.follow(resume, settings.CHANGE_FEED_KEEPALIVE_SECONDS):
+            if changes is None:
+                yield b"id: %d\n" % change_feed.sequence + RESET_FRAME
+            elif not changes:
+                yield KEEPALIVE_FRAME
+            else:
+                batch = b"".join(change.frame for change in changes if change.topic in wanted)
+                if batch:
+                    yield batch
+
+    return StreamingResponse(
+        frames(),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+    )
@@ -1,41 +1,34 @@
 from typing import List
 
 from fastapi import APIRouter, Depends, WebSocket, WebSocketDisconnect, Query
-from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.ext.asyncio import AsyncConnection, AsyncSession
 from sqlalchemy import select
 
 from app import schemas
 from app.api import deps
-from app.db.models.user import User, Role
-from app.db.models.message import Message, RecipientRole
+from app.core.config import settings
+from app.core.jobs import job_queue
+from app.core.notifications import PROTOCOL_TEXT, broadcast_message, manager, negotiate_protocol
+from app.db.session import AsyncSessionLocal
+from app.db.models.user import User
+from app.db.models.message import Message
+from app.db.models.role import RecipientRole
 from datetime import datetime, timezone
 
 
 router = APIRouter()
 
-class ConnectionManager:
-    def __init__(self):
-        self.active_connections: dict[int, WebSocket] = {}
-
-    async def connect(self, user_id: int, websocket: WebSocket):
-        await websocket.accept()
-        self.active_connections[user_id] = websocket
-
-    def disconnect(self, user_id: int):
-        if user_id in self.active_connections:
-            del self.active_connections[user_id]
-
-    async def send_personal_message(self, message: str, user_id: int):
-        if user_id in self.active_connections:
-            await self.active_connections[user_id].send_text(message)
-
-    async def broadcast(self, message: str):
-        for connection in self.active_connections.values():
-            await connection.send_text(message)
-
-manager = ConnectionManager()
+def message_payload(message: Message, username: str) -> dict:
+    return {
+        "id": message.id,
+        "sender_id": message.sender_id,
+        "sender": username,
+        "role": message.recipient_role.value,
+        "content": message.content,
+        "timestamp": message.timestamp.isoformat(),
+    }
 
-@router.post("/send")
+@router.post("/send", dependencies=[Depends(deps.query_budget(5))])
 async def send_message(
     *,
     db: AsyncSession = Depends(deps.get_db),
@@ -45,7 +38,7 @@ async def send_message(
     print(">>> received:", message_in.recipient_role, type(message_in.recipient_role))
     db_message = Message(
     sender_id=current_user.id,
-    recipient_role=message_in.recipient_role.value.upper(),
+    recipient_role=message_in.recipient_role,
     content=message_in.content,
     timestamp=datetime.now(timezone.utc),
 )
@@ -53,32 +46,25 @@ async def send_message(
     await db.commit()
     await db.refresh(db_message)
 
-    # Real-time broadcast
-    if message_in.recipient_role == RecipientRole.ALL:
-        await manager.broadcast(f"{current_user.username}: {message_in.content}")
-    else:
-        users = await db.execute(
-            select(User).filter(User.role == Role[message_in.recipient_role.value.upper()])
-        )
-        for user in users.scalars().all():
-            await manager.send_personal_message(
-                f"{current_user.username}: {message_in.content}", user.id
-            )
+    # Real-time broadcast, after the response
+    await job_queue.enqueue(
+        broadcast_message, message_payload(db_message, current_user.username), message_in.recipient_role
+    )
 
     return {"msg": "Message sent"}
 
-@router.get("/messages/{role}", response_model=List[schemas.MessageRead])
+@router.get("/messages/{role}", response_model=List[schemas.MessageRead], dependencies=[Depends(deps.query_budget(2))])
 async def get_messages(
     role: RecipientRole,
-    db: AsyncSession = Depends(deps.get_db),
-    current_user: User = Depends(deps.get_current_active_user),
-) -> List[Message]:
-    result = await db.execute(
-        select(Message)
-        .filter((Message.recipient_role == role) | (Message.recipient_role == RecipientRole.ALL))
+    conn: AsyncConnection = Depends(deps.get_read_db),
+    claims: schemas.TokenClaims = Depends(deps.get_current_active_claims),
+) -> List[dict]:
+    result = await conn.execute(
+        select(Message.__table__)
+        .filter(Message.recipient_role.in_((role, RecipientRole.ALL)))
         .order_by(Message.timestamp.desc())
     )
-    return result.scalars().all()
+    return [dict(row) for row in result.mappings()]
 
 @router.get("/ws-docs/{user_id}")
 async def websocket_docs(user_id: int):
@@ -87,10 +73,23 @@ async def websocket_docs(user_id: int):
 
     To connect to the websocket, use the following URL:
 
-    `ws://<host>/api/v1/chat/ws/{user_id}?token=<your-token>`
+    `ws://<host>/api/v1/chat/ws/{user_id}?token=<your-token>&protocol=<text|json|msgpack>`
+
+    The default `text` protocol sends one `username: content` text frame per
+    message. `json` and `msgpack` send frames holding a list of messages
+    (`id`, `sender_id`, `sender`, `role`, `content`, `timestamp`) produced
+    within the batch window; `msgpack` frames are binary. A server without
+    msgpack installed closes `msgpack` sockets with code 1003 right after
+    accepting them, so clients can reconnect with `json`. permessage-deflate
+    is negotiated by the server when the client offers it.
+
+    Events created or updated for the user's role (or for `ALL`) arrive as
+    `{"type": "event", "action": "created"|"updated", "event": {...}}`
+    entries, batched on every protocol; `text` frames carry one
+    `event <action>: <name> on <date>` line per event.
     """
     return {
-        "websocket_url": f"ws://<host>/api/v1/chat/ws/{user_id}?token=<your-token>",
+        "websocket_url": f"ws://<host>/api/v1/chat/ws/{user_id}?token=<your-token>&protocol=<text|json|msgpack>",
         "description": "WebSocket endpoint for real-time chat updates."
     }
 
@@ -99,22 +98,39 @@ async def websocket_endpoint(
     websocket: WebSocket,
     user_id: int,
     token: str = Query(...),
-    db: AsyncSession = Depends(deps.get_db),
+    protocol: str = Query(PROTOCOL_TEXT),
 ):
-    user = await deps.get_current_user_from_token(db, token)
+    if not settings.REALTIME:
+        await websocket.close(code=1008)
+        return
+    # Sockets live for hours, so never hold a pooled session across the
+    # receive loop: authenticate with a short-lived one and open a scoped
+    # session only for each persisted message.
+    async with AsyncSessionLocal() as db:
+        user = await deps.get_current_user_from_token(db, token)
     if not user or user.id != user_id:
         await websocket.close(code=1008)
         return
 
-    await manager.connect(user.id, websocket)
+    negotiated = negotiate_protocol(protocol)
+    if negotiated is None:
+        # Accepted first so the client gets the reason, not a bare 403.
+        await websocket.accept()
+        await websocket.close(code=1003, reason="msgpack is not installed on this server; use protocol=json")
+        return
+    await manager.connect(user.id, websocket, negotiated, user.role)
     try:
         while True:
             data = await websocket.receive_text()
             message_in = schemas.MessageCreate(recipient_role=RecipientRole.ALL, content=data)
-            db_message = Message(**message_in.dict(), sender_id=user.id)
-            db.add(db_message)
-            await db.commit()
-            await db.refresh(db_message)
-            await manager.broadcast(f"{user.username}: {data}")
+            async with AsyncSessionLocal() as db:
+                db_message = Message(
+                    **message_in.dict(),
+                    sender_id=user.id,
+                    timestamp=datetime.now(timezone.utc),
+                )
+                db.add(db_message)
+                await db.commit()
+            await manager.publish(message_payload(db_message, user.username))
     except WebSocketDisconnect:
         manager.disconnect(user.id)
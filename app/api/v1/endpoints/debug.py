@@ -0,0 +1,60 @@
+from typing import List
+
+from fastapi import APIRouter, Depends, HTTPException, Query, status
+from fastapi.responses import PlainTextResponse
+
+from app import schemas
+from app.api import deps
+from app.core.config import settings
+from app.core.loop_watchdog import loop_watchdog
+from app.core.profiling import profiler
+from app.db.query_audit import slow_queries
+
+router = APIRouter(dependencies=[Depends(deps.is_admin)])
+
+@router.get("/queries/slow", response_model=List[schemas.SlowQuery])
+async def read_slow_queries() -> list:
+    """
+    The slowest SQL statements this worker process has run, slowest first,
+    with the endpoint that ran them ("-" outside a request). Only filled in
+    when QUERY_AUDIT is on.
+    """
+    return slow_queries.report()
+
+@router.delete("/queries/slow", status_code=status.HTTP_204_NO_CONTENT)
+async def clear_slow_queries() -> None:
+    slow_queries.clear()
+
+@router.post("/profile", response_class=PlainTextResponse)
+async def profile_window(
+    seconds: float = Query(5, gt=0, le=settings.PROFILE_MAX_SECONDS),
+) -> PlainTextResponse:
+    """
+    Sample this worker's event loop for `seconds` and return the stacks in
+    collapsed format, e.g. for `flamegraph.pl`. Loop lag and slow callback
+    counts are in the response headers. Single requests can be profiled
+    instead by sending them with an `X-Profile: 1` header.
+    """
+    if profiler.busy:
+        raise HTTPException(status_code=409, detail="A profile is already being taken")
+    profile = await profiler.window(seconds)
+    return PlainTextResponse(profile.collapsed(), headers=profile.headers())
+
+@router.get("/profiles/{profile_id}", response_class=PlainTextResponse)
+async def read_profile(profile_id: str) -> PlainTextResponse:
+    """
+    A recent profile's stacks in collapsed format, by the `X-Profile-Id` of
+    the profiled response.
+    """
+    profile = profiler.profiles.get(profile_id)
+    if profile is None:
+        raise HTTPException(status_code=404, detail="Profile not found")
+    return PlainTextResponse(profile.collapsed(), headers=profile.headers())
+
+@router.get("/loop", response_model=schemas.LoopLagStats)
+async def read_loop_lag() -> dict:
+    """
+    This worker's event loop lag histogram and how many times the loop was
+    blocked past LOOP_BLOCKED_THRESHOLD_MS; each block's stack is logged.
+    """
+    return loop_watchdog.stats()
@@ -1,65 +1,71 @@
 from typing import List
 
 from fastapi import APIRouter, Depends, HTTPException
-from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.ext.asyncio import AsyncConnection, AsyncSession
 from sqlalchemy import select
 
 from app import schemas
 from app.api import deps
+from app.core.change_feed import EVENTS, change_feed
+from app.core.jobs import job_queue
+from app.core.notifications import notify_event, publish_fund_balance
+from app.db import analytics, ledger, versions
 from app.db.models.user import User, Role
 from app.db.models.event import Event
-from app.db.models.fund import Fund
 
 router = APIRouter()
 
 
-def is_admin(current_user: User = Depends(deps.get_current_active_user)) -> bool:
-    if current_user.role != Role.ADMIN:
-        raise HTTPException(status_code=403, detail="Not enough permissions")
-    return True
+is_admin = deps.is_admin
 
-@router.post("/", response_model=schemas.EventRead, dependencies=[Depends(deps.is_event_manager)])
+async def publish_event(kind: str, event: Event, notify: bool = False):
+    data = schemas.EventRead.model_validate(event).model_dump(mode="json")
+    change_feed.publish(EVENTS, kind, data)
+    if notify:
+        await job_queue.enqueue(notify_event, kind.removeprefix("event."), data)
+
+@router.post("/", response_model=schemas.EventRead, dependencies=[Depends(deps.is_event_manager), Depends(deps.query_budget(8))])
 async def create_event(
     *, 
     db: AsyncSession = Depends(deps.get_db), 
     event_in: schemas.EventCreate
 ) -> Event:
-    fund = await db.execute(select(Fund))
-    fund = fund.scalars().first()
-    if not fund or fund.balance < event_in.budget:
+    fund = await ledger.get_fund(db, event_in.fund_id)
+    if not fund or not await ledger.deduct(db, fund, event_in.budget):
         raise HTTPException(status_code=400, detail="Insufficient funds")
-    
-    fund.balance -= event_in.budget
-    db.add(fund)
 
-    db_event = Event(**event_in.dict())
+    db_event = Event(**event_in.dict(exclude={"fund_id"}), fund_id=fund.id)
     db.add(db_event)
+    await analytics.record_event(db, db_event)
     await db.commit()
     await db.refresh(db_event)
+    await publish_event("event.created", db_event, notify=True)
+    await job_queue.enqueue(publish_fund_balance, fund.id)
     return db_event
 
-@router.get("/", response_model=List[schemas.EventRead])
+@router.get("/", response_model=List[schemas.EventRead], dependencies=[Depends(deps.conditional_get(versions.EVENTS)), Depends(deps.query_budget(3))])
 async def read_events(
-    db: AsyncSession = Depends(deps.get_db),
+    conn: AsyncConnection = Depends(deps.get_read_db),
     skip: int = 0,
     limit: int = 100,
-    current_user: User = Depends(deps.get_current_active_user),
-) -> List[Event]:
-    result = await db.execute(select(Event).offset(skip).limit(limit))
-    return result.scalars().all()
+    claims: schemas.TokenClaims = Depends(deps.get_current_active_claims),
+) -> List[dict]:
+    result = await conn.execute(select(Event.__table__).offset(skip).limit(limit))
+    return [dict(row) for row in result.mappings()]
 
-@router.get("/{event_id}", response_model=schemas.EventRead)
+@router.get("/{event_id}", response_model=schemas.EventRead, dependencies=[Depends(deps.conditional_get(versions.EVENTS)), Depends(deps.query_budget(3))])
 async def read_event(
     event_id: int,
-    db: AsyncSession = Depends(deps.get_db),
-    current_user: User = Depends(deps.get_current_active_user),
-) -> Event:
-    event = await db.get(Event, event_id)
+    conn: AsyncConnection = Depends(deps.get_read_db),
+    claims: schemas.TokenClaims = Depends(deps.get_current_active_claims),
+) -> dict:
+    result = await conn.execute(select(Event.__table__).where(Event.id == event_id))
+    event = result.mappings().first()
     if not event:
         raise HTTPException(status_code=404, detail="Event not found")
-    return event
+    return dict(event)
 
-@router.put("/{event_id}", response_model=schemas.EventRead, dependencies=[Depends(deps.is_event_manager)])
+@router.put("/{event_id}", response_model=schemas.EventRead, dependencies=[Depends(deps.is_event_manager), Depends(deps.query_budget(8))])
 async def update_event(
     event_id: int,
     event_in: schemas.EventUpdate,
@@ -69,13 +75,16 @@ async def update_event(
     if not event:
         raise HTTPException(status_code=404, detail="Event not found")
 
+    await analytics.record_event(db, event, sign=-1)
     update_data = event_in.dict(exclude_unset=True)
     for key, value in update_data.items():
         setattr(event, key, value)
 
     db.add(event)
+    await analytics.record_event(db, event)
     await db.commit()
     await db.refresh(event)
+    await publish_event("event.updated", event, notify=True)
     return event
 
 @router.delete("/{event_id}", response_model=schemas.EventRead, dependencies=[Depends(deps.is_event_manager)])
@@ -88,5 +97,7 @@ async def delete_event(
         raise HTTPException(status_code=404, detail="Event not found")
 
     await db.delete(event)
+    await analytics.record_event(db, event, sign=-1)
     await db.commit()
+    await publish_event("event.deleted", event)
     return event
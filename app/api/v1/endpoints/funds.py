@@ -1,59 +1,99 @@
+from typing import List, Optional
+
 from fastapi import APIRouter, Depends, HTTPException
-from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.ext.asyncio import AsyncConnection, AsyncSession
 from sqlalchemy import select
+from sqlalchemy.exc import IntegrityError
 
 from app import schemas
 from app.api import deps
+from app.core.notifications import fund_read, publish_balance
+from app.db import ledger
 from app.db.models.user import User, Role
 from app.db.models.fund import Fund
+from app.db.session import AsyncSessionLocal
 
 router = APIRouter()
 
-@router.get("/balance", response_model=schemas.FundRead, dependencies=[Depends(deps.is_finance_or_event_manager)])
-async def get_fund_balance(
+@router.get("/", response_model=List[schemas.FundRead], dependencies=[Depends(deps.is_finance_or_event_manager)])
+async def read_funds(
+    conn: AsyncConnection = Depends(deps.get_read_db),
+) -> List[dict]:
+    return await ledger.read_funds(conn)
+
+@router.post("/", response_model=schemas.FundRead, dependencies=[Depends(deps.is_finance)])
+async def create_fund(
+    *,
     db: AsyncSession = Depends(deps.get_db),
-) -> Fund:
-    fund = await db.execute(select(Fund))
-    fund = fund.scalars().first()
-    if not fund:
-        fund = Fund(balance=0)
-        db.add(fund)
+    fund_in: schemas.FundCreate
+) -> dict:
+    existing = await db.execute(select(Fund).where(Fund.name == fund_in.name))
+    if existing.scalars().first():
+        raise HTTPException(status_code=400, detail="A fund with this name already exists")
+    try:
+        fund = await ledger.create_fund(db, fund_in.name, fund_in.balance, fund_in.shard_count)
         await db.commit()
-        await db.refresh(fund)
-    return fund
+    except IntegrityError:
+        # Lost a race with a concurrent create of the same name.
+        await db.rollback()
+        raise HTTPException(status_code=400, detail="A fund with this name already exists")
+    return await publish_balance(db, fund)
+
+@router.get("/balance", response_model=schemas.FundRead, dependencies=[Depends(deps.is_finance_or_event_manager)])
+async def get_fund_balance(
+    fund_id: Optional[int] = None,
+    conn: AsyncConnection = Depends(deps.get_read_db),
+) -> dict:
+    fund = await ledger.read_fund(conn, fund_id)
+    if fund:
+        return fund
+    if fund_id is not None:
+        raise HTTPException(status_code=404, detail="Fund not found")
+    # First read on an empty database creates the default fund on the primary.
+    async with AsyncSessionLocal() as db:
+        try:
+            fund = await ledger.create_fund(db)
+            await db.commit()
+        except IntegrityError:
+            # A concurrent first request created it.
+            await db.rollback()
+            return await fund_read(db, await ledger.get_fund(db))
+        return await publish_balance(db, fund)
 
 @router.post("/set-balance", response_model=schemas.FundRead, dependencies=[Depends(deps.is_finance)])
 async def set_fund_balance(
-    *, 
-    db: AsyncSession = Depends(deps.get_db), 
+    *,
+    db: AsyncSession = Depends(deps.get_db),
+    fund_id: Optional[int] = None,
     balance_in: schemas.FundSetBalance
-) -> Fund:
-    fund = await db.execute(select(Fund))
-    fund = fund.scalars().first()
+) -> dict:
+    fund = await ledger.get_fund(db, fund_id)
     if not fund:
-        fund = Fund(balance=balance_in.balance)
-    else:
-        fund.balance = balance_in.balance
-    db.add(fund)
+        if fund_id is not None:
+            raise HTTPException(status_code=404, detail="Fund not found")
+        try:
+            fund = await ledger.create_fund(db, balance=balance_in.balance)
+            await db.commit()
+            return await publish_balance(db, fund)
+        except IntegrityError:
+            # A concurrent first request created the default fund; set it.
+            await db.rollback()
+            fund = await ledger.get_fund(db)
+    await ledger.set_balance(db, fund, balance_in.balance)
     await db.commit()
-    await db.refresh(fund)
-    return fund
+    return await publish_balance(db, fund)
 
 @router.post("/deduct", response_model=schemas.FundRead, dependencies=[Depends(deps.is_finance_or_event_manager)])
 async def deduct_fund(
-    *, 
-    db: AsyncSession = Depends(deps.get_db), 
+    *,
+    db: AsyncSession = Depends(deps.get_db),
+    fund_id: Optional[int] = None,
     deduct_in: schemas.FundDeduct
-) -> Fund:
-    fund = await db.execute(select(Fund))
-    fund = fund.scalars().first()
+) -> dict:
+    fund = await ledger.get_fund(db, fund_id)
     if not fund:
         raise HTTPException(status_code=404, detail="Fund not found")
-    if fund.balance < deduct_in.amount:
+    if not await ledger.deduct(db, fund, deduct_in.amount):
         raise HTTPException(status_code=400, detail="Insufficient funds")
-    
-    fund.balance -= deduct_in.amount
-    db.add(fund)
     await db.commit()
-    await db.refresh(fund)
-    return fund
\ No newline at end of file
+    return await publish_balance(db, fund)
@@ -0,0 +1,14 @@
+from fastapi import APIRouter, Depends
+
+from app import schemas
+from app.api import deps
+from app.core.jobs import job_queue
+
+router = APIRouter()
+
+@router.get("/stats", response_model=schemas.JobQueueStats, dependencies=[Depends(deps.is_admin)])
+async def read_job_stats() -> dict:
+    """
+    Background job queue depth and counters for this worker process.
+    """
+    return job_queue.stats()
@@ -0,0 +1,42 @@
+from typing import List
+
+from fastapi import APIRouter, Depends, Query
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app import schemas
+from app.api import deps
+from app.db import search as search_index
+from app.db.models.role import RecipientRole
+
+router = APIRouter()
+
+SCOPE_KINDS = {
+    schemas.SearchScope.ALL: (search_index.MESSAGES, search_index.EVENTS),
+    schemas.SearchScope.MESSAGES: (search_index.MESSAGES,),
+    schemas.SearchScope.EVENTS: (search_index.EVENTS,),
+}
+
+@router.get("/", response_model=List[schemas.SearchHit])
+async def search(
+    q: str = Query(..., min_length=1),
+    scope: schemas.SearchScope = schemas.SearchScope.ALL,
+    skip: int = 0,
+    limit: int = Query(20, le=100),
+    db: AsyncSession = Depends(deps.get_db),
+    claims: schemas.TokenClaims = Depends(deps.get_current_active_claims),
+) -> List[dict]:
+    """
+    Search chat messages and event names/descriptions, best matches first.
+    Messages are limited to those sent to the caller's role or to everyone,
+    as in GET /chat/messages/{role}.
+    """
+    roles = (RecipientRole.ALL, RecipientRole[claims.role.name])
+    hits = await search_index.search(db, q, SCOPE_KINDS[scope], skip=skip, limit=limit, roles=roles)
+    return [
+        {
+            "kind": kind,
+            "score": score,
+            "message" if kind == search_index.MESSAGES else "event": row,
+        }
+        for kind, row, score in hits
+    ]
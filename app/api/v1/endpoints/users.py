@@ -1,29 +1,99 @@
-from fastapi import APIRouter, Depends, HTTPException, status
-from typing import List
-from sqlalchemy.ext.asyncio import AsyncSession
-from sqlalchemy import select
+import csv
+import io
+import json
+from datetime import datetime
+from fastapi import APIRouter, Depends, HTTPException, Query, Request, Response, status
+from typing import List, Optional
+from pydantic import ValidationError
+from sqlalchemy.ext.asyncio import AsyncConnection, AsyncSession
+from sqlalchemy import insert, or_, select
+from sqlalchemy.exc import IntegrityError
 
+from app.core.config import settings
+from app.db import counters, versions
+from app.db.models.deleted_user import DeletedUser
 from app.db.models.user import Role, User
-from app.schemas.user import UserCreate, UserRead, UserUpdate
-from app.api.deps import get_current_active_user, get_db
-from app.core.security import get_password_hash, verify_password
+from app.schemas.user import UserCreate, UserImportResult, UserListItem, UserRead, UserUpdate
+from app.api.deps import (
+    conditional_get, get_current_active_claims, get_current_active_user, get_db, get_read_db, query_budget,
+)
+from app.core.notifications import manager
+from app.core.token_versions import token_versions
+from app.schemas.token import TokenClaims
+from app.core.security import get_password_hash, hash_passwords, verify_password
 
 router = APIRouter()
 
-@router.get("/", response_model=List[UserRead])
+
+# Signed into access tokens by security.user_claims.
+CLAIM_FIELDS = ("role", "is_active")
+
+
+def bump_token_version(user: User):
+    """Make tokens issued before a role/status change fall back to the database."""
+    user.token_version = (user.token_version or 0) + 1
+
+
+def claims_changed(user: User, user_data: dict) -> bool:
+    return any(field in user_data and user_data[field] != getattr(user, field) for field in CLAIM_FIELDS)
+
+LISTABLE_FIELDS = ("id", "username", "email", "role", "is_active")
+
+@router.get(
+    "/",
+    response_model=List[UserListItem],
+    response_model_exclude_unset=True,
+    dependencies=[Depends(conditional_get(versions.USERS, source=get_db)), Depends(query_budget(6))],
+)
 async def read_users(
+    response: Response,
     db: AsyncSession = Depends(get_db),
-    current_user: User = Depends(get_current_active_user)
-) -> List[User]:
+    claims: TokenClaims = Depends(get_current_active_claims),
+    after_id: Optional[int] = None,
+    limit: int = Query(100, ge=1, le=1000),
+    role: Optional[Role] = None,
+    is_active: Optional[bool] = None,
+    username_prefix: Optional[str] = None,
+    email_prefix: Optional[str] = None,
+    fields: Optional[str] = Query(None, description="Comma separated subset of " + ", ".join(LISTABLE_FIELDS)),
+) -> List[dict]:
     """
-    Get all users.
+    Get users, `limit` at a time in id order.
+
+    Pass the `X-Next-After` header of one page as `after_id` to get the next;
+    it is absent on the last page. `X-Total-Count` is the total number of
+    users, read from a maintained counter rather than counted per request.
     """
-    if current_user.role != Role.ADMIN:
+    if claims.role != Role.ADMIN:
         raise HTTPException(
             status_code=400, detail="The user doesn't have enough privileges"
         )
-    users = await db.execute(select(User))
-    return users.scalars().all()
+    names = LISTABLE_FIELDS
+    if fields:
+        names = [name.strip() for name in fields.split(",") if name.strip()]
+        unknown = set(names) - set(LISTABLE_FIELDS)
+        if unknown:
+            raise HTTPException(status_code=400, detail=f"Unknown fields: {', '.join(sorted(unknown))}")
+        names = ["id"] + [name for name in names if name != "id"]
+
+    query = select(*(getattr(User, name) for name in names)).order_by(User.id).limit(limit + 1)
+    if after_id is not None:
+        query = query.where(User.id > after_id)
+    if role is not None:
+        query = query.where(User.role == role)
+    if is_active is not None:
+        query = query.where(User.is_active == is_active)
+    if username_prefix:
+        query = query.where(User.username.startswith(username_prefix, autoescape=True))
+    if email_prefix:
+        query = query.where(User.email.startswith(email_prefix, autoescape=True))
+
+    rows = (await db.execute(query)).mappings().all()
+    if len(rows) > limit:
+        rows = rows[:limit]
+        response.headers["X-Next-After"] = str(rows[-1]["id"])
+    response.headers["X-Total-Count"] = str(await counters.get_count(db, counters.USERS, User))
+    return [dict(row) for row in rows]
 
 @router.post("/", response_model=UserRead)
 async def create_user(
@@ -54,6 +124,114 @@ async def create_user(
     await db.refresh(db_user)
     return db_user
 
+def parse_import_rows(body: bytes, content_type: str) -> list[dict]:
+    text = body.decode("utf-8-sig")
+    if content_type.startswith("text/csv"):
+        return list(csv.DictReader(io.StringIO(text)))
+    rows = json.loads(text)
+    if not isinstance(rows, list):
+        raise ValueError("Expected a JSON array of users")
+    return rows
+
+@router.post("/import", response_model=UserImportResult)
+async def import_users(
+    request: Request,
+    db: AsyncSession = Depends(get_db),
+    claims: TokenClaims = Depends(get_current_active_claims)
+) -> dict:
+    """
+    Create many users at once from a JSON array or a CSV body
+    (`Content-Type: text/csv`, columns username,email,password,role).
+
+    Valid rows are inserted together; invalid or duplicate rows are skipped
+    and reported with their zero-based row number.
+    """
+    if claims.role != Role.ADMIN:
+        raise HTTPException(
+            status_code=400, detail="The user doesn't have enough privileges"
+        )
+    try:
+        rows = parse_import_rows(await request.body(), request.headers.get("content-type", ""))
+    except (ValueError, csv.Error) as exc:
+        raise HTTPException(status_code=400, detail=f"Could not parse import: {exc}")
+    if len(rows) > settings.USER_IMPORT_MAX_ROWS:
+        raise HTTPException(
+            status_code=400,
+            detail=f"At most {settings.USER_IMPORT_MAX_ROWS} users can be imported at once",
+        )
+
+    errors = []
+    valid: list[tuple[int, UserCreate]] = []
+    for index, row in enumerate(rows):
+        try:
+            valid.append((index, UserCreate.model_validate(row)))
+        except ValidationError as exc:
+            detail = "; ".join(
+                f"{'.'.join(map(str, err['loc']))}: {err['msg']}" for err in exc.errors()
+            )
+            errors.append({"row": index, "detail": detail})
+
+    usernames = {user_in.username for _, user_in in valid}
+    emails = {user_in.email for _, user_in in valid}
+    taken = set()
+    if valid:
+        existing = await db.execute(
+            select(User.username, User.email).where(
+                or_(User.username.in_(usernames), User.email.in_(emails))
+            )
+        )
+        for username, email in existing:
+            taken.update((("username", username), ("email", email)))
+
+    accepted: list[tuple[int, UserCreate]] = []
+    for index, user_in in valid:
+        clash = [
+            field for field, value in (("username", user_in.username), ("email", user_in.email))
+            if (field, value) in taken
+        ]
+        if clash:
+            errors.append({"row": index, "detail": f"A user with this {' and '.join(clash)} already exists"})
+            continue
+        taken.update((("username", user_in.username), ("email", user_in.email)))
+        accepted.append((index, user_in))
+
+    created = 0
+    if accepted:
+        # End the read transaction so its connection goes back to the pool
+        # while the passwords are hashed.
+        await db.rollback()
+        hashed = await hash_passwords([user_in.password for _, user_in in accepted])
+        new_users = [
+            (index, {
+                "username": user_in.username,
+                "email": user_in.email,
+                "hashed_password": hashed_password,
+                "role": user_in.role,
+            })
+            for (index, user_in), hashed_password in zip(accepted, hashed)
+        ]
+        try:
+            await db.execute(insert(User), [values for _, values in new_users])
+            created = len(new_users)
+        except IntegrityError:
+            # A clash the check above missed: a user created meanwhile, or a
+            # case-insensitive collation match. Insert row by row to find it.
+            await db.rollback()
+            for index, values in new_users:
+                try:
+                    async with db.begin_nested():
+                        await db.execute(insert(User), [values])
+                    created += 1
+                except IntegrityError:
+                    errors.append({"row": index, "detail": "A user with this username or email already exists"})
+        if created:
+            await counters.adjust(db, counters.USERS, created)
+            await versions.bump(db, versions.USERS)
+            await db.commit()
+
+    errors.sort(key=lambda error: error["row"])
+    return {"created": created, "errors": errors}
+
 @router.get("/me", response_model=UserRead)
 def read_users_me(current_user: User = Depends(get_current_active_user)):
     """
@@ -85,12 +263,18 @@ async def update_user_me(
         current_user.hashed_password = get_password_hash(password)
         
     user_data = user_in.dict(exclude_unset=True)
+    role_changed = "role" in user_data and user_data["role"] != current_user.role
+    if claims_changed(current_user, user_data):
+        bump_token_version(current_user)
     for field in user_data:
         setattr(current_user, field, user_data[field])
         
     db.add(current_user)
     await db.commit()
     await db.refresh(current_user)
+    token_versions.bump(current_user.id, current_user.token_version)
+    if role_changed:
+        manager.set_role(current_user.id, current_user.role)
     return current_user
 
 @router.get("/roles", response_model=List[str])
@@ -100,23 +284,26 @@ def get_roles():
     """
     return [role.value.upper() for role in Role]
 
-@router.get("/{user_id}", response_model=UserRead)
+@router.get("/{user_id}", response_model=UserRead, dependencies=[Depends(conditional_get(versions.USERS)), Depends(query_budget(3))])
 async def read_user_by_id(
     user_id: int,
-    db: AsyncSession = Depends(get_db),
-    current_user: User = Depends(get_current_active_user)
-) -> User:
+    conn: AsyncConnection = Depends(get_read_db),
+    claims: TokenClaims = Depends(get_current_active_claims)
+) -> dict:
     """
     Get a specific user by id.
     """
-    if current_user.role != Role.ADMIN:
+    if claims.role != Role.ADMIN:
         raise HTTPException(
             status_code=400, detail="The user doesn't have enough privileges"
         )
-    user = await db.get(User, user_id)
+    result = await conn.execute(
+        select(User.id, User.username, User.email, User.role, User.is_active).where(User.id == user_id)
+    )
+    user = result.mappings().first()
     if not user:
         raise HTTPException(status_code=404, detail="User not found")
-    return user
+    return dict(user)
 
 @router.put("/{user_id}", response_model=UserRead)
 async def update_user(
@@ -124,12 +311,12 @@ async def update_user(
     db: AsyncSession = Depends(get_db), 
     user_id: int,
     user_in: UserUpdate,
-    current_user: User = Depends(get_current_active_user)
+    claims: TokenClaims = Depends(get_current_active_claims)
 ) -> User:
     """
     Update a user.
     """
-    if current_user.role != Role.ADMIN:
+    if claims.role != Role.ADMIN:
         raise HTTPException(
             status_code=400, detail="The user doesn't have enough privileges"
         )
@@ -149,11 +336,17 @@ async def update_user(
                 detail="The user with this username already exists in the system.",
             )
     user_data = user_in.dict(exclude_unset=True)
+    role_changed = "role" in user_data and user_data["role"] != user.role
+    if claims_changed(user, user_data):
+        bump_token_version(user)
     for field in user_data:
         setattr(user, field, user_data[field])
     db.add(user)
     await db.commit()
     await db.refresh(user)
+    token_versions.bump(user.id, user.token_version)
+    if role_changed:
+        manager.set_role(user.id, user.role)
     return user
 
 @router.delete("/{user_id}", status_code=status.HTTP_204_NO_CONTENT)
@@ -161,12 +354,12 @@ async def delete_user(
     *, 
     db: AsyncSession = Depends(get_db), 
     user_id: int,
-    current_user: User = Depends(get_current_active_user)
+    claims: TokenClaims = Depends(get_current_active_claims)
 ):
     """
     Delete a user.
     """
-    if current_user.role != Role.ADMIN:
+    if claims.role != Role.ADMIN:
         raise HTTPException(
             status_code=400, detail="The user doesn't have enough privileges"
         )
@@ -176,6 +369,10 @@ async def delete_user(
             status_code=404,
             detail="The user with this username does not exist in the system",
         )
+    revoked_version = (user.token_version or 0) + 1
     await db.delete(user)
+    # Other workers learn of the revocation from the tombstone.
+    await db.merge(DeletedUser(user_id=user_id, token_version=revoked_version, deleted_at=datetime.utcnow()))
     await db.commit()
+    token_versions.bump(user_id, revoked_version)
     return {"ok": True}
@@ -0,0 +1,79 @@
+import asyncio
+import json
+
+import click
+
+from app.db import analytics
+from app.db.online_migration import OnlineTableChange
+from app.db.session import AsyncSessionLocal, engine
+
+
+def run_with_session(func):
+    async def run():
+        try:
+            async with AsyncSessionLocal() as db:
+                return await func(db)
+        finally:
+            await engine.dispose()
+    return asyncio.run(run())
+
+
+@click.group()
+def cli():
+    """Corporate Event Management maintenance commands."""
+
+
+@cli.command("rebuild-budget-summary")
+def rebuild_budget_summary():
+    """Recompute the budget_summaries table from events."""
+    rows = run_with_session(analytics.rebuild_budget_summary)
+    click.echo(f"Rebuilt {rows} budget summary rows")
+
+
+@cli.command("estimate-online-change")
+@click.argument("table")
+@click.option("--batch-size", default=5000, show_default=True)
+@click.option("--throttle", default=0.05, show_default=True, help="Seconds to sleep between batches.")
+def estimate_online_change(table, batch_size, throttle):
+    """Estimate how long an online rebuild of TABLE would take to copy."""
+    async def run():
+        try:
+            async with engine.connect() as conn:
+                return await conn.run_sync(
+                    lambda sync_conn: OnlineTableChange(
+                        sync_conn, table, batch_size=batch_size, throttle=throttle
+                    ).estimate()
+                )
+        finally:
+            await engine.dispose()
+    click.echo(f"{table}: {asyncio.run(run())}")
+
+
+@cli.command("build-openapi")
+@click.argument("output", type=click.Path(dir_okay=False, writable=True))
+def build_openapi(output):
+    """Write the OpenAPI schema to OUTPUT for OPENAPI_SCHEMA_PATH."""
+    from fastapi import FastAPI
+    from app.main import app
+
+    with open(output, "w") as schema_file:
+        json.dump(FastAPI.openapi(app), schema_file, separators=(",", ":"))
+    click.echo(f"Wrote OpenAPI schema to {output}")
+
+
+@cli.command("serve")
+@click.option("--host", default="0.0.0.0", show_default=True)
+@click.option("--port", default=8000, show_default=True)
+@click.option("--preload/--no-preload", default=True, show_default=True, help="Import the app before forking workers.")
+def serve(host, port, preload):
+    """Serve the API with WEB_CONCURRENCY pre-forked uvicorn workers."""
+    from app.core.server import serve
+
+    try:
+        serve(host=host, port=port, preload=preload)
+    except RuntimeError as exc:
+        raise click.ClickException(str(exc))
+
+
+if __name__ == "__main__":
+    cli()
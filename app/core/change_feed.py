@@ -0,0 +1,91 @@
+import asyncio
+import itertools
+import json
+import time
+from collections import deque
+from dataclasses import dataclass, field
+from typing import AsyncIterator, Optional
+
+from app.core.config import settings
+
+EVENTS = "events"
+FUNDS = "funds"
+
+
+@dataclass
+class Change:
+    sequence: int
+    topic: str
+    kind: str
+    frame: bytes = field(repr=False)
+
+
+class ChangeFeed:
+    """
+    Sequenced, in-memory log of recent writes that SSE clients follow.
+
+    Publishing encodes the SSE frame once, appends it to a ring buffer of
+    CHANGE_FEED_BUFFER_SIZE changes and wakes every waiting subscriber, so a
+    change costs the same however many dashboards are connected. Sequences
+    start from the boot time in microseconds and go up by one per change, so
+    they keep increasing across restarts. A client resuming from a sequence
+    that has left the buffer, or that this feed never issued, is told to
+    reset and reload instead.
+
+    The feed lives in one process: with several server workers, a write is
+    only streamed to the clients connected to the worker that handled it,
+    and a client reconnecting to another worker is reset.
+    """
+
+    def __init__(self, buffer_size: int = None):
+        self.sequence = time.time_ns() // 1000
+        self.started = self.sequence
+        self._buffer: deque[Change] = deque(maxlen=buffer_size or settings.CHANGE_FEED_BUFFER_SIZE)
+        self._published = asyncio.Event()
+
+    def publish(self, topic: str, kind: str, data: dict):
+        self.sequence += 1
+        frame = f"id: {self.sequence}\nevent: {kind}\ndata: {json.dumps(data, default=str)}\n\n"
+        self._buffer.append(Change(self.sequence, topic, kind, frame.encode()))
+        published, self._published = self._published, asyncio.Event()
+        published.set()
+
+    def since(self, sequence: int) -> Optional[list[Change]]:
+        """Changes after `sequence`, or None when some were already dropped."""
+        if sequence >= self.sequence:
+            return []
+        if not self._buffer or sequence < self._buffer[0].sequence - 1:
+            return None
+        start = sequence - self._buffer[0].sequence + 1
+        return list(itertools.islice(self._buffer, start, None))
+
+    async def follow(self, after: Optional[int], idle_timeout: float) -> AsyncIterator[Optional[list[Change]]]:
+        """
+        Yield each batch of changes after `after` as it is published: an
+        empty batch after `idle_timeout` seconds without one, and None when
+        the client has to reload because changes it missed were dropped or
+        `after` did not come from this feed, e.g. from before a restart or
+        from another worker.
+        """
+        if after is None:
+            after = self.sequence
+        elif not self.started <= after <= self.sequence:
+            after = self.sequence
+            yield None
+        while True:
+            published = self._published
+            changes = self.since(after)
+            if changes is None:
+                after = self.sequence
+                yield None
+            elif changes:
+                after = changes[-1].sequence
+                yield changes
+            else:
+                try:
+                    await asyncio.wait_for(published.wait(), idle_timeout)
+                except asyncio.TimeoutError:
+                    yield []
+
+
+change_feed = ChangeFeed()
@@ -0,0 +1,126 @@
+import gzip
+import hashlib
+
+from starlette.datastructures import Headers, MutableHeaders
+
+from app.core.config import settings
+
+# Only JSON API responses are buffered; endpoints render them in memory
+# anyway. Everything else streams through untouched.
+BUFFERED_TYPES = ("application/json",)
+
+
+def accepts(accept_encoding: str, coding: str) -> bool:
+    for part in accept_encoding.split(","):
+        name, _, params = part.strip().partition(";")
+        if name.strip().lower() in (coding, "*"):
+            return params.replace(" ", "") not in ("q=0", "q=0.0", "q=0.00", "q=0.000")
+    return False
+
+
+def vary_on_encoding(headers: MutableHeaders):
+    """Add Accept-Encoding to Vary unless the response already varies on it."""
+    vary = {token.strip().lower() for value in headers.getlist("vary") for token in value.split(",")}
+    if not vary & {"accept-encoding", "*"}:
+        headers.add_vary_header("Accept-Encoding")
+
+
+def etag_matches(if_none_match: str, etag: str) -> bool:
+    """Weak comparison, as If-None-Match requires."""
+    if if_none_match.strip() == "*":
+        return True
+    bare = etag.removeprefix("W/")
+    return any(tag.strip().removeprefix("W/") == bare for tag in if_none_match.split(","))
+
+
+class HTTPCacheMiddleware:
+    """
+    Conditional GET and gzip for JSON responses.
+
+    A successful GET without an ETag gets a weak one hashed from its body,
+    and a matching If-None-Match is answered with 304 and no body. Endpoints
+    that set their own ETag (see deps.conditional_get) can answer 304 before
+    querying at all. Bodies of COMPRESSION_MIN_SIZE bytes or more are
+    gzipped at COMPRESSION_LEVEL when the client accepts it.
+
+    Only JSON responses that need one of those are buffered: other types,
+    responses that are already encoded, and JSON that already has its ETag
+    and is too small to gzip are sent on as they are produced.
+
+    It has to wrap IdempotencyMiddleware, which stores bodies without their
+    Content-Encoding; CORSMiddleware wraps it in turn.
+    """
+
+    def __init__(self, app, minimum_size: int = None, level: int = None):
+        self.app = app
+        self.minimum_size = settings.COMPRESSION_MIN_SIZE if minimum_size is None else minimum_size
+        self.level = settings.COMPRESSION_LEVEL if level is None else level
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+        request_headers = Headers(scope=scope)
+        conditional = scope["method"] == "GET"
+        use_gzip = accepts(request_headers.get("accept-encoding", ""), "gzip")
+        if not conditional and not use_gzip:
+            await self.app(scope, receive, send)
+            return
+
+        start = None
+        passthrough = False
+        chunks = []
+
+        async def buffered_send(message):
+            nonlocal start, passthrough
+            if passthrough:
+                await send(message)
+                return
+            if message["type"] == "http.response.start":
+                if self.should_buffer(message, conditional, use_gzip):
+                    start = message
+                    return
+                passthrough = True
+                headers = MutableHeaders(raw=list(message.get("headers", [])))
+                if headers.get("content-type", "").startswith(BUFFERED_TYPES) and "content-encoding" not in headers:
+                    vary_on_encoding(headers)
+                    message = {**message, "headers": headers.raw}
+                await send(message)
+                return
+            if message["type"] != "http.response.body":
+                await send(message)
+                return
+            chunks.append(message.get("body", b""))
+            if not message.get("more_body", False):
+                await self.finish(start, b"".join(chunks), request_headers, conditional, use_gzip, send)
+
+        await self.app(scope, receive, buffered_send)
+
+    def should_buffer(self, start, conditional: bool, use_gzip: bool) -> bool:
+        headers = Headers(raw=start.get("headers", []))
+        if "content-encoding" in headers or not headers.get("content-type", "").startswith(BUFFERED_TYPES):
+            return False
+        needs_etag = conditional and start["status"] == 200 and "etag" not in headers
+        length = headers.get("content-length")
+        could_gzip = use_gzip and (length is None or int(length) >= self.minimum_size)
+        return needs_etag or could_gzip
+
+    async def finish(self, start, body: bytes, request_headers: Headers, conditional: bool, use_gzip: bool, send):
+        headers = MutableHeaders(raw=list(start.get("headers", [])))
+        status = start["status"]
+        if conditional and status == 200:
+            if "etag" not in headers:
+                headers["ETag"] = f'W/"{hashlib.blake2b(body, digest_size=16).hexdigest()}"'
+            if etag_matches(request_headers.get("if-none-match", ""), headers["etag"]):
+                del headers["content-length"]
+                del headers["content-type"]
+                await send({"type": "http.response.start", "status": 304, "headers": headers.raw})
+                await send({"type": "http.response.body", "body": b""})
+                return
+        vary_on_encoding(headers)
+        if use_gzip and len(body) >= self.minimum_size:
+            body = gzip.compress(body, compresslevel=self.level)
+            headers["Content-Encoding"] = "gzip"
+            headers["Content-Length"] = str(len(body))
+        await send({**start, "headers": headers.raw})
+        await send({"type": "http.response.body", "body": body})
@@ -0,0 +1,217 @@
+import asyncio
+import hashlib
+import json
+import time
+from collections import OrderedDict
+from dataclasses import dataclass
+from datetime import datetime, timedelta, timezone
+from typing import Optional
+
+from sqlalchemy import delete, update
+from sqlalchemy.exc import IntegrityError
+from starlette.datastructures import Headers
+
+from app.core.config import settings
+from app.db.models.idempotency_key import IdempotencyKey
+from app.db.session import AsyncSessionLocal
+
+HEADER = "idempotency-key"
+MUTATING_METHODS = {"POST", "PUT", "PATCH", "DELETE"}
+PURGE_INTERVAL_SECONDS = 60
+
+
+def _utcnow() -> datetime:
+    return datetime.now(timezone.utc).replace(tzinfo=None)
+
+
+@dataclass
+class StoredResponse:
+    fingerprint: str
+    status_code: Optional[int]
+    content_type: Optional[str]
+    body: bytes
+    expires_at: datetime
+
+
+class IdempotencyStore:
+    """
+    Bounded in-memory LRU in front of the `idempotency_keys` table.
+
+    The table is the source of truth across workers: the first request with
+    a key claims it by inserting a pending row, so a concurrent duplicate on
+    any worker sees the claim instead of redoing the work. A pending claim
+    only lasts IDEMPOTENCY_PENDING_LEASE_SECONDS, so a worker that dies
+    mid-request blocks retries of the key for that long rather than for the
+    whole IDEMPOTENCY_TTL_SECONDS a completed response is kept.
+    """
+
+    def __init__(self, session_factory=AsyncSessionLocal, max_size: int = None, ttl: int = None, lease: int = None):
+        self.session_factory = session_factory
+        self.max_size = max_size or settings.IDEMPOTENCY_CACHE_SIZE
+        self.ttl = timedelta(seconds=ttl or settings.IDEMPOTENCY_TTL_SECONDS)
+        self.lease = timedelta(seconds=lease or settings.IDEMPOTENCY_PENDING_LEASE_SECONDS)
+        self._memory: OrderedDict[str, StoredResponse] = OrderedDict()
+        self._last_purge = 0.0
+
+    def _remember(self, key: str, stored: StoredResponse):
+        self._memory[key] = stored
+        self._memory.move_to_end(key)
+        while len(self._memory) > self.max_size:
+            self._memory.popitem(last=False)
+
+    async def claim(self, key: str, fingerprint: str) -> Optional[StoredResponse]:
+        """
+        Claim `key` for a new request. Returns None when the caller now owns
+        the key, otherwise the live record (completed or still pending).
+        """
+        now = _utcnow()
+        stored = self._memory.get(key)
+        if stored and stored.expires_at > now:
+            self._memory.move_to_end(key)
+            return stored
+
+        async with self.session_factory() as db:
+            if time.monotonic() - self._last_purge > PURGE_INTERVAL_SECONDS:
+                self._last_purge = time.monotonic()
+                await db.execute(delete(IdempotencyKey).where(IdempotencyKey.expires_at <= now))
+                await db.commit()
+            for _ in range(2):
+                db.add(IdempotencyKey(
+                    key=key, fingerprint=fingerprint, created_at=now, expires_at=now + self.lease
+                ))
+                try:
+                    await db.commit()
+                    return None
+                except IntegrityError:
+                    await db.rollback()
+                record = await db.get(IdempotencyKey, key, populate_existing=True)
+                if record is None:
+                    continue
+                if record.expires_at <= now:
+                    await db.execute(delete(IdempotencyKey).where(
+                        IdempotencyKey.key == key, IdempotencyKey.expires_at <= now
+                    ))
+                    await db.commit()
+                    continue
+                stored = StoredResponse(
+                    record.fingerprint, record.status_code, record.content_type,
+                    record.body or b"", record.expires_at,
+                )
+                if stored.status_code is not None:
+                    self._remember(key, stored)
+                return stored
+        # Lost the race twice to a concurrent claim; report it as in flight.
+        return StoredResponse(fingerprint, None, None, b"", now + self.lease)
+
+    async def complete(self, key: str, fingerprint: str, status_code: int, content_type: Optional[str], body: bytes):
+        expires_at = _utcnow() + self.ttl
+        async with self.session_factory() as db:
+            await db.execute(
+                update(IdempotencyKey)
+                .where(IdempotencyKey.key == key)
+                .values(status_code=status_code, content_type=content_type, body=body, expires_at=expires_at)
+            )
+            await db.commit()
+        self._remember(key, StoredResponse(fingerprint, status_code, content_type, body, expires_at))
+
+    async def release(self, key: str):
+        self._memory.pop(key, None)
+        async with self.session_factory() as db:
+            await db.execute(delete(IdempotencyKey).where(IdempotencyKey.key == key))
+            await db.commit()
+
+
+def _error(status_code: int, detail: str) -> tuple[int, list, bytes]:
+    return status_code, [(b"content-type", b"application/json")], json.dumps({"detail": detail}).encode()
+
+
+class IdempotencyMiddleware:
+    """
+    Replays the stored response for mutating requests that repeat an
+    `Idempotency-Key`, so gateway retries never run the work twice.
+
+    Keys are scoped to the caller's Authorization header. Reusing a key with
+    a different method, path or body is rejected with 422, and a duplicate
+    that arrives while the original is still running gets 409. Server
+    errors are not stored, so those requests can be retried.
+    """
+
+    def __init__(self, app, store: IdempotencyStore = None):
+        self.app = app
+        self.store = store or IdempotencyStore()
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http" or scope["method"] not in MUTATING_METHODS:
+            await self.app(scope, receive, send)
+            return
+        headers = Headers(scope=scope)
+        idempotency_key = headers.get(HEADER)
+        if not idempotency_key:
+            await self.app(scope, receive, send)
+            return
+
+        body = b""
+        more_body = True
+        while more_body:
+            message = await receive()
+            body += message.get("body", b"")
+            more_body = message.get("more_body", False)
+
+        key = hashlib.sha256(
+            f"{headers.get('authorization', '')}\n{idempotency_key}".encode()
+        ).hexdigest()
+        fingerprint = hashlib.sha256(
+            scope["method"].encode() + b" " + scope["path"].encode() + b"?"
+            + scope.get("query_string", b"") + b"\n" + body
+        ).hexdigest()
+
+        stored = await self.store.claim(key, fingerprint)
+        if stored is not None:
+            if stored.fingerprint != fingerprint:
+                response = _error(422, "Idempotency-Key was already used for a different request")
+            elif stored.status_code is None:
+                response = _error(409, "A request with this Idempotency-Key is still in progress")
+            else:
+                response = (
+                    stored.status_code,
+                    [(b"content-type", (stored.content_type or "application/json").encode()),
+                     (b"idempotent-replayed", b"true")],
+                    stored.body,
+                )
+            status_code, response_headers, response_body = response
+            await send({"type": "http.response.start", "status": status_code, "headers": response_headers})
+            await send({"type": "http.response.body", "body": response_body})
+            return
+
+        replayed = False
+
+        async def replay_receive():
+            nonlocal replayed
+            if not replayed:
+                replayed = True
+                return {"type": "http.request", "body": body, "more_body": False}
+            return await receive()
+
+        captured = {"status": 500, "content_type": None, "body": []}
+
+        async def capture_send(message):
+            if message["type"] == "http.response.start":
+                captured["status"] = message["status"]
+                captured["content_type"] = Headers(raw=message.get("headers", [])).get("content-type")
+            elif message["type"] == "http.response.body":
+                captured["body"].append(message.get("body", b""))
+            await send(message)
+
+        try:
+            await self.app(scope, replay_receive, capture_send)
+        except BaseException:
+            # Including cancellation, e.g. a client disconnect; shielded so
+            # the claim is released even though this task is being cancelled.
+            await asyncio.shield(self.store.release(key))
+            raise
+        if captured["status"] >= 500:
+            await self.store.release(key)
+        else:
+            await self.store.complete(
+                key, fingerprint, captured["status"], captured["content_type"], b"".join(captured["body"])
+            )
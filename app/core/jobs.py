@@ -0,0 +1,142 @@
+import asyncio
+import logging
+import time
+from dataclasses import dataclass, field
+from typing import Awaitable, Callable, Optional
+
+from app.core.config import settings
+
+logger = logging.getLogger(__name__)
+
+
+@dataclass
+class Job:
+    name: str
+    func: Callable[..., Awaitable]
+    args: tuple
+    attempts: int = 0
+    enqueued_at: float = field(default_factory=time.monotonic)
+
+
+class JobQueue:
+    """
+    In-process queue for side effects that may run after the response, such
+    as websocket broadcasts and change-feed reads.
+
+    JOB_WORKERS tasks run jobs concurrently. A failed job is retried up to
+    JOB_MAX_ATTEMPTS times in total, with exponential backoff starting at
+    JOB_RETRY_DELAY_SECONDS. Enqueueing waits when JOB_QUEUE_SIZE jobs are
+    already waiting, so an overloaded worker slows requests down instead of
+    growing without bound. Before start(), and so in scripts and the CLI,
+    jobs run inline.
+
+    Jobs only live in memory: anything that must survive a crash belongs in
+    the request's transaction.
+    """
+
+    def __init__(self, workers: int = None, max_size: int = None, max_attempts: int = None, retry_delay: float = None):
+        self.workers = workers or settings.JOB_WORKERS
+        self.max_size = max_size or settings.JOB_QUEUE_SIZE
+        self.max_attempts = max_attempts or settings.JOB_MAX_ATTEMPTS
+        self.retry_delay = settings.JOB_RETRY_DELAY_SECONDS if retry_delay is None else retry_delay
+        self._queue: Optional[asyncio.Queue] = None
+        self._tasks: list[asyncio.Task] = []
+        self._retries: set[asyncio.Task] = set()
+        self.running = 0
+        self.enqueued = 0
+        self.completed = 0
+        self.retried = 0
+        self.failed = 0
+        self.max_wait = 0.0
+
+    @property
+    def started(self) -> bool:
+        return self._queue is not None
+
+    def stats(self) -> dict:
+        return {
+            "workers": self.workers,
+            "queued": self._queue.qsize() if self._queue else 0,
+            "running": self.running,
+            "retrying": len(self._retries),
+            "enqueued": self.enqueued,
+            "completed": self.completed,
+            "retried": self.retried,
+            "failed": self.failed,
+            "max_wait_ms": round(self.max_wait * 1000, 1),
+        }
+
+    def start(self):
+        self._queue = asyncio.Queue(maxsize=self.max_size)
+        self._tasks = [asyncio.create_task(self._work(), name=f"job-worker-{n}") for n in range(self.workers)]
+
+    async def enqueue(self, func: Callable[..., Awaitable], *args, name: str = None):
+        job = Job(name or func.__name__, func, args)
+        self.enqueued += 1
+        if not self.started:
+            await self._run(job)
+            return
+        await self._queue.put(job)
+
+    async def _run(self, job: Job):
+        job.attempts += 1
+        self.running += 1
+        try:
+            await job.func(*job.args)
+        except Exception:
+            if job.attempts < self.max_attempts and self.started:
+                self.retried += 1
+                logger.warning("Job %s failed, attempt %s of %s", job.name, job.attempts, self.max_attempts, exc_info=True)
+                retry = asyncio.create_task(self._retry_later(job))
+                self._retries.add(retry)
+                retry.add_done_callback(self._retries.discard)
+            else:
+                self.failed += 1
+                logger.exception("Job %s failed after %s attempts", job.name, job.attempts)
+        else:
+            self.completed += 1
+        finally:
+            self.running -= 1
+
+    async def _retry_later(self, job: Job):
+        await asyncio.sleep(self.retry_delay * 2 ** (job.attempts - 1))
+        await self._queue.put(job)
+
+    async def _work(self):
+        while True:
+            job = await self._queue.get()
+            self.max_wait = max(self.max_wait, time.monotonic() - job.enqueued_at)
+            try:
+                await self._run(job)
+            finally:
+                self._queue.task_done()
+
+    async def drain(self, timeout: float = None):
+        """
+        Wait up to `timeout` seconds (JOB_DRAIN_TIMEOUT_SECONDS by default)
+        for queued jobs and pending retries to finish, then stop the workers.
+        """
+        if not self.started:
+            return
+        timeout = settings.JOB_DRAIN_TIMEOUT_SECONDS if timeout is None else timeout
+        deadline = time.monotonic() + timeout
+
+        async def settle():
+            while True:
+                await self._queue.join()
+                if not self._retries:
+                    return
+                await asyncio.wait(set(self._retries))
+
+        try:
+            await asyncio.wait_for(settle(), max(deadline - time.monotonic(), 0))
+        except asyncio.TimeoutError:
+            logger.warning("Stopped job queue with %s jobs unfinished", self._queue.qsize() + self.running + len(self._retries))
+        for task in self._tasks + list(self._retries):
+            task.cancel()
+        await asyncio.gather(*self._tasks, *self._retries, return_exceptions=True)
+        self._queue = None
+        self._tasks = []
+
+
+job_queue = JobQueue()
@@ -0,0 +1,104 @@
+import asyncio
+import bisect
+import logging
+import sys
+import threading
+import time
+import traceback
+from typing import Optional
+
+from app.core.config import settings
+
+logger = logging.getLogger(__name__)
+
+# Upper bounds of the lag histogram's buckets, in milliseconds.
+LAG_BUCKETS_MS = (1, 2, 5, 10, 25, 50, 100, 250, 500, 1000, 2500, 5000)
+
+
+class LoopWatchdog:
+    """
+    Always-on check that nothing blocks the event loop.
+
+    A task sleeps LOOP_WATCHDOG_INTERVAL_MS at a time and records how late
+    each wake-up is in a histogram. A watchdog thread notices when that task
+    has not run for LOOP_BLOCKED_THRESHOLD_MS and logs the loop thread's
+    stack at that moment, i.e. the synchronous code holding it, once per
+    stall. Both wake up a few times a second, so it is cheap enough to leave
+    on in production; the sampling profiler in app/core/profiling.py is the
+    tool for finding where the time goes once a stall shows up here.
+    """
+
+    def __init__(self, interval: float = None, threshold: float = None):
+        self.interval = (interval or settings.LOOP_WATCHDOG_INTERVAL_MS) / 1000
+        self.threshold = (threshold or settings.LOOP_BLOCKED_THRESHOLD_MS) / 1000
+        self.buckets = [0] * (len(LAG_BUCKETS_MS) + 1)
+        self.ticks = 0
+        self.total_lag = 0.0
+        self.max_lag = 0.0
+        self.blocked = 0
+        self._last_tick = time.monotonic()
+        self._reported_tick: Optional[float] = None
+        self._thread_id: Optional[int] = None
+        self._task: Optional[asyncio.Task] = None
+        self._thread: Optional[threading.Thread] = None
+        self._stopped = threading.Event()
+
+    def start(self):
+        self._thread_id = threading.get_ident()
+        self._last_tick = time.monotonic()
+        self._stopped.clear()
+        self._task = asyncio.create_task(self._tick(), name="loop-watchdog")
+        self._thread = threading.Thread(target=self._watch, name="loop-watchdog", daemon=True)
+        self._thread.start()
+
+    async def stop(self):
+        if self._task is None:
+            return
+        self._stopped.set()
+        self._task.cancel()
+        await asyncio.gather(self._task, return_exceptions=True)
+        self._thread.join()
+        self._task = self._thread = None
+
+    def record(self, lag: float):
+        self.ticks += 1
+        self.total_lag += lag
+        self.max_lag = max(self.max_lag, lag)
+        self.buckets[bisect.bisect_left(LAG_BUCKETS_MS, lag * 1000)] += 1
+
+    async def _tick(self):
+        while True:
+            before = time.monotonic()
+            await asyncio.sleep(self.interval)
+            self._last_tick = time.monotonic()
+            self.record(max(self._last_tick - before - self.interval, 0.0))
+
+    def _watch(self):
+        while not self._stopped.wait(self.interval):
+            last_tick = self._last_tick
+            stalled = time.monotonic() - last_tick - self.interval
+            if stalled < self.threshold or last_tick == self._reported_tick:
+                continue
+            self._reported_tick = last_tick
+            self.blocked += 1
+            frame = sys._current_frames().get(self._thread_id)
+            if frame is None:
+                continue
+            stack = "".join(traceback.format_stack(frame))
+            del frame
+            logger.warning("Event loop blocked for over %.0fms in:\n%s", stalled * 1000, stack)
+
+    def stats(self) -> dict:
+        bounds = [*map(str, LAG_BUCKETS_MS), "+Inf"]
+        return {
+            "interval_ms": self.interval * 1000,
+            "ticks": self.ticks,
+            "mean_lag_ms": round(self.total_lag / self.ticks * 1000, 2) if self.ticks else 0.0,
+            "max_lag_ms": round(self.max_lag * 1000, 2),
+            "blocked": self.blocked,
+            # Ticks per bucket, keyed by its upper bound; not cumulative.
+            "lag_ms_buckets": dict(zip(bounds, self.buckets)),
+        }
+
+
+loop_watchdog = LoopWatchdog()
@@ -0,0 +1,209 @@
+import asyncio
+import json
+from typing import Iterable, Optional
+
+from fastapi import WebSocket
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.core.change_feed import FUNDS, change_feed
+from app.core.config import settings
+from app.db import ledger
+from app.db.models.fund import Fund
+from app.db.models.role import AudienceRole, RecipientRole, Role, user_role
+from app.db.session import AsyncSessionLocal
+
+try:
+    import msgpack
+except ImportError:  # msgpack is optional; without it protocol=msgpack is refused
+    msgpack = None
+
+PROTOCOL_TEXT = "text"
+PROTOCOL_JSON = "json"
+PROTOCOL_MSGPACK = "msgpack"
+
+
+def negotiate_protocol(requested: str) -> Optional[str]:
+    """The frame protocol for a `protocol` query value; None when it is msgpack and msgpack isn't installed."""
+    if requested == PROTOCOL_MSGPACK:
+        return PROTOCOL_MSGPACK if msgpack is not None else None
+    if requested == PROTOCOL_JSON:
+        return PROTOCOL_JSON
+    return PROTOCOL_TEXT
+
+
+def text_line(payload: dict) -> str:
+    if payload.get("type") == "event":
+        event = payload["event"]
+        return f"event {payload['action']}: {event['name']} on {event['date']}"
+    return f"{payload['sender']}: {payload['content']}"
+
+
+def encode_batch(protocol: str, batch: list[dict]):
+    if protocol == PROTOCOL_MSGPACK:
+        return msgpack.packb(batch)
+    if protocol == PROTOCOL_TEXT:
+        return "\n".join(map(text_line, batch))
+    return json.dumps(batch, separators=(",", ":"))
+
+
+class ConnectionManager:
+    def __init__(self, batch_window: float = 0.0):
+        self.active_connections: dict[int, WebSocket] = {}
+        self.protocols: dict[int, str] = {}
+        # Online users by role, so role-targeted sends never query users.
+        self.roles: dict[int, Role] = {}
+        self.by_role: dict[Role, set[int]] = {}
+        self.batch_window = batch_window
+        self._pending: dict[int, list[dict]] = {}
+        self._flush_task: Optional[asyncio.Task] = None
+
+    async def connect(self, user_id: int, websocket: WebSocket, protocol: str = PROTOCOL_TEXT, role: Optional[Role] = None):
+        await websocket.accept()
+        self.active_connections[user_id] = websocket
+        self.protocols[user_id] = protocol
+        self.set_role(user_id, role)
+
+    def set_role(self, user_id: int, role: Optional[Role]):
+        """Re-index a connected user, e.g. after an admin changed their role."""
+        previous = self.roles.pop(user_id, None)
+        if previous is not None:
+            self.by_role[previous].discard(user_id)
+        if role is not None and user_id in self.active_connections:
+            self.roles[user_id] = role
+            self.by_role.setdefault(role, set()).add(user_id)
+
+    def user_ids_for(self, role: Optional[Role]) -> list[int]:
+        """Connected users with `role`, or all connected users when None."""
+        if role is None:
+            return list(self.active_connections)
+        return list(self.by_role.get(role, ()))
+
+    def disconnect(self, user_id: int):
+        if user_id in self.active_connections:
+            del self.active_connections[user_id]
+        self.set_role(user_id, None)
+        self.protocols.pop(user_id, None)
+        self._pending.pop(user_id, None)
+
+    async def send_personal_message(self, message: str, user_id: int):
+        await self.send_frame(message, [user_id])
+
+    async def broadcast(self, message: str):
+        await self.send_frame(message, list(self.active_connections))
+
+    async def send_frame(self, data, user_ids: Iterable[int]):
+        """
+        Send one already encoded payload to every socket in `user_ids`.
+
+        The ASGI send message is built once and the same object (and, for
+        binary frames, the same bytes buffer) is handed to every socket, so a
+        fan-out costs one encode plus one write per recipient.
+        """
+        if isinstance(data, (bytes, bytearray, memoryview)):
+            message = {"type": "websocket.send", "bytes": bytes(data)}
+        else:
+            message = {"type": "websocket.send", "text": data}
+        for user_id in user_ids:
+            websocket = self.active_connections.get(user_id)
+            if websocket is None:
+                continue
+            try:
+                await websocket.send(message)
+            except Exception:
+                self.disconnect(user_id)
+
+    async def publish(self, payload: dict, user_ids: Optional[Iterable[int]] = None):
+        """
+        Deliver a structured message to `user_ids`, or to everyone when None.
+
+        Plain text clients get the legacy "username: content" frame right away.
+        Structured clients have the payload queued and coalesced with anything
+        else published inside the batch window into a single frame.
+        """
+        if user_ids is None:
+            user_ids = list(self.active_connections)
+        text_targets = []
+        for user_id in user_ids:
+            protocol = self.protocols.get(user_id)
+            if protocol is None:
+                continue
+            if protocol == PROTOCOL_TEXT:
+                text_targets.append(user_id)
+            else:
+                self._pending.setdefault(user_id, []).append(payload)
+        self._schedule_flush()
+
+        if text_targets:
+            await self.send_frame(text_line(payload), text_targets)
+
+    def notify(self, payload: dict, user_ids: Iterable[int]):
+        """
+        Queue a notification for `user_ids` on every protocol, text included,
+        so a burst of them reaches each user as one frame per batch window.
+        """
+        for user_id in user_ids:
+            if user_id in self.protocols:
+                self._pending.setdefault(user_id, []).append(payload)
+        self._schedule_flush()
+
+    def _schedule_flush(self):
+        if self._pending and self._flush_task is None:
+            self._flush_task = asyncio.create_task(self._flush_later())
+
+    async def _flush_later(self):
+        await asyncio.sleep(self.batch_window)
+        self._flush_task = None
+        await self.flush()
+
+    async def flush(self):
+        pending, self._pending = self._pending, {}
+        # Recipients of the same burst share one batch, so group them by
+        # (protocol, batch) and encode each distinct frame exactly once.
+        groups: dict[tuple, list[int]] = {}
+        batches: dict[tuple, list[dict]] = {}
+        for user_id, batch in pending.items():
+            protocol = self.protocols.get(user_id)
+            if protocol is None:
+                continue
+            key = (protocol, tuple(map(id, batch)))
+            groups.setdefault(key, []).append(user_id)
+            batches[key] = batch
+        for key, user_ids in groups.items():
+            await self.send_frame(encode_batch(key[0], batches[key]), user_ids)
+
+
+manager = ConnectionManager(batch_window=settings.CHAT_BATCH_WINDOW_MS / 1000)
+
+
+async def broadcast_message(payload: dict, recipient_role: RecipientRole):
+    await manager.publish(payload, manager.user_ids_for(user_role(recipient_role)))
+
+
+async def notify_event(action: str, event: dict):
+    """Tell the online members of the event's audience about it."""
+    role = user_role(AudienceRole(event["audience_role"]))
+    manager.notify({"type": "event", "action": action, "event": event}, manager.user_ids_for(role))
+
+
+async def fund_read(db: AsyncSession, fund: Fund) -> dict:
+    return {
+        "id": fund.id,
+        "name": fund.name,
+        "shard_count": fund.shard_count,
+        "balance": await ledger.get_balance(db, fund),
+    }
+
+
+async def publish_balance(db: AsyncSession, fund: Fund) -> dict:
+    """Read the committed balance and push it to the change feed."""
+    fund_state = await fund_read(db, fund)
+    change_feed.publish(FUNDS, "fund.balance", fund_state)
+    return fund_state
+
+
+async def publish_fund_balance(fund_id: int):
+    """Job form of publish_balance for writes that don't return the fund."""
+    async with AsyncSessionLocal() as db:
+        fund = await db.get(Fund, fund_id)
+        if fund:
+            await publish_balance(db, fund)
@@ -0,0 +1,91 @@
+import gzip
+import hashlib
+from typing import Callable, Optional
+
+from starlette.requests import Request
+from starlette.responses import Response
+
+from app.core.http_cache import accepts, etag_matches
+
+try:
+    import brotli
+except ImportError:  # brotli is optional; clients get gzip instead
+    brotli = None
+
+IMMUTABLE = "public, max-age=31536000, immutable"
+
+
+class OpenAPIDocument:
+    """
+    The OpenAPI schema serialized once and kept as gzip/br-compressed bytes.
+
+    Each encoding carries a strong ETag derived from the schema's SHA-256, and
+    the first 16 hex digits of that hash are the schema version. The plain
+    URL must be revalidated and points at the versioned URL, which is served
+    as immutable so clients can cache it forever.
+    """
+
+    def __init__(self, load: Callable[[], bytes], versioned_url: str):
+        self.load = load
+        self.versioned_url = versioned_url
+        self._variants: Optional[dict[str, bytes]] = None
+        self._digest: Optional[str] = None
+
+    def build(self):
+        body = self.load()
+        self._digest = hashlib.sha256(body).hexdigest()
+        variants = {"identity": body, "gzip": gzip.compress(body, compresslevel=9, mtime=0)}
+        if brotli is not None:
+            variants["br"] = brotli.compress(body, quality=11)
+        self._variants = variants
+
+    @property
+    def variants(self) -> dict[str, bytes]:
+        if self._variants is None:
+            self.build()
+        return self._variants
+
+    @property
+    def body(self) -> bytes:
+        return self.variants["identity"]
+
+    @property
+    def digest(self) -> str:
+        if self._variants is None:
+            self.build()
+        return self._digest
+
+    @property
+    def version(self) -> str:
+        return self.digest[:16]
+
+    @property
+    def url(self) -> str:
+        return self.versioned_url.format(version=self.version)
+
+    def _respond(self, request: Request, cache_control: str) -> Response:
+        accept_encoding = request.headers.get("accept-encoding", "")
+        coding = next(
+            (c for c in ("br", "gzip") if c in self.variants and accepts(accept_encoding, c)),
+            "identity",
+        )
+        etag = f'"{self.digest}"' if coding == "identity" else f'"{self.digest}-{coding}"'
+        headers = {
+            "ETag": etag,
+            "Cache-Control": cache_control,
+            "Vary": "Accept-Encoding",
+            "Content-Location": self.url,
+        }
+        if etag_matches(request.headers.get("if-none-match", ""), etag):
+            return Response(status_code=304, headers=headers)
+        if coding != "identity":
+            headers["Content-Encoding"] = coding
+        return Response(self.variants[coding], media_type="application/json", headers=headers)
+
+    async def serve(self, request: Request) -> Response:
+        return self._respond(request, "no-cache")
+
+    async def serve_versioned(self, request: Request) -> Response:
+        if request.path_params["version"] != self.version:
+            return Response(status_code=404)
+        return self._respond(request, IMMUTABLE)
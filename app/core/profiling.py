@@ -0,0 +1,221 @@
+import asyncio
+import sys
+import threading
+import time
+import uuid
+from collections import Counter, OrderedDict
+from dataclasses import dataclass, field
+from typing import Optional
+
+from fastapi import HTTPException
+
+from app.api import deps
+from app.core.config import settings
+
+# Root frame of stacks sampled while the loop was stuck in one callback.
+BLOCKED = "[blocked]"
+
+
+def frame_name(frame) -> str:
+    code = frame.f_code
+    return f"{frame.f_globals.get('__name__', '?')}:{getattr(code, 'co_qualname', code.co_name)}"
+
+
+def collapse(frame) -> str:
+    """The stack under `frame` as root-first, semicolon separated frames."""
+    names = []
+    while frame is not None:
+        names.append(frame_name(frame))
+        frame = frame.f_back
+    return ";".join(reversed(names))
+
+
+@dataclass
+class Profile:
+    id: str
+    interval: float
+    started: float = field(default_factory=time.monotonic)
+    seconds: float = 0.0
+    stacks: Counter = field(default_factory=Counter)
+    max_lag: float = 0.0
+    slow_callbacks: int = 0
+
+    @property
+    def samples(self) -> int:
+        return sum(self.stacks.values())
+
+    def collapsed(self) -> str:
+        """One `frame;frame;frame count` line per stack, for flamegraph.pl or speedscope."""
+        return "".join(f"{stack} {count}\n" for stack, count in self.stacks.most_common())
+
+    def headers(self) -> dict[str, str]:
+        return {
+            "X-Profile-Id": self.id,
+            "X-Profile-Samples": str(self.samples),
+            "X-Loop-Lag-Max-Ms": f"{self.max_lag * 1000:.1f}",
+            "X-Slow-Callbacks": str(self.slow_callbacks),
+        }
+
+
+class StackSampler:
+    """
+    Samples the event loop thread's stack every PROFILE_SAMPLE_INTERVAL_MS
+    from a separate thread, so the profiled code is not instrumented at all.
+
+    A ticker task on the loop measures how late it is woken up. A tick more
+    than PROFILE_SLOW_CALLBACK_MS late counts as a slow callback, and the
+    stacks sampled while the ticker is overdue are filed under `[blocked]`,
+    so blocking work stands apart from time spent awaiting.
+
+    The sampler sees the whole loop, so a request's profile includes
+    whatever ran concurrently with it.
+    """
+
+    def __init__(self, profile: Profile, slow_callback: float = None):
+        self.profile = profile
+        self.interval = profile.interval
+        self.slow_callback = (slow_callback or settings.PROFILE_SLOW_CALLBACK_MS) / 1000
+        self._thread_id = threading.get_ident()
+        self._stopped = threading.Event()
+        self._last_tick = time.monotonic()
+        self._thread: Optional[threading.Thread] = None
+        self._ticker: Optional[asyncio.Task] = None
+
+    def start(self):
+        self._ticker = asyncio.create_task(self._tick())
+        self._thread = threading.Thread(target=self._sample, name="stack-sampler", daemon=True)
+        self._thread.start()
+
+    async def _tick(self):
+        while True:
+            before = time.monotonic()
+            await asyncio.sleep(self.interval)
+            self._last_tick = time.monotonic()
+            lag = self._last_tick - before - self.interval
+            self.profile.max_lag = max(self.profile.max_lag, lag)
+            if lag > self.slow_callback:
+                self.profile.slow_callbacks += 1
+
+    def _sample(self):
+        stacks = self.profile.stacks
+        while not self._stopped.wait(self.interval):
+            frame = sys._current_frames().get(self._thread_id)
+            if frame is None:
+                return
+            stack = collapse(frame)
+            if time.monotonic() - self._last_tick - self.interval > self.slow_callback:
+                stack = f"{BLOCKED};{stack}"
+            stacks[stack] += 1
+            del frame
+
+    async def stop(self) -> Profile:
+        self._stopped.set()
+        self._ticker.cancel()
+        await asyncio.gather(self._ticker, return_exceptions=True)
+        self._thread.join()
+        self.profile.seconds = time.monotonic() - self.profile.started
+        return self.profile
+
+
+class Profiler:
+    """
+    Runs one StackSampler at a time, since concurrent samplers would each
+    see the other's loop, and keeps the last PROFILE_KEEP profiles.
+    """
+
+    def __init__(self, keep: int = None):
+        self.keep = keep or settings.PROFILE_KEEP
+        self.profiles: OrderedDict[str, Profile] = OrderedDict()
+        self._sampler: Optional[StackSampler] = None
+
+    @property
+    def busy(self) -> bool:
+        return self._sampler is not None
+
+    def start(self) -> Profile:
+        if self.busy:
+            raise RuntimeError("A profile is already being taken")
+        profile = Profile(uuid.uuid4().hex, settings.PROFILE_SAMPLE_INTERVAL_MS / 1000)
+        self._sampler = StackSampler(profile)
+        self._sampler.start()
+        return profile
+
+    async def stop(self) -> Profile:
+        sampler, self._sampler = self._sampler, None
+        profile = await sampler.stop()
+        self.profiles[profile.id] = profile
+        while len(self.profiles) > self.keep:
+            self.profiles.popitem(last=False)
+        return profile
+
+    async def window(self, seconds: float) -> Profile:
+        self.start()
+        try:
+            await asyncio.sleep(seconds)
+        finally:
+            profile = await self.stop()
+        return profile
+
+
+profiler = Profiler()
+
+
+async def is_admin_token(authorization: str) -> bool:
+    """
+    Whether an Authorization header carries a token that passes the same
+    checks as the deps.is_admin dependency.
+    """
+    scheme, _, token = authorization.partition(" ")
+    if scheme.lower() != "bearer" or not token:
+        return False
+    try:
+        deps.is_admin(await deps.get_current_active_claims(await deps.read_claims(token)))
+    except HTTPException:
+        return False
+    return True
+
+
+class ProfilingMiddleware:
+    """
+    Profiles a request sent with an `X-Profile: 1` header by an admin. The
+    response carries the profile's headers (see Profile.headers) as of the
+    start of the response, so a streamed body is not counted in them; the
+    full stacks are read from GET /api/v1/debug/profiles/{id}, which only
+    finds them on the server worker that took the profile. Requests are
+    served unprofiled while another profile is being taken.
+    """
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+        headers = scope["headers"]
+        if not any(name == b"x-profile" and value != b"0" for name, value in headers) or profiler.busy:
+            await self.app(scope, receive, send)
+            return
+        authorization = next((value for name, value in headers if name == b"authorization"), b"")
+        # Another request may have started a profile while this one was
+        # being authorized.
+        if not await is_admin_token(authorization.decode("latin-1")) or profiler.busy:
+            await self.app(scope, receive, send)
+            return
+        profile = profiler.start()
+
+        async def profiled_send(message):
+            if message["type"] == "http.response.start":
+                message = {
+                    **message,
+                    "headers": [
+                        *message.get("headers", []),
+                        *((name.lower().encode(), value.encode()) for name, value in profile.headers().items()),
+                    ],
+                }
+            await send(message)
+
+        try:
+            await self.app(scope, receive, profiled_send)
+        finally:
+            await profiler.stop()
@@ -1,36 +1,93 @@
+import asyncio
+import os
+from concurrent.futures import ProcessPoolExecutor
 from datetime import datetime, timedelta
-from typing import Any, Union
-
-from jose import jwt
-from passlib.context import CryptContext
+from functools import lru_cache
+from typing import Any, Optional, Sequence, Union
 
 from app.core.config import settings
+from app.core.server import worker_count
+
+
+class TokenError(Exception):
+    """A JWT failed signature, expiry or format checks."""
+
+
+# python-jose (with its cryptography backends) and passlib/bcrypt are
+# imported on first use rather than at startup to keep cold starts short.
+@lru_cache(maxsize=None)
+def _jwt():
+    from jose import jwt
+    return jwt
+
+
+@lru_cache(maxsize=None)
+def _pwd_context():
+    from passlib.context import CryptContext
+    return CryptContext(schemes=["bcrypt"], deprecated="auto")
+
 
-pwd_context = CryptContext(schemes=["bcrypt"], deprecated="auto")
+def decode_token(token: str) -> dict:
+    jwt = _jwt()
+    try:
+        return jwt.decode(token, settings.SECRET_KEY, algorithms=[settings.ALGORITHM])
+    except jwt.JWTError as exc:
+        raise TokenError(str(exc)) from exc
 
+_hash_pool: Optional[ProcessPoolExecutor] = None
 
-def create_access_token(subject: Union[str, Any], expires_delta: timedelta = None) -> str:
+
+def create_access_token(
+    subject: Union[str, Any], expires_delta: timedelta = None, claims: Optional[dict] = None
+) -> str:
     if expires_delta:
         expire = datetime.utcnow() + expires_delta
     else:
         expire = datetime.utcnow() + timedelta(
             minutes=settings.ACCESS_TOKEN_EXPIRE_MINUTES
         )
-    to_encode = {"exp": expire, "sub": str(subject)}
-    encoded_jwt = jwt.encode(to_encode, settings.SECRET_KEY, algorithm=settings.ALGORITHM)
+    to_encode = {**(claims or {}), "exp": expire, "sub": str(subject)}
+    encoded_jwt = _jwt().encode(to_encode, settings.SECRET_KEY, algorithm=settings.ALGORITHM)
     return encoded_jwt
 
 
+def user_claims(user) -> dict:
+    """Authorization claims signed into access tokens, see deps.get_current_claims."""
+    return {"role": user.role.value, "active": bool(user.is_active), "ver": user.token_version or 0}
+
+
 def create_refresh_token(subject: Union[str, Any]) -> str:
     expire = datetime.utcnow() + timedelta(days=settings.REFRESH_TOKEN_EXPIRE_DAYS)
     to_encode = {"exp": expire, "sub": str(subject)}
-    encoded_jwt = jwt.encode(to_encode, settings.SECRET_KEY, algorithm=settings.ALGORITHM)
+    encoded_jwt = _jwt().encode(to_encode, settings.SECRET_KEY, algorithm=settings.ALGORITHM)
     return encoded_jwt
 
 
 def verify_password(plain_password: str, hashed_password: str) -> bool:
-    return pwd_context.verify(plain_password, hashed_password)
+    return _pwd_context().verify(plain_password, hashed_password)
 
 
 def get_password_hash(password: str) -> str:
-    return pwd_context.hash(password)
+    return _pwd_context().hash(password)
+
+
+async def hash_passwords(passwords: Sequence[str]) -> list[str]:
+    """
+    Hash many passwords on a process pool so bulk operations use every core
+    instead of blocking the event loop one bcrypt round at a time.
+    """
+    global _hash_pool
+    if _hash_pool is None:
+        workers = settings.PASSWORD_HASH_WORKERS or max(os.cpu_count() // worker_count(), 1)
+        _hash_pool = ProcessPoolExecutor(max_workers=workers)
+    loop = asyncio.get_running_loop()
+    return await asyncio.gather(
+        *(loop.run_in_executor(_hash_pool, get_password_hash, password) for password in passwords)
+    )
+
+
+def shutdown_hash_pool():
+    global _hash_pool
+    if _hash_pool is not None:
+        _hash_pool.shutdown(wait=False, cancel_futures=True)
+        _hash_pool = None
@@ -0,0 +1,241 @@
+import gc
+import logging
+import os
+import signal
+import time
+from typing import Optional
+
+from sqlalchemy.engine import make_url
+
+from app.core.config import settings
+
+logger = logging.getLogger(__name__)
+
+APP = "app.main:app"
+
+# Cleared in all workers but one, so work done once per deployment, such as
+# message compaction, is not repeated by every worker.
+maintenance_worker = True
+
+
+def worker_count() -> int:
+    """WEB_CONCURRENCY, with 0 meaning one worker per CPU."""
+    return settings.WEB_CONCURRENCY or os.cpu_count() or 1
+
+
+def single_worker_features() -> list[str]:
+    """
+    Enabled features whose state is kept in one worker's memory, and that
+    give wrong answers when requests are spread over several workers.
+    """
+    features = []
+    if settings.REALTIME:
+        features.append("REALTIME (chat websockets and the change feed only see their own worker's writes)")
+    if settings.QUERY_AUDIT:
+        features.append("QUERY_AUDIT (each worker keeps its own slow query log)")
+    if make_url(settings.DATABASE_URL).get_backend_name() != "mysql":
+        features.append("a non-MySQL DATABASE_URL (the search index is kept in memory)")
+    return features
+
+
+class Launcher:
+    """
+    Pre-forking process manager serving the app with worker_count() uvicorn
+    workers on one shared socket, using uvloop and httptools when they are
+    installed.
+
+    With `preload` the app is imported once here and the workers are forked
+    from it, so they share its memory copy-on-write; gc.freeze() keeps the
+    collector from touching, and so copying, those pages. The import must
+    not open connections or start tasks; startup_event does that in each
+    worker. Without `preload` each worker imports the app itself.
+
+    Signals:
+      SIGHUP            start a new set of workers, then gracefully stop the
+                        old ones, e.g. to release memory. Code and settings
+                        changes need a restart of the launcher. Old workers
+                        drain in the background while the new ones are
+                        supervised as usual.
+      SIGTERM, SIGINT   stop the workers, giving in-flight requests and
+                        streams SERVER_GRACEFUL_TIMEOUT_SECONDS to finish.
+    Workers that die are replaced.
+
+    Each worker has its own database pools (see
+    app.db.session.pool_options), job queue, profiler and loop watchdog, so
+    a profile is fetched by id from the worker that took it. Idempotency
+    keys and token revocations live in the database and read-your-writes
+    pins in a cookie, so those hold across workers, revocations after up to
+    TOKEN_VERSION_REFRESH_SECONDS; the features listed by
+    single_worker_features() do not, and more than one worker is refused
+    while any of them is enabled. REALTIME is off by default with more than
+    one worker.
+
+    One worker at a time is the maintenance worker (see maintenance_worker)
+    and runs message compaction: the first one spawned, then whichever
+    replaces it. After a reload the old one may still be compacting while it
+    drains; a batch both copy fails on the archive's primary key and is
+    retried on the next cycle.
+    """
+
+    def __init__(self, app: str = APP, host: str = "0.0.0.0", port: int = 8000, preload: bool = True):
+        self.app = app
+        self.host = host
+        self.port = port
+        self.preload = preload
+        self.workers = worker_count()
+        if self.workers > 1 and (features := single_worker_features()):
+            raise RuntimeError(
+                f"WEB_CONCURRENCY={settings.WEB_CONCURRENCY} needs a single worker while these are enabled: "
+                + "; ".join(features)
+            )
+        self.pids: dict[int, float] = {}
+        self.maintenance_pid: Optional[int] = None
+        # Old workers stopping after a reload, with the time to kill them at.
+        self.draining: dict[int, float] = {}
+        self._socket = None
+        self._stopping = False
+        self._reloading = False
+
+    def _config(self):
+        import uvicorn
+
+        return uvicorn.Config(
+            self.app,
+            host=self.host,
+            port=self.port,
+            loop="auto",
+            http="auto",
+            lifespan="on",
+            timeout_graceful_shutdown=settings.SERVER_GRACEFUL_TIMEOUT_SECONDS,
+        )
+
+    def _spawn(self):
+        global maintenance_worker
+
+        maintenance = self.maintenance_pid not in self.pids
+        pid = os.fork()
+        if pid:
+            self.pids[pid] = time.monotonic()
+            if maintenance:
+                self.maintenance_pid = pid
+            return
+        maintenance_worker = maintenance
+        # Worker: uvicorn installs its own SIGTERM/SIGINT handlers.
+        for signum in (signal.SIGHUP, signal.SIGTERM, signal.SIGINT, signal.SIGCHLD):
+            signal.signal(signum, signal.SIG_DFL)
+        gc.enable()
+        code = 0
+        try:
+            import uvicorn
+
+            uvicorn.Server(self._config()).run(sockets=[self._socket])
+        except BaseException:
+            logger.exception("Worker %s crashed", os.getpid())
+            code = 1
+        finally:
+            os._exit(code)
+
+    def _signal(self, signum: int, frame):
+        if signum == signal.SIGHUP:
+            self._reloading = True
+        else:
+            self._stopping = True
+
+    def _stop(self, pids, timeout: float):
+        for pid in pids:
+            try:
+                os.kill(pid, signal.SIGTERM)
+            except ProcessLookupError:
+                pass
+        deadline = time.monotonic() + timeout
+        while pids and time.monotonic() < deadline:
+            pids = [pid for pid in pids if not self._reaped(pid)]
+            time.sleep(0.1)
+        for pid in pids:
+            logger.warning("Worker %s did not stop in %ss, killing it", pid, timeout)
+            os.kill(pid, signal.SIGKILL)
+            os.waitpid(pid, 0)
+            self.pids.pop(pid, None)
+            self.draining.pop(pid, None)
+
+    def _drain(self, pids, timeout: float):
+        """Ask workers to stop without waiting for them; see _reap_draining."""
+        deadline = time.monotonic() + timeout
+        for pid in pids:
+            self.pids.pop(pid, None)
+            self.draining[pid] = deadline
+            try:
+                os.kill(pid, signal.SIGTERM)
+            except ProcessLookupError:
+                pass
+
+    def _reap_draining(self):
+        now = time.monotonic()
+        for pid, deadline in list(self.draining.items()):
+            if self._reaped(pid) or now < deadline:
+                continue
+            logger.warning("Worker %s did not stop in time, killing it", pid)
+            os.kill(pid, signal.SIGKILL)
+            # Reaped on a later tick.
+            self.draining[pid] = float("inf")
+
+    def _reaped(self, pid: int) -> bool:
+        try:
+            done, _ = os.waitpid(pid, os.WNOHANG)
+        except ChildProcessError:
+            done = pid
+        if done:
+            self.pids.pop(pid, None)
+            self.draining.pop(pid, None)
+        return bool(done)
+
+    def _reap(self) -> Optional[float]:
+        """Forget dead workers; returns the start time of one that died, if any."""
+        died = None
+        for pid, started in list(self.pids.items()):
+            if self._reaped(pid):
+                logger.warning("Worker %s exited, replacing it", pid)
+                died = started
+        return died
+
+    def run(self):
+        config = self._config()
+        self._socket = config.bind_socket()
+        if self.preload:
+            # Nothing allocated while importing needs collecting; the freeze
+            # below moves it out of the collector's reach.
+            gc.disable()
+            from uvicorn.importer import import_from_string
+
+            import_from_string(self.app)
+            gc.freeze()
+        for signum in (signal.SIGHUP, signal.SIGTERM, signal.SIGINT):
+            signal.signal(signum, self._signal)
+        logger.warning("Starting %s workers on %s:%s", self.workers, self.host, self.port)
+        for _ in range(self.workers):
+            self._spawn()
+        while not self._stopping:
+            time.sleep(0.5)
+            if self._reloading:
+                self._reloading = False
+                old = list(self.pids)
+                logger.warning("Reloading %s workers", len(old))
+                # Connections arriving while the new workers start up wait
+                # in the shared socket's backlog.
+                self._drain(old, settings.SERVER_GRACEFUL_TIMEOUT_SECONDS)
+                for _ in range(self.workers):
+                    self._spawn()
+                continue
+            self._reap_draining()
+            died = self._reap()
+            if died is not None and time.monotonic() - died < 1:
+                # Crashing on startup; don't fork in a tight loop.
+                time.sleep(1)
+            for _ in range(self.workers - len(self.pids)):
+                self._spawn()
+        self._stop([*self.pids, *self.draining], settings.SERVER_GRACEFUL_TIMEOUT_SECONDS)
+        self._socket.close()
+
+
+def serve(host: str = "0.0.0.0", port: int = 8000, preload: bool = True):
+    Launcher(host=host, port=port, preload=preload).run()
@@ -0,0 +1,41 @@
+import logging
+import time
+from contextlib import contextmanager
+
+logger = logging.getLogger(__name__)
+
+
+class StartupTimer:
+    """Records how long each import and init step of app startup takes."""
+
+    def __init__(self):
+        self.started = time.perf_counter()
+        self.phases: list[tuple[str, float]] = []
+
+    @contextmanager
+    def phase(self, name: str):
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.phases.append((name, time.perf_counter() - start))
+
+    def report(self) -> dict:
+        return {
+            "total_ms": round((time.perf_counter() - self.started) * 1000, 1),
+            "phases": [
+                {"name": name, "ms": round(duration * 1000, 1)} for name, duration in self.phases
+            ],
+        }
+
+    def log(self):
+        report = self.report()
+        logger.info(
+            "Startup took %sms: %s",
+            report["total_ms"],
+            ", ".join(f"{phase['name']}={phase['ms']}ms" for phase in report["phases"]),
+        )
+        return report
+
+
+startup_timer = StartupTimer()
@@ -0,0 +1,55 @@
+import asyncio
+import time
+from datetime import datetime, timedelta
+
+from sqlalchemy import select
+
+from app.core.config import settings
+from app.db.models.deleted_user import DeletedUser
+from app.db.models.user import User
+from app.db.session import AsyncSessionLocal
+
+
+class TokenVersions:
+    """
+    Process-local view of users whose token_version has been bumped.
+
+    Bumps made by this worker apply immediately; bumps made elsewhere are
+    picked up every TOKEN_VERSION_REFRESH_SECONDS. Only users that were ever
+    bumped are tracked, so the reload stays small. Deleted users are read
+    from their DeletedUser tombstones while tokens issued before the delete
+    can still be unexpired.
+    """
+
+    def __init__(self, session_factory=AsyncSessionLocal, refresh_seconds: int = None):
+        self.session_factory = session_factory
+        self.refresh_seconds = refresh_seconds or settings.TOKEN_VERSION_REFRESH_SECONDS
+        self._versions: dict[int, int] = {}
+        self._refreshed_at = 0.0
+        self._lock = asyncio.Lock()
+
+    def bump(self, user_id: int, version: int):
+        self._versions[user_id] = max(version, self._versions.get(user_id, 0))
+
+    async def is_current(self, user_id: int, version: int) -> bool:
+        if time.monotonic() - self._refreshed_at > self.refresh_seconds:
+            await self.refresh()
+        return version >= self._versions.get(user_id, 0)
+
+    async def refresh(self):
+        async with self._lock:
+            if time.monotonic() - self._refreshed_at <= self.refresh_seconds:
+                return
+            async with self.session_factory() as db:
+                since = datetime.utcnow() - timedelta(minutes=settings.ACCESS_TOKEN_EXPIRE_MINUTES)
+                rows = await db.execute(
+                    select(User.id, User.token_version).where(User.token_version > 0).union_all(
+                        select(DeletedUser.user_id, DeletedUser.token_version).where(DeletedUser.deleted_at >= since)
+                    )
+                )
+                for user_id, version in rows:
+                    self.bump(user_id, version)
+            self._refreshed_at = time.monotonic()
+
+
+token_versions = TokenVersions()
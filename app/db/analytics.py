@@ -0,0 +1,125 @@
+from collections import defaultdict
+from datetime import date, datetime
+from typing import Optional
+
+from sqlalchemy import delete, insert, select, update
+from sqlalchemy.dialects.mysql import insert as mysql_insert
+from sqlalchemy.dialects.sqlite import insert as sqlite_insert
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.db.models.budget_summary import BudgetSummary
+from app.db.models.event import AudienceRole, Event
+
+
+def month_of(value: datetime) -> date:
+    return date(value.year, value.month, 1)
+
+
+async def apply_budget_delta(
+    db: AsyncSession, when: datetime, audience_role: AudienceRole, budget: float, count: int
+):
+    """
+    Add `budget`/`count` to the summary row for the event's month and role,
+    in the caller's transaction. Uses a single upsert on MySQL and SQLite so
+    concurrent event writes never read-modify-write the same row; other
+    databases increment the row in place and create it when missing.
+    """
+    values = {
+        "month": month_of(when),
+        "audience_role": audience_role,
+        "total_budget": budget,
+        "event_count": count,
+    }
+    dialect = db.bind.dialect.name
+    if dialect == "mysql":
+        stmt = mysql_insert(BudgetSummary).values(**values)
+        stmt = stmt.on_duplicate_key_update(
+            total_budget=BudgetSummary.total_budget + stmt.inserted.total_budget,
+            event_count=BudgetSummary.event_count + stmt.inserted.event_count,
+        )
+    elif dialect == "sqlite":
+        stmt = sqlite_insert(BudgetSummary).values(**values)
+        stmt = stmt.on_conflict_do_update(
+            index_elements=["month", "audience_role"],
+            set_={
+                "total_budget": BudgetSummary.total_budget + stmt.excluded.total_budget,
+                "event_count": BudgetSummary.event_count + stmt.excluded.event_count,
+            },
+        )
+    else:
+        await _increment_or_create(db, values)
+        return
+    await db.execute(stmt)
+
+
+async def _increment_or_create(db: AsyncSession, values: dict):
+    bump = (
+        update(BudgetSummary)
+        .where(BudgetSummary.month == values["month"], BudgetSummary.audience_role == values["audience_role"])
+        .values(
+            total_budget=BudgetSummary.total_budget + values["total_budget"],
+            event_count=BudgetSummary.event_count + values["event_count"],
+        )
+        .execution_options(synchronize_session=False)
+    )
+    if (await db.execute(bump)).rowcount:
+        return
+    try:
+        async with db.begin_nested():
+            await db.execute(insert(BudgetSummary).values(**values))
+    except IntegrityError:
+        # Another transaction created the row first; it now exists to bump.
+        await db.execute(bump)
+
+
+async def record_event(db: AsyncSession, event: Event, sign: int = 1):
+    await apply_budget_delta(db, event.date, event.audience_role, sign * event.budget, sign)
+
+
+async def rebuild_budget_summary(db: AsyncSession) -> int:
+    """
+    Recompute every summary row from the events table and commit.
+
+    Runs at SERIALIZABLE, so event writes cannot land between reading the
+    events and replacing the summary and be lost: MySQL holds shared locks
+    on the events read until the commit, holding concurrent event writes
+    back, and databases with serializable snapshots fail one side instead.
+    Call it on a session that has not started a transaction yet.
+    """
+    await db.connection(execution_options={"isolation_level": "SERIALIZABLE"})
+    totals: dict[tuple[date, AudienceRole], list] = defaultdict(lambda: [0.0, 0])
+    result = await db.stream(select(Event.date, Event.audience_role, Event.budget))
+    async for when, audience_role, budget in result:
+        row = totals[(month_of(when), audience_role)]
+        row[0] += budget
+        row[1] += 1
+
+    await db.execute(delete(BudgetSummary))
+    if totals:
+        await db.execute(
+            insert(BudgetSummary),
+            [
+                {"month": month, "audience_role": role, "total_budget": total, "event_count": count}
+                for (month, role), (total, count) in totals.items()
+            ],
+        )
+    await db.commit()
+    return len(totals)
+
+
+async def budget_report(
+    db: AsyncSession,
+    start: Optional[date] = None,
+    end: Optional[date] = None,
+    audience_role: Optional[AudienceRole] = None,
+) -> list[BudgetSummary]:
+    stmt = select(BudgetSummary).order_by(BudgetSummary.month, BudgetSummary.audience_role)
+    if start:
+        stmt = stmt.where(BudgetSummary.month >= month_of(start))
+    if end:
+        stmt = stmt.where(BudgetSummary.month <= month_of(end))
+    if audience_role:
+        stmt = stmt.where(BudgetSummary.audience_role == audience_role)
+    result = await db.execute(stmt)
+    return result.scalars().all()
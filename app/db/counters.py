@@ -0,0 +1,43 @@
+from sqlalchemy import event, func, insert, select, update
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.db.models.row_count import RowCount
+from app.db.models.user import User
+
+USERS = "users"
+
+
+def _adjust_statement(name: str, delta: int):
+    return update(RowCount).where(RowCount.name == name).values(value=RowCount.value + delta)
+
+
+async def adjust(db: AsyncSession, name: str, delta: int):
+    """Apply `delta` in the caller's transaction, for writes that bypass the ORM."""
+    await db.execute(_adjust_statement(name, delta))
+
+
+async def get_count(db: AsyncSession, name: str, model) -> int:
+    """
+    Read a maintained counter, seeding it with one COUNT(*) the first time.
+    """
+    value = (await db.execute(select(RowCount.value).where(RowCount.name == name))).scalar()
+    if value is not None:
+        return value
+    value = (await db.execute(select(func.count()).select_from(model))).scalar_one()
+    try:
+        await db.execute(insert(RowCount).values(name=name, value=value))
+        await db.commit()
+    except IntegrityError:
+        await db.rollback()
+    return value
+
+
+@event.listens_for(User, "after_insert")
+def _count_user_insert(mapper, connection, target):
+    connection.execute(_adjust_statement(USERS, 1))
+
+
+@event.listens_for(User, "after_delete")
+def _count_user_delete(mapper, connection, target):
+    connection.execute(_adjust_statement(USERS, -1))
@@ -0,0 +1,135 @@
+import random
+from typing import Optional
+
+from sqlalchemy import func, insert, select, update
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.db.models.fund import Fund, FundShard
+
+DEFAULT_FUND_NAME = "default"
+
+
+async def get_fund(db: AsyncSession, fund_id: Optional[int] = None) -> Optional[Fund]:
+    """Return fund `fund_id`, or the default (oldest) fund when it is None."""
+    if fund_id is not None:
+        return await db.get(Fund, fund_id)
+    result = await db.execute(select(Fund).order_by(Fund.id).limit(1))
+    return result.scalars().first()
+
+
+def _funds_with_balance():
+    return (
+        select(
+            Fund.id,
+            Fund.name,
+            Fund.shard_count,
+            func.coalesce(func.sum(FundShard.balance), 0).label("balance"),
+        )
+        .outerjoin(FundShard, FundShard.fund_id == Fund.id)
+        .group_by(Fund.id, Fund.name, Fund.shard_count)
+        .order_by(Fund.id)
+    )
+
+
+async def read_funds(conn) -> list[dict]:
+    """Every fund with its total balance in one Core statement."""
+    return [dict(row) for row in (await conn.execute(_funds_with_balance())).mappings()]
+
+
+async def read_fund(conn, fund_id: Optional[int] = None) -> Optional[dict]:
+    """
+    Fund `fund_id` (or the default fund) with its total balance, read in one
+    Core statement; works on a plain connection as well as a session.
+    """
+    stmt = _funds_with_balance().limit(1)
+    if fund_id is not None:
+        stmt = stmt.where(Fund.id == fund_id)
+    row = (await conn.execute(stmt)).mappings().first()
+    return dict(row) if row else None
+
+
+async def get_balance(db: AsyncSession, fund: Fund) -> float:
+    result = await db.execute(
+        select(func.coalesce(func.sum(FundShard.balance), 0)).where(FundShard.fund_id == fund.id)
+    )
+    return result.scalar_one()
+
+
+def split_balance(balance: float, shard_count: int) -> list[float]:
+    share = balance / shard_count
+    return [balance - share * (shard_count - 1)] + [share] * (shard_count - 1)
+
+
+async def create_fund(
+    db: AsyncSession, name: str = DEFAULT_FUND_NAME, balance: float = 0, shard_count: int = 1
+) -> Fund:
+    fund = Fund(name=name, shard_count=shard_count)
+    db.add(fund)
+    await db.flush()
+    await db.execute(
+        insert(FundShard),
+        [
+            {"fund_id": fund.id, "shard": shard, "balance": share}
+            for shard, share in enumerate(split_balance(balance, shard_count))
+        ],
+    )
+    return fund
+
+
+async def set_balance(db: AsyncSession, fund: Fund, balance: float):
+    """Reset the fund's total to `balance`, spread evenly over its shards."""
+    for shard, share in enumerate(split_balance(balance, fund.shard_count)):
+        await db.execute(
+            update(FundShard)
+            .where(FundShard.fund_id == fund.id, FundShard.shard == shard)
+            .values(balance=share)
+        )
+
+
+async def deduct(db: AsyncSession, fund: Fund, amount: float) -> bool:
+    """
+    Take `amount` out of the fund in the caller's transaction.
+
+    Shards are tried from a random starting point with a conditional UPDATE,
+    so concurrent deductions usually touch different rows and never read a
+    balance before writing it. Only when no single shard can cover the
+    amount are all shards locked and drained in order. Returns False, leaving
+    balances untouched, if the fund as a whole is short.
+    """
+    start = random.randrange(fund.shard_count)
+    for offset in range(fund.shard_count):
+        shard = (start + offset) % fund.shard_count
+        result = await db.execute(
+            update(FundShard)
+            .where(
+                FundShard.fund_id == fund.id,
+                FundShard.shard == shard,
+                FundShard.balance >= amount,
+            )
+            .values(balance=FundShard.balance - amount)
+        )
+        if result.rowcount:
+            return True
+
+    shards = (await db.execute(
+        select(FundShard.shard, FundShard.balance)
+        .where(FundShard.fund_id == fund.id)
+        .order_by(FundShard.shard)
+        .with_for_update()
+    )).all()
+    if sum(balance for _, balance in shards) < amount:
+        return False
+    remaining = amount
+    for shard, balance in shards:
+        taken = min(balance, remaining)
+        if taken <= 0:
+            continue
+        await db.execute(
+            update(FundShard)
+            .where(FundShard.fund_id == fund.id, FundShard.shard == shard)
+            .values(balance=FundShard.balance - taken)
+        )
+        remaining -= taken
+        if remaining <= 0:
+            break
+    return True
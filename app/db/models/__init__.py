@@ -1,7 +1,13 @@
 from .base import Base
+from .role import RoleCode, Role, AudienceRole, RecipientRole
 from .user import User
+from .deleted_user import DeletedUser
 from .event import Event
-from .fund import Fund
-from .message import Message
+from .fund import Fund, FundShard
+from .message import Message, MessageArchive
+from .budget_summary import BudgetSummary
+from .idempotency_key import IdempotencyKey
+from .row_count import RowCount
+from .table_version import TableVersion
 
-__all__ = ["Base", "User", "Event", "Fund", "Message"]
+__all__ = ["Base", "RoleCode", "Role", "AudienceRole", "RecipientRole", "User", "DeletedUser", "Event", "Fund", "FundShard", "Message", "MessageArchive", "BudgetSummary", "IdempotencyKey", "RowCount", "TableVersion"]
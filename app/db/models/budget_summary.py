@@ -0,0 +1,13 @@
+from sqlalchemy import Column, Integer, Float, Date
+
+from app.db.models.base import Base
+from app.db.models.role import AudienceRole, RoleColumn
+
+class BudgetSummary(Base):
+    """Event spend per audience role and calendar month, kept by app.db.analytics."""
+    __tablename__ = "budget_summaries"
+
+    month = Column(Date, primary_key=True)
+    audience_role = Column(RoleColumn(AudienceRole), primary_key=True)
+    total_budget = Column(Float, nullable=False, default=0)
+    event_count = Column(Integer, nullable=False, default=0)
@@ -0,0 +1,14 @@
+from sqlalchemy import Column, Integer, DateTime
+
+from app.db.models.base import Base
+
+class DeletedUser(Base):
+    """
+    Tombstone of a deleted user, so every worker's token version refresh
+    sees the revocation; the users row it would otherwise read is gone.
+    """
+    __tablename__ = "deleted_users"
+
+    user_id = Column(Integer, primary_key=True)
+    token_version = Column(Integer, nullable=False)
+    deleted_at = Column(DateTime, nullable=False, index=True)
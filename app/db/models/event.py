@@ -1,22 +1,18 @@
-import enum
-from sqlalchemy import Column, Integer, String, Float, DateTime, Enum
+from sqlalchemy import Column, Integer, String, Float, DateTime, Index, ForeignKey
 
 from app.db.models.base import Base
-
-class AudienceRole(str, enum.Enum):
-    ALL = "all"
-    CEO = "ceo"
-    HR = "hr"
-    FINANCE = "finance"
-    EVENT_MANAGER = "event_manager"
-    EMPLOYEE = "employee"
+from app.db.models.role import AudienceRole, RoleColumn
 
 class Event(Base):
     __tablename__ = "events"
+    __table_args__ = (
+        Index("ix_events_name_description_fulltext", "name", "description", mysql_prefix="FULLTEXT").ddl_if(dialect="mysql"),
+    )
 
     id = Column(Integer, primary_key=True, index=True)
     name = Column(String(100), nullable=False)
     description = Column(String(255))
     date = Column(DateTime, nullable=False)
     budget = Column(Float, nullable=False)
-    audience_role = Column(Enum(AudienceRole), default=AudienceRole.ALL, nullable=False)
+    audience_role = Column(RoleColumn(AudienceRole), default=AudienceRole.ALL, nullable=False)
+    fund_id = Column(Integer, ForeignKey("funds.id"), index=True)
@@ -1,4 +1,4 @@
-from sqlalchemy import Column, Integer, Float
+from sqlalchemy import Column, Integer, Float, String, ForeignKey
 
 from app.db.models.base import Base
 
@@ -6,4 +6,18 @@ class Fund(Base):
     __tablename__ = "funds"
 
     id = Column(Integer, primary_key=True, index=True)
-    balance = Column(Float, nullable=False)
+    name = Column(String(50), unique=True, index=True, nullable=False)
+    shard_count = Column(Integer, nullable=False, default=1)
+
+
+class FundShard(Base):
+    """
+    One slice of a fund's balance. A fund's balance is the sum of its shards;
+    deductions update a single shard so concurrent writers rarely contend on
+    the same row.
+    """
+    __tablename__ = "fund_shards"
+
+    fund_id = Column(Integer, ForeignKey("funds.id", ondelete="CASCADE"), primary_key=True)
+    shard = Column(Integer, primary_key=True, autoincrement=False)
+    balance = Column(Float, nullable=False, default=0)
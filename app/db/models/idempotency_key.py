@@ -0,0 +1,19 @@
+from sqlalchemy import Column, Integer, String, DateTime, LargeBinary
+
+from app.db.models.base import Base
+
+class IdempotencyKey(Base):
+    """
+    Outcome of a mutating request sent with an `Idempotency-Key` header,
+    shared by every worker. `status_code` stays NULL while the first request
+    is still running.
+    """
+    __tablename__ = "idempotency_keys"
+
+    key = Column(String(64), primary_key=True)
+    fingerprint = Column(String(64), nullable=False)
+    status_code = Column(Integer)
+    content_type = Column(String(100))
+    body = Column(LargeBinary(length=16777215))
+    created_at = Column(DateTime, nullable=False)
+    expires_at = Column(DateTime, nullable=False, index=True)
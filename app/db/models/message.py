@@ -1,33 +1,39 @@
-import enum
-from sqlalchemy import Column, Integer, String, DateTime, Enum, ForeignKey
+from sqlalchemy import Column, Integer, String, DateTime, ForeignKey, Index
 from sqlalchemy.orm import relationship
 
 from app.db.models.base import Base
-
-class RecipientRole(str, enum.Enum):
-    ALL = "ALL"
-    CEO = "CEO"
-    HR = "HR"
-    FINANCE = "FINANCE"
-    EVENT_MANAGER = "EVENT_MANAGER"
-    EMPLOYEE = "EMPLOYEE"
-    ADMIN = "ADMIN"
+from app.db.models.role import RecipientRole, RoleColumn
 
 
 class Message(Base):
     __tablename__ = "messages"
+    __table_args__ = (
+        Index("ix_messages_recipient_role_timestamp", "recipient_role", "timestamp"),
+        Index("ix_messages_content_fulltext", "content", mysql_prefix="FULLTEXT").ddl_if(dialect="mysql"),
+    )
 
     id = Column(Integer, primary_key=True, index=True)
     sender_id = Column(Integer, ForeignKey("users.id"))
-    recipient_role = Column(
-        Enum(
-            RecipientRole,
-            values_callable=lambda x: [e.value for e in x],  # store the Enum value
-            native_enum=False  # store as VARCHAR, safer for cross-DB compatibility
-        ),
-        nullable=False
-    )
+    recipient_role = Column(RoleColumn(RecipientRole), nullable=False)
     content = Column(String(255), nullable=False)
     timestamp = Column(DateTime, nullable=False)
 
     sender = relationship("User")
+
+
+class MessageArchive(Base):
+    """
+    Cold storage for messages moved out of `messages` by the retention job.
+
+    `timestamp` is part of the primary key so the table can be range
+    partitioned on MySQL, and `sender_id` carries no foreign key because
+    partitioned InnoDB tables cannot have one.
+    """
+    __tablename__ = "messages_archive"
+
+    id = Column(Integer, primary_key=True, autoincrement=False)
+    timestamp = Column(DateTime, primary_key=True)
+    sender_id = Column(Integer)
+    recipient_role = Column(RoleColumn(RecipientRole), nullable=False)
+    content = Column(String(255), nullable=False)
+    archived_at = Column(DateTime, nullable=False)
@@ -0,0 +1,94 @@
+import enum
+from typing import Optional
+
+from sqlalchemy import SmallInteger
+from sqlalchemy.types import TypeDecorator
+
+
+class RoleCode(enum.IntEnum):
+    """
+    How every role column is stored. The API-facing enums below keep their
+    own spellings and map onto these codes by member name.
+    """
+    ALL = 0
+    ADMIN = 1
+    CEO = 2
+    HR = 3
+    FINANCE = 4
+    EVENT_MANAGER = 5
+    EMPLOYEE = 6
+
+
+class Role(str, enum.Enum):
+    ADMIN = "admin"
+    CEO = "ceo"
+    HR = "hr"
+    FINANCE = "finance"
+    EVENT_MANAGER = "event_manager"
+    EMPLOYEE = "employee"
+
+
+class AudienceRole(str, enum.Enum):
+    ALL = "all"
+    CEO = "ceo"
+    HR = "hr"
+    FINANCE = "finance"
+    EVENT_MANAGER = "event_manager"
+    EMPLOYEE = "employee"
+
+
+class RecipientRole(str, enum.Enum):
+    ALL = "ALL"
+    CEO = "CEO"
+    HR = "HR"
+    FINANCE = "FINANCE"
+    EVENT_MANAGER = "EVENT_MANAGER"
+    EMPLOYEE = "EMPLOYEE"
+    ADMIN = "ADMIN"
+
+
+# Built once at import: the user role an audience or recipient targets,
+# None meaning everyone.
+_USER_ROLES: dict[enum.Enum, Optional[Role]] = {
+    member: None if member.name == "ALL" else Role[member.name]
+    for target in (AudienceRole, RecipientRole)
+    for member in target
+}
+
+
+def user_role(target: enum.Enum) -> Optional[Role]:
+    """The `Role` an AudienceRole/RecipientRole targets, or None for ALL."""
+    return _USER_ROLES[target]
+
+
+class RoleColumn(TypeDecorator):
+    """
+    Stores members of `enum_class` as their shared RoleCode in a SMALLINT,
+    so the same role compares equal across users, events and messages.
+    Binds accept members or their string values.
+    """
+    impl = SmallInteger
+    cache_ok = True
+
+    def __init__(self, enum_class: type[enum.Enum]):
+        super().__init__()
+        self.enum_class = enum_class
+        self._codes = {member: int(RoleCode[member.name]) for member in enum_class}
+        self._members = {code: member for member, code in self._codes.items()}
+
+    def process_bind_param(self, value, dialect):
+        if value is None:
+            return None
+        try:
+            return self._codes[value]
+        except KeyError:
+            raise LookupError(f"{value!r} is not a valid {self.enum_class.__name__}") from None
+
+    def process_result_value(self, value, dialect):
+        if value is None:
+            return None
+        return self._members[value]
+
+    @property
+    def python_type(self):
+        return self.enum_class
@@ -0,0 +1,10 @@
+from sqlalchemy import Column, String, BigInteger
+
+from app.db.models.base import Base
+
+class RowCount(Base):
+    """Row totals kept current on write so listings avoid COUNT(*) scans."""
+    __tablename__ = "row_counts"
+
+    name = Column(String(50), primary_key=True)
+    value = Column(BigInteger, nullable=False, default=0)
@@ -0,0 +1,15 @@
+from sqlalchemy import Column, Integer, String, BigInteger
+
+from app.db.models.base import Base
+
+class TableVersion(Base):
+    """
+    One slice of a counter bumped by every write to a table, used to ETag
+    its listings. The table's version is the sum of its shards; each write
+    bumps a random shard, so concurrent writers rarely lock the same row.
+    """
+    __tablename__ = "table_versions"
+
+    name = Column(String(50), primary_key=True)
+    shard = Column(Integer, primary_key=True, autoincrement=False)
+    version = Column(BigInteger, nullable=False, default=0)
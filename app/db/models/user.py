@@ -1,15 +1,7 @@
-import enum
-from sqlalchemy import Column, Integer, String, Boolean, Enum
+from sqlalchemy import Column, Integer, String, Boolean
 
 from app.db.models.base import Base
-
-class Role(str, enum.Enum):
-    ADMIN = "admin"
-    CEO = "ceo"
-    HR = "hr"
-    FINANCE = "finance"
-    EVENT_MANAGER = "event_manager"
-    EMPLOYEE = "employee"
+from app.db.models.role import Role, RoleColumn
 
 class User(Base):
     __tablename__ = "users"
@@ -18,5 +10,9 @@ class User(Base):
     username = Column(String(50), unique=True, index=True, nullable=False)
     email = Column(String(100), unique=True, index=True, nullable=False)
     hashed_password = Column(String(255), nullable=False)
-    role = Column(Enum(Role), default=Role.EMPLOYEE, nullable=False)
+    role = Column(RoleColumn(Role), default=Role.EMPLOYEE, nullable=False, index=True)
     is_active = Column(Boolean, default=True)
+    # Bumped whenever role or active status changes so access tokens issued
+    # before the change stop being trusted on their claims alone; deletes
+    # leave the bumped version in deleted_users.
+    token_version = Column(Integer, nullable=False, default=0, index=True)
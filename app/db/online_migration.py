@@ -0,0 +1,278 @@
+import logging
+import time
+from dataclasses import dataclass
+from typing import Callable, Optional, Sequence
+
+from alembic import context as alembic_context
+from sqlalchemy import inspect, text
+from sqlalchemy.engine import Connection
+
+logger = logging.getLogger("alembic.online")
+
+SUPPORTED_DIALECTS = ("mysql", "sqlite")
+
+
+class UnsupportedDialect(Exception):
+    """Raised when an OnlineTableChange is set up on a database it can't rebuild tables on."""
+
+
+@dataclass
+class CopyEstimate:
+    rows: int
+    batches: int
+    seconds: float
+
+    def __str__(self):
+        return f"~{self.rows} rows in {self.batches} batches, ~{self.seconds:.0f}s"
+
+
+def log_progress(table: str, copied: int, total: int, elapsed: float):
+    percent = 100 * copied / total if total else 100
+    logger.info("%s: copied %s/%s rows (%.1f%%) in %.0fs", table, copied, total, percent, elapsed)
+
+
+class OnlineTableChange:
+    """
+    Rebuilds a table into a new shape without locking it for the whole copy,
+    in the style of pt-online-schema-change.
+
+    1. `_<table>_new` is created like the table and `alter` is applied to it
+       while it is still empty. Statements use `{table}` for its name.
+    2. Triggers mirror every insert, update and delete on the table into it.
+    3. Existing rows are copied in primary-key order, `batch_size` at a time,
+       sleeping `throttle` seconds between batches. Each batch commits on its
+       own, so run it inside `op.get_context().autocommit_block()`, as
+       run_online_change does.
+    4. The tables are swapped with one atomic RENAME and the old one dropped.
+
+    `columns` maps shadow columns to SQL expressions over the source row,
+    written with `{src}.` before source column names, e.g.
+    `{"role": "UPPER({src}.role)"}`. Columns not listed are copied by name.
+    The table needs a single-column primary key and must not be the target
+    of foreign keys, which would stay attached to the old table; its own
+    foreign keys are carried over. Works on MySQL and SQLite, so a change
+    can be rehearsed on a local database, and raises UnsupportedDialect on
+    anything else.
+    """
+
+    def __init__(
+        self,
+        connection: Connection,
+        table: str,
+        alter: Sequence[str] = (),
+        columns: Optional[dict[str, str]] = None,
+        batch_size: int = 5000,
+        throttle: float = 0.05,
+        progress: Callable[[str, int, int, float], None] = log_progress,
+    ):
+        self.connection = connection
+        self.dialect = connection.dialect.name
+        if self.dialect not in SUPPORTED_DIALECTS:
+            raise UnsupportedDialect(
+                f"Online table changes need one of {', '.join(SUPPORTED_DIALECTS)}, not {self.dialect}; "
+                f"use a plain op.alter_column there"
+            )
+        self.table = table
+        self.shadow = f"_{table}_new"
+        self.old = f"_{table}_old"
+        self.alter = alter
+        self.columns = columns or {}
+        self.batch_size = batch_size
+        self.throttle = throttle
+        self.progress = progress
+        primary_key = inspect(connection).get_pk_constraint(table)["constrained_columns"]
+        if len(primary_key) != 1:
+            raise ValueError(f"{table} needs a single-column primary key to be copied in batches")
+        self.pk = primary_key[0]
+
+    def q(self, name: str) -> str:
+        return self.connection.dialect.identifier_preparer.quote(name)
+
+    def _execute(self, statement: str, **params):
+        return self.connection.execute(text(statement), params)
+
+    def _row_count(self) -> int:
+        if self.dialect == "mysql":
+            # InnoDB's estimate; an exact COUNT(*) would scan the table.
+            rows = self._execute(
+                "SELECT TABLE_ROWS FROM information_schema.TABLES "
+                "WHERE TABLE_SCHEMA = DATABASE() AND TABLE_NAME = :table",
+                table=self.table,
+            ).scalar()
+            if rows is not None:
+                return int(rows)
+        return self._execute(f"SELECT COUNT(*) FROM {self.q(self.table)}").scalar_one()
+
+    def estimate(self) -> CopyEstimate:
+        """
+        Estimate the copy by timing a read of one batch; writing the shadow
+        rows costs more than reading them, so treat it as a lower bound.
+        """
+        rows = self._row_count()
+        batches = -(-rows // self.batch_size)
+        start = time.monotonic()
+        self._execute(
+            f"SELECT * FROM {self.q(self.table)} ORDER BY {self.q(self.pk)} LIMIT :limit",
+            limit=self.batch_size,
+        ).fetchall()
+        per_batch = time.monotonic() - start
+        return CopyEstimate(rows, batches, batches * (per_batch + self.throttle))
+
+    def _create_shadow(self):
+        if self.dialect == "mysql":
+            self._execute(f"CREATE TABLE {self.q(self.shadow)} LIKE {self.q(self.table)}")
+            self._copy_foreign_keys()
+        else:
+            create = self._execute(
+                "SELECT sql FROM sqlite_master WHERE type = 'table' AND name = :table", table=self.table
+            ).scalar_one()
+            # Swap the name in the CREATE TABLE header only.
+            _, rest = create.split("(", 1)
+            self._execute(f"CREATE TABLE {self.q(self.shadow)} ({rest}")
+        for statement in self.alter:
+            self._execute(statement.format(table=self.q(self.shadow)))
+
+    def _copy_foreign_keys(self):
+        """
+        MySQL's CREATE TABLE LIKE leaves out foreign keys, so add the
+        table's own to the shadow. Constraint names are unique per schema:
+        the copies toggle a leading underscore, so rebuilding the table again
+        later gets the original names back instead of growing a prefix.
+        """
+        for fk in inspect(self.connection).get_foreign_keys(self.table):
+            name = fk["name"][1:] if fk["name"].startswith("_") else f"_{fk['name']}"
+            options = fk.get("options", {})
+            self._execute(
+                f"ALTER TABLE {self.q(self.shadow)} ADD CONSTRAINT {self.q(name)} "
+                f"FOREIGN KEY ({', '.join(map(self.q, fk['constrained_columns']))}) "
+                f"REFERENCES {self.q(fk['referred_table'])} ({', '.join(map(self.q, fk['referred_columns']))})"
+                + (f" ON DELETE {options['ondelete']}" if options.get("ondelete") else "")
+                + (f" ON UPDATE {options['onupdate']}" if options.get("onupdate") else "")
+            )
+
+    def _column_lists(self, source: str) -> tuple[str, str]:
+        shadow_columns = [column["name"] for column in inspect(self.connection).get_columns(self.shadow)]
+        table_columns = {column["name"] for column in inspect(self.connection).get_columns(self.table)}
+        names, expressions = [], []
+        for name in shadow_columns:
+            if name in self.columns:
+                expression = self.columns[name]
+            elif name in table_columns:
+                expression = "{src}." + self.q(name)
+            else:
+                continue
+            names.append(self.q(name))
+            expressions.append(expression.format(src=source))
+        return ", ".join(names), ", ".join(expressions)
+
+    def _trigger_names(self) -> dict[str, str]:
+        return {action: f"_{self.table}_online_{action.lower()}" for action in ("INSERT", "UPDATE", "DELETE")}
+
+    def _create_triggers(self):
+        names, new_values = self._column_lists("NEW")
+        shadow, pk = self.q(self.shadow), self.q(self.pk)
+        bodies = {
+            "INSERT": [f"REPLACE INTO {shadow} ({names}) VALUES ({new_values})"],
+            "UPDATE": [
+                f"DELETE FROM {shadow} WHERE {pk} = OLD.{pk}",
+                f"REPLACE INTO {shadow} ({names}) VALUES ({new_values})",
+            ],
+            "DELETE": [f"DELETE FROM {shadow} WHERE {pk} = OLD.{pk}"],
+        }
+        for action, trigger in self._trigger_names().items():
+            self._execute(
+                f"CREATE TRIGGER {self.q(trigger)} AFTER {action} ON {self.q(self.table)} "
+                f"FOR EACH ROW BEGIN {'; '.join(bodies[action])}; END"
+            )
+
+    def _drop_triggers(self):
+        for trigger in self._trigger_names().values():
+            self._execute(f"DROP TRIGGER IF EXISTS {self.q(trigger)}")
+
+    def _copy(self):
+        names, values = self._column_lists("src")
+        table, shadow, pk = self.q(self.table), self.q(self.shadow), self.q(self.pk)
+        ignore = "INSERT IGNORE" if self.dialect == "mysql" else "INSERT OR IGNORE"
+        total = self._row_count()
+        copied = 0
+        last = None
+        started = time.monotonic()
+        while True:
+            after = "" if last is None else f"WHERE {pk} > :last"
+            upto = self._execute(
+                f"SELECT MAX({pk}) FROM (SELECT {pk} FROM {table} {after} ORDER BY {pk} LIMIT :limit) AS batch",
+                last=last, limit=self.batch_size,
+            ).scalar()
+            if upto is None:
+                break
+            lower = "" if last is None else f"src.{pk} > :last AND "
+            # Rows the triggers already mirrored are newer; keep them.
+            result = self._execute(
+                f"{ignore} INTO {shadow} ({names}) SELECT {values} FROM {table} AS src "
+                f"WHERE {lower}src.{pk} <= :upto",
+                last=last, upto=upto,
+            )
+            copied += result.rowcount
+            last = upto
+            self.progress(self.table, copied, max(total, copied), time.monotonic() - started)
+            if self.throttle:
+                time.sleep(self.throttle)
+
+    def _swap(self):
+        table, shadow, old = self.q(self.table), self.q(self.shadow), self.q(self.old)
+        if self.dialect == "mysql":
+            self._execute(f"RENAME TABLE {table} TO {old}, {shadow} TO {table}")
+            self._drop_triggers()
+        else:
+            indexes = self._execute(
+                "SELECT sql FROM sqlite_master WHERE type = 'index' AND tbl_name = :table AND sql IS NOT NULL",
+                table=self.table,
+            ).scalars().all()
+            # SQLite serializes writers, so one transaction makes the swap atomic.
+            self._execute("BEGIN IMMEDIATE")
+            self._drop_triggers()
+            self._execute(f"ALTER TABLE {table} RENAME TO {old}")
+            self._execute(f"ALTER TABLE {shadow} RENAME TO {table}")
+            self._execute(f"DROP TABLE {old}")
+            # Index names are global in SQLite, so the shadow could not
+            # create them while the original table held them.
+            for index in indexes:
+                self._execute(index)
+            self._execute("COMMIT")
+            return
+        self._execute(f"DROP TABLE {old}")
+
+    def run(self, dry_run: bool = False) -> CopyEstimate:
+        """Apply the change, or with `dry_run` only log and return the estimate."""
+        estimate = self.estimate()
+        logger.info("%s: online change %s", self.table, estimate)
+        if dry_run:
+            return estimate
+        self._drop_triggers()
+        self._execute(f"DROP TABLE IF EXISTS {self.q(self.shadow)}")
+        self._create_shadow()
+        try:
+            self._create_triggers()
+            self._copy()
+        except BaseException:
+            self._drop_triggers()
+            self._execute(f"DROP TABLE IF EXISTS {self.q(self.shadow)}")
+            raise
+        self._swap()
+        return estimate
+
+
+def run_online_change(op, table: str, **options) -> CopyEstimate:
+    """
+    Run an OnlineTableChange from a migration. `alembic -x online_dry_run=1
+    upgrade ...` only logs the estimate, and fails the migration so it is
+    not recorded as applied. The autocommit block commits whatever the
+    migration did before it, so call this first.
+    """
+    dry_run = bool(alembic_context.get_x_argument(as_dictionary=True).get("online_dry_run"))
+    with op.get_context().autocommit_block():
+        change = OnlineTableChange(op.get_bind(), table, **options)
+        estimate = change.run(dry_run=dry_run)
+    if dry_run:
+        raise RuntimeError(f"Dry run of the online change to {table}: {estimate}")
+    return estimate
@@ -0,0 +1,159 @@
+import heapq
+import logging
+import time
+from collections import Counter
+from contextvars import ContextVar
+from dataclasses import dataclass, field
+from typing import Optional
+
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+
+from app.core.config import settings
+
+logger = logging.getLogger(__name__)
+
+
+class QueryBudgetExceeded(Exception):
+    """
+    Raised in QUERY_AUDIT_STRICT mode by the statement that busts a budget,
+    so tests fail on it before the request's transaction commits.
+    """
+
+
+@dataclass
+class RequestQueries:
+    scope: dict
+    count: int = 0
+    shapes: Counter = field(default_factory=Counter)
+    # Set once the response starts; later statements are not counted.
+    responded: bool = False
+
+    @property
+    def endpoint(self) -> str:
+        route = self.scope.get("route")
+        return f"{self.scope['method']} {getattr(route, 'path', self.scope['path'])}"
+
+
+_current: ContextVar[Optional[RequestQueries]] = ContextVar("query_audit_request", default=None)
+
+
+class SlowQueries:
+    """The QUERY_AUDIT_SLOW_TOP slowest statements seen, with their endpoint."""
+
+    def __init__(self, size: int = None):
+        self.size = size or settings.QUERY_AUDIT_SLOW_TOP
+        self._heap: list[tuple[float, str, str]] = []
+
+    def record(self, seconds: float, statement: str, endpoint: str):
+        entry = (seconds, statement, endpoint)
+        if len(self._heap) < self.size:
+            heapq.heappush(self._heap, entry)
+        elif seconds > self._heap[0][0]:
+            heapq.heapreplace(self._heap, entry)
+
+    def report(self) -> list[dict]:
+        return [
+            {"ms": round(seconds * 1000, 2), "endpoint": endpoint, "statement": statement}
+            for seconds, statement, endpoint in sorted(self._heap, reverse=True)
+        ]
+
+    def clear(self):
+        self._heap = []
+
+
+slow_queries = SlowQueries()
+
+
+# The start time rides on the statement's execution context, which is
+# discarded with it, so a statement that fails leaves nothing behind.
+def _before_execute(conn, cursor, statement, parameters, context, executemany):
+    if context is not None:
+        context.query_audit_started = time.perf_counter()
+
+
+def _after_execute(conn, cursor, statement, parameters, context, executemany):
+    started = getattr(context, "query_audit_started", None)
+    elapsed = time.perf_counter() - started if started is not None else 0.0
+    queries = _current.get()
+    if queries is None:
+        slow_queries.record(elapsed, statement, "-")
+        return
+    if queries.responded:
+        slow_queries.record(elapsed, statement, queries.endpoint)
+        return
+    queries.count += 1
+    # Statements are already parameterized, so the SQL text is the shape.
+    queries.shapes[statement] += 1
+    slow_queries.record(elapsed, statement, queries.endpoint)
+    if settings.QUERY_AUDIT_STRICT:
+        problems = check(queries, statement)
+        if problems:
+            raise QueryBudgetExceeded("; ".join(problems))
+
+
+def install():
+    """Time and count every statement on every engine."""
+    if not event.contains(Engine, "before_cursor_execute", _before_execute):
+        event.listen(Engine, "before_cursor_execute", _before_execute)
+        event.listen(Engine, "after_cursor_execute", _after_execute)
+
+
+def check(queries: RequestQueries, statement: Optional[str] = None) -> list[str]:
+    """
+    Problems with a request so far: a busted budget and N+1 shapes, only
+    looking at `statement`'s shape when given.
+    """
+    problems = []
+    budget = queries.scope.get("state", {}).get("query_budget")
+    if budget is not None and queries.count > budget:
+        problems.append(f"{queries.endpoint} ran {queries.count} statements, budget is {budget}")
+    shapes = queries.shapes.items() if statement is None else [(statement, queries.shapes[statement])]
+    for shape, count in shapes:
+        if count >= settings.QUERY_AUDIT_REPEAT_THRESHOLD:
+            problems.append(f"{queries.endpoint} ran the same statement {count} times (N+1?): {shape}")
+    return problems
+
+
+class QueryAuditMiddleware:
+    """
+    Debugging aid, enabled by QUERY_AUDIT: counts the statements each HTTP
+    request runs and reports them in `X-Query-Count`.
+
+    Going over the route's budget (see deps.query_budget) or running one
+    statement shape QUERY_AUDIT_REPEAT_THRESHOLD times or more is logged as
+    a warning when the response starts and counted in
+    `X-Query-Problems`; the response itself is left alone, since any write
+    has committed by then. With QUERY_AUDIT_STRICT, for tests, the
+    statement that causes a problem raises QueryBudgetExceeded instead, so
+    the request fails before it commits. Statements run after the response
+    starts, by streamed responses, are not reported.
+    """
+
+    def __init__(self, app):
+        self.app = app
+        install()
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+        queries = RequestQueries(scope)
+        token = _current.set(queries)
+
+        async def audited_send(message):
+            if message["type"] == "http.response.start":
+                queries.responded = True
+                problems = check(queries)
+                for problem in problems:
+                    logger.warning(problem)
+                headers = [(b"x-query-count", str(queries.count).encode())]
+                if problems:
+                    headers.append((b"x-query-problems", str(len(problems)).encode()))
+                message = {**message, "headers": [*message.get("headers", []), *headers]}
+            await send(message)
+
+        try:
+            await self.app(scope, receive, audited_send)
+        finally:
+            _current.reset(token)
@@ -0,0 +1,80 @@
+import asyncio
+import logging
+from datetime import datetime, timedelta, timezone
+from typing import Optional
+
+from sqlalchemy import delete, insert, literal, select
+
+from app.core.config import settings
+from app.db.models.message import Message, MessageArchive, RecipientRole
+from app.db.session import AsyncSessionLocal
+
+logger = logging.getLogger(__name__)
+
+
+async def archive_role(
+    role: RecipientRole,
+    cutoff: datetime,
+    batch_size: int = None,
+    session_factory=AsyncSessionLocal,
+) -> int:
+    """
+    Move messages for `role` older than `cutoff` into `messages_archive`.
+
+    Rows are moved in primary-key batches, each in its own short transaction,
+    so the hot table is never locked by one long DELETE.
+    """
+    batch_size = batch_size or settings.MESSAGE_ARCHIVE_BATCH_SIZE
+    moved = 0
+    while True:
+        async with session_factory() as db:
+            ids = (await db.execute(
+                select(Message.id)
+                .where(Message.recipient_role == role, Message.timestamp < cutoff)
+                .order_by(Message.id)
+                .limit(batch_size)
+            )).scalars().all()
+            if not ids:
+                return moved
+            archived_at = datetime.now(timezone.utc)
+            await db.execute(
+                insert(MessageArchive).from_select(
+                    ["id", "timestamp", "sender_id", "recipient_role", "content", "archived_at"],
+                    select(
+                        Message.id,
+                        Message.timestamp,
+                        Message.sender_id,
+                        Message.recipient_role,
+                        Message.content,
+                        literal(archived_at, MessageArchive.archived_at.type),
+                    ).where(Message.id.in_(ids)),
+                )
+            )
+            await db.execute(delete(Message).where(Message.id.in_(ids)))
+            await db.commit()
+        moved += len(ids)
+        # Let request handlers in between batches.
+        await asyncio.sleep(0)
+
+
+async def compact_messages(now: Optional[datetime] = None, session_factory=AsyncSessionLocal) -> dict[RecipientRole, int]:
+    now = now or datetime.now(timezone.utc)
+    moved = {}
+    for role_name, days in settings.MESSAGE_RETENTION_DAYS.items():
+        role = RecipientRole[role_name]
+        moved[role] = await archive_role(
+            role, now - timedelta(days=days), session_factory=session_factory
+        )
+    return moved
+
+
+async def run_compaction_loop(interval: Optional[int] = None):
+    interval = interval or settings.MESSAGE_COMPACTION_INTERVAL_SECONDS
+    while True:
+        try:
+            moved = await compact_messages()
+            if any(moved.values()):
+                logger.info("Archived messages: %s", {r.value: n for r, n in moved.items()})
+        except Exception:
+            logger.exception("Message compaction failed")
+        await asyncio.sleep(interval)
@@ -0,0 +1,199 @@
+import asyncio
+import logging
+import os
+import time
+from http.cookies import SimpleCookie
+from typing import Optional
+
+from sqlalchemy import event, text
+from starlette.datastructures import MutableHeaders
+from sqlalchemy.ext.asyncio import AsyncConnection, AsyncEngine, create_async_engine
+from sqlalchemy.orm import Session
+
+from app.core.config import settings
+from app.db.session import pool_options
+
+logger = logging.getLogger(__name__)
+
+# Unix time until which the client's reads go to the primary, set on
+# responses to requests that wrote something.
+PIN_COOKIE = "read_primary_until"
+
+
+async def replica_lag(conn: AsyncConnection) -> Optional[float]:
+    """Seconds the replica is behind its source, or None when unknown."""
+    if conn.dialect.name != "mysql":
+        return None
+    for statement, column in (
+        ("SHOW REPLICA STATUS", "Seconds_Behind_Source"),
+        ("SHOW SLAVE STATUS", "Seconds_Behind_Master"),
+    ):
+        try:
+            row = (await conn.execute(text(statement))).mappings().first()
+        except Exception:
+            continue
+        if row is None:
+            return None
+        lag = row.get(column)
+        # NULL lag means replication is stopped; treat it as infinitely behind.
+        return float("inf") if lag is None else float(lag)
+    return None
+
+
+class ReadRouter:
+    """
+    Picks the engine a read-only request runs on.
+
+    Reads go to the replica unless it is missing, unhealthy or lagging more
+    than REPLICA_MAX_LAG_SECONDS, or the caller wrote something within the
+    last READ_YOUR_WRITES_SECONDS. A write pins the user in this process and
+    sets PIN_COOKIE on the response, so the pin also holds when the next
+    request lands on another worker. Replica health is probed every
+    REPLICA_HEALTH_CHECK_SECONDS by run_health_checks, off the request path,
+    and a failed connect marks it unhealthy until the next probe. Both
+    engines are expected to come from autocommit_engine.
+    """
+
+    def __init__(self, primary: AsyncEngine, replica: Optional[AsyncEngine] = None):
+        self.primary = primary
+        self.replica = replica
+        self.replica_healthy = replica is not None
+        self._pinned: dict[str, float] = {}
+
+    def pin(self, user_id: str):
+        now = time.monotonic()
+        self._pinned[user_id] = now + settings.READ_YOUR_WRITES_SECONDS
+        if len(self._pinned) > 10000:
+            self._pinned = {key: until for key, until in self._pinned.items() if until > now}
+
+    def is_pinned(self, user_id: Optional[str], pinned_until: Optional[float] = None) -> bool:
+        """
+        Whether `user_id` wrote recently on this worker, or `pinned_until`,
+        the client's PIN_COOKIE, is still in the future.
+        """
+        if pinned_until is not None and pinned_until > time.time():
+            return True
+        return user_id is not None and self._pinned.get(user_id, 0) > time.monotonic()
+
+    def mark_unhealthy(self):
+        self.replica_healthy = False
+
+    async def check_replica(self):
+        try:
+            async with self.replica.connect() as conn:
+                lag = await replica_lag(conn)
+        except Exception:
+            logger.warning("Read replica unreachable, reading from primary", exc_info=True)
+            self.replica_healthy = False
+            return
+        self.replica_healthy = lag is None or lag <= settings.REPLICA_MAX_LAG_SECONDS
+        if not self.replica_healthy:
+            logger.warning("Read replica is %ss behind, reading from primary", lag)
+
+    async def run_health_checks(self):
+        """Probe the replica every REPLICA_HEALTH_CHECK_SECONDS; started by main's startup."""
+        while True:
+            await self.check_replica()
+            await asyncio.sleep(settings.REPLICA_HEALTH_CHECK_SECONDS)
+
+    def engine_for(self, user_id: Optional[str] = None, pinned_until: Optional[float] = None) -> AsyncEngine:
+        if self.replica is None or self.is_pinned(user_id, pinned_until):
+            return self.primary
+        return self.replica if self.replica_healthy else self.primary
+
+    async def connect(self, user_id: Optional[str] = None, pinned_until: Optional[float] = None) -> AsyncConnection:
+        target = self.engine_for(user_id, pinned_until)
+        try:
+            return await target.connect()
+        except Exception:
+            if target is self.primary:
+                raise
+            logger.warning("Read replica connect failed, reading from primary", exc_info=True)
+            self.mark_unhealthy()
+            return await self.primary.connect()
+
+
+def autocommit_engine(url: str, pools: int = 1) -> AsyncEngine:
+    """
+    An engine whose pooled connections are opened in autocommit mode, so
+    checking one out costs no isolation level switch and returning it no
+    rollback.
+    """
+    engine = create_async_engine(
+        url, isolation_level="AUTOCOMMIT", pool_reset_on_return=None, pool_pre_ping=True, **pool_options(pools)
+    )
+    # A forked worker must not reuse the parent's pooled connections.
+    os.register_at_fork(after_in_child=lambda: engine.sync_engine.dispose(close=False))
+    return engine
+
+
+read_router = ReadRouter(
+    autocommit_engine(settings.DATABASE_URL, pools=2),
+    autocommit_engine(settings.DATABASE_READ_URL) if settings.DATABASE_READ_URL else None,
+)
+
+
+# Pin the writing user to the primary once their write commits. deps.get_db
+# puts the request state in session.info; auth dependencies record the
+# caller's id on it.
+@event.listens_for(Session, "after_flush")
+def _mark_flush_write(session, flush_context):
+    session.info["wrote"] = True
+
+
+@event.listens_for(Session, "do_orm_execute")
+def _mark_statement_write(orm_execute_state):
+    if orm_execute_state.is_insert or orm_execute_state.is_update or orm_execute_state.is_delete:
+        orm_execute_state.session.info["wrote"] = True
+
+
+@event.listens_for(Session, "after_commit")
+def _pin_writer(session):
+    if not session.info.pop("wrote", False):
+        return
+    request_state = session.info.get("request_state")
+    if request_state is None:
+        return
+    request_state.wrote = True
+    user_id = getattr(request_state, "user_id", None)
+    if user_id is not None:
+        read_router.pin(str(user_id))
+
+
+def pinned_until(cookie: Optional[str]) -> Optional[float]:
+    """PIN_COOKIE's value, capped at READ_YOUR_WRITES_SECONDS from now."""
+    try:
+        until = float(cookie)
+    except (TypeError, ValueError):
+        return None
+    return min(until, time.time() + settings.READ_YOUR_WRITES_SECONDS)
+
+
+class ReadYourWritesMiddleware:
+    """
+    Sets PIN_COOKIE on responses to requests that committed a write, so
+    whichever worker serves the client's next reads keeps them on the
+    primary for READ_YOUR_WRITES_SECONDS.
+    """
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http" or read_router.replica is None:
+            await self.app(scope, receive, send)
+            return
+
+        async def pin_send(message):
+            if message["type"] == "http.response.start" and scope.get("state", {}).get("wrote"):
+                cookie = SimpleCookie()
+                cookie[PIN_COOKIE] = f"{time.time() + settings.READ_YOUR_WRITES_SECONDS:.3f}"
+                cookie[PIN_COOKIE]["max-age"] = settings.READ_YOUR_WRITES_SECONDS
+                cookie[PIN_COOKIE]["path"] = "/"
+                cookie[PIN_COOKIE]["httponly"] = True
+                cookie[PIN_COOKIE]["samesite"] = "lax"
+                headers = MutableHeaders(scope=message)
+                headers.append("set-cookie", cookie.output(header="").strip())
+            await send(message)
+
+        await self.app(scope, receive, pin_send)
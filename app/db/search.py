@@ -0,0 +1,217 @@
+import asyncio
+import math
+import re
+from collections import Counter, defaultdict
+from typing import Collection, Iterable, Optional
+
+from sqlalchemy import event, select
+from sqlalchemy.dialects.mysql import match
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import Session
+
+from app.db.models.event import Event
+from app.db.models.message import Message, RecipientRole
+
+MESSAGES = "messages"
+EVENTS = "events"
+
+_TOKEN = re.compile(r"\w+")
+
+
+def tokenize(text: str) -> list[str]:
+    return _TOKEN.findall(text.lower()) if text else []
+
+
+def event_text(name: str, description: str) -> str:
+    return f"{name} {description or ''}"
+
+
+class InvertedIndex:
+    """
+    In-process term index used where the database has no FULLTEXT support
+    (SQLite in local runs and tests).
+
+    It is loaded from the database on first search and then kept current by
+    the session events below, which apply a transaction's changes once it
+    commits. Hits for rows removed behind the ORM's back, e.g. by the
+    retention job's Core deletes, are dropped when the rows are loaded.
+    Messages are indexed with their recipient role so searches can be
+    limited to the roles a caller may read.
+    """
+
+    def __init__(self):
+        self.postings: dict[str, dict[tuple[str, int], int]] = defaultdict(dict)
+        self.documents: dict[tuple[str, int], list[str]] = {}
+        self.roles: dict[tuple[str, int], RecipientRole] = {}
+        self.built = False
+        self._lock = asyncio.Lock()
+
+    def add(self, kind: str, doc_id: int, text: str, role: Optional[RecipientRole] = None):
+        self.remove(kind, doc_id)
+        key = (kind, doc_id)
+        counts = Counter(tokenize(text))
+        for term, tf in counts.items():
+            self.postings[term][key] = tf
+        self.documents[key] = list(counts)
+        if role is not None:
+            self.roles[key] = role
+
+    def remove(self, kind: str, doc_id: int):
+        key = (kind, doc_id)
+        self.roles.pop(key, None)
+        for term in self.documents.pop(key, ()):
+            postings = self.postings[term]
+            postings.pop(key, None)
+            if not postings:
+                del self.postings[term]
+
+    def search(
+        self, query: str, kinds: Iterable[str], roles: Optional[Collection[RecipientRole]] = None
+    ) -> list[tuple[str, int, float]]:
+        """Ranked hits; messages only when `roles`, if given, holds their recipient role."""
+        kinds = set(kinds)
+        scores: dict[tuple[str, int], float] = defaultdict(float)
+        total = len(self.documents) or 1
+        for term in set(tokenize(query)):
+            postings = self.postings.get(term)
+            if not postings:
+                continue
+            idf = math.log(1 + total / len(postings))
+            for key, tf in postings.items():
+                if key[0] not in kinds:
+                    continue
+                if roles is not None and key[0] == MESSAGES and self.roles.get(key) not in roles:
+                    continue
+                scores[key] += (1 + math.log(tf)) * idf
+        hits = [(kind, doc_id, score) for (kind, doc_id), score in scores.items()]
+        hits.sort(key=lambda hit: (-hit[2], -hit[1]))
+        return hits
+
+    async def ensure_built(self, db: AsyncSession):
+        if self.built:
+            return
+        async with self._lock:
+            if self.built:
+                return
+            for doc_id, content, role in await db.execute(
+                select(Message.id, Message.content, Message.recipient_role)
+            ):
+                self.add(MESSAGES, doc_id, content, role)
+            for doc_id, name, description in await db.execute(
+                select(Event.id, Event.name, Event.description)
+            ):
+                self.add(EVENTS, doc_id, event_text(name, description))
+            self.built = True
+
+
+index = InvertedIndex()
+
+
+def _uses_fulltext(dialect) -> bool:
+    return dialect.name == "mysql"
+
+
+def _document(target) -> Optional[tuple]:
+    """The `index.add` arguments for a flushed Message or Event, else None."""
+    if isinstance(target, Message):
+        return MESSAGES, target.id, target.content, RecipientRole(target.recipient_role)
+    if isinstance(target, Event):
+        return EVENTS, target.id, event_text(target.name, target.description)
+    return None
+
+
+# Flushed changes wait in session.info until the transaction commits, so a
+# rolled back write never shows up in search results.
+@event.listens_for(Session, "after_flush")
+def _collect_changes(session, flush_context):
+    if _uses_fulltext(session.get_bind().dialect):
+        return
+    changes = session.info.setdefault("search_changes", [])
+    for target in (*session.new, *session.dirty):
+        document = _document(target)
+        if document is not None:
+            changes.append((True, document))
+    for target in session.deleted:
+        document = _document(target)
+        if document is not None:
+            changes.append((False, document[:2]))
+
+
+@event.listens_for(Session, "after_commit")
+def _apply_changes(session):
+    for added, document in session.info.pop("search_changes", ()):
+        if added:
+            index.add(*document)
+        else:
+            index.remove(*document)
+
+
+@event.listens_for(Session, "after_rollback")
+def _discard_changes(session):
+    session.info.pop("search_changes", None)
+
+
+async def _fulltext_hits(
+    db: AsyncSession, query: str, kinds: set[str], roles: Optional[Collection[RecipientRole]], limit: int
+) -> list[tuple[str, int, float]]:
+    hits = []
+    targets = {
+        MESSAGES: (Message.id, match(Message.content, against=query)),
+        EVENTS: (Event.id, match(Event.name, Event.description, against=query)),
+    }
+    for kind, (id_column, score) in targets.items():
+        if kind not in kinds:
+            continue
+        statement = select(id_column, score).where(score > 0)
+        if kind == MESSAGES and roles is not None:
+            statement = statement.where(Message.recipient_role.in_(roles))
+        rows = await db.execute(statement.order_by(score.desc()).limit(limit))
+        hits.extend((kind, doc_id, float(value)) for doc_id, value in rows)
+    hits.sort(key=lambda hit: (-hit[2], -hit[1]))
+    return hits
+
+
+async def _load_rows(db: AsyncSession, hits: list[tuple[str, int, float]]) -> dict[tuple[str, int], object]:
+    rows: dict[tuple[str, int], object] = {}
+    for kind, model in ((MESSAGES, Message), (EVENTS, Event)):
+        ids = [doc_id for hit_kind, doc_id, _ in hits if hit_kind == kind]
+        if ids:
+            result = await db.execute(select(model).where(model.id.in_(ids)))
+            rows.update(((kind, row.id), row) for row in result.scalars())
+    return rows
+
+
+async def search(
+    db: AsyncSession,
+    query: str,
+    kinds: Iterable[str],
+    skip: int = 0,
+    limit: int = 20,
+    roles: Optional[Collection[RecipientRole]] = None,
+) -> list[tuple[str, object, float]]:
+    """
+    Return one page of `(kind, row, score)` hits ranked by relevance, where
+    `row` is the matching `Message` or `Event`. With `roles`, only messages
+    sent to one of them are searched.
+    """
+    kinds = set(kinds)
+    if _uses_fulltext(db.bind.dialect):
+        hits = await _fulltext_hits(db, query, kinds, roles, skip + limit)
+    else:
+        await index.ensure_built(db)
+        hits = index.search(query, kinds, roles)
+
+    page = []
+    position = skip
+    while len(page) < limit and position < len(hits):
+        batch = hits[position:position + limit - len(page)]
+        position += len(batch)
+        rows = await _load_rows(db, batch)
+        for kind, doc_id, score in batch:
+            row = rows.get((kind, doc_id))
+            if row is None:
+                # Deleted without the ORM; forget it and keep filling the page.
+                index.remove(kind, doc_id)
+                continue
+            page.append((kind, row, score))
+    return page
@@ -1,7 +1,26 @@
+import os
+
 from sqlalchemy.ext.asyncio import create_async_engine, AsyncSession
 from sqlalchemy.orm import sessionmaker
 
 from app.core.config import settings
+from app.core.server import worker_count
+
+
+def pool_options(pools: int = 1) -> dict:
+    """
+    This worker's share of DB_MAX_CONNECTIONS for one of the `pools` pools
+    it keeps to a database, with no overflow so the workers together never
+    open more.
+    """
+    if settings.DB_MAX_CONNECTIONS is None:
+        return {}
+    return {"pool_size": max(settings.DB_MAX_CONNECTIONS // (worker_count() * pools), 1), "max_overflow": 0}
 
-engine = create_async_engine(settings.DATABASE_URL, pool_pre_ping=True)
+
+# Shares the primary's connections with app.db.routing's autocommit engine.
+engine = create_async_engine(settings.DATABASE_URL, pool_pre_ping=True, **pool_options(pools=2))
 AsyncSessionLocal = sessionmaker(engine, class_=AsyncSession, expire_on_commit=False)
+
+# A forked worker must not reuse the parent's pooled connections.
+os.register_at_fork(after_in_child=lambda: engine.sync_engine.dispose(close=False))
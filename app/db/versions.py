@@ -0,0 +1,55 @@
+import random
+from typing import Optional
+
+from sqlalchemy import event, func, select, update
+
+from app.db.models.event import Event
+from app.db.models.table_version import TableVersion
+from app.db.models.user import User
+
+EVENTS = "events"
+USERS = "users"
+# Rows per table, seeded by the migrations; changing it needs a migration.
+SHARDS = 16
+
+
+def _bump_statement(name: str):
+    return (
+        update(TableVersion)
+        .where(TableVersion.name == name, TableVersion.shard == random.randrange(SHARDS))
+        .values(version=TableVersion.version + 1)
+    )
+
+
+async def bump(db, name: str):
+    """Bump `name` in the caller's transaction, for writes that bypass the ORM."""
+    await db.execute(_bump_statement(name))
+
+
+async def current(db, names: tuple[str, ...]) -> Optional[tuple[int, ...]]:
+    """
+    Versions of `names` in order, or None when one is missing any of its
+    SHARDS rows; rows are seeded by the migrations, and a bump landing on a
+    missing row would go unseen.
+    """
+    rows = await db.execute(
+        select(TableVersion.name, func.sum(TableVersion.version), func.count())
+        .where(TableVersion.name.in_(names))
+        .group_by(TableVersion.name)
+    )
+    versions = {name: int(version) for name, version, shards in rows if shards == SHARDS}
+    if len(versions) < len(names):
+        return None
+    return tuple(versions[name] for name in names)
+
+
+def _track(model, name: str):
+    def bump_on_write(mapper, connection, target):
+        connection.execute(_bump_statement(name))
+
+    for write in ("after_insert", "after_update", "after_delete"):
+        event.listen(model, write, bump_on_write)
+
+
+_track(Event, EVENTS)
+_track(User, USERS)
@@ -1,38 +1,123 @@
-from fastapi import FastAPI
-from starlette.middleware.cors import CORSMiddleware
-import time
+from app.core.startup import startup_timer
+
+with startup_timer.phase("import fastapi"):
+    from fastapi import FastAPI
+    from fastapi.openapi.docs import get_redoc_html, get_swagger_ui_html
+    from fastapi.responses import HTMLResponse
+    from starlette.middleware.cors import CORSMiddleware
+import asyncio
+import json
 import logging
-from sqlalchemy.ext.asyncio import create_async_engine
 from sqlalchemy.exc import OperationalError
 from sqlalchemy import text
 
-from app.api.v1.api import api_router
+with startup_timer.phase("import api routers"):
+    from app.api.v1.api import api_router
+from app.core import server
 from app.core.config import settings
+from app.core.security import shutdown_hash_pool
+from app.core.http_cache import HTTPCacheMiddleware
+from app.core.idempotency import IdempotencyMiddleware
+from app.core.jobs import job_queue
+from app.core.loop_watchdog import loop_watchdog
+from app.core.openapi import OpenAPIDocument
+from app.core.profiling import ProfilingMiddleware
+from app.db.query_audit import QueryAuditMiddleware
+from app.db.retention import run_compaction_loop
+from app.db.routing import ReadYourWritesMiddleware, read_router
+from app.db.session import engine
 
 logging.basicConfig(filename='debug.log', level=logging.DEBUG)
 
+OPENAPI_URL = "/api/v1/openapi.json"
+
+# The schema routes are registered below so the document can be served as
+# precompressed bytes; FastAPI's own would re-encode it on every request.
 app = FastAPI(
     title="Corporate Event Management API",
-    openapi_url=f"/api/v1/openapi.json"
+    openapi_url=None,
+    docs_url=None,
+    redoc_url=None,
 )
 
+def load_openapi_body() -> bytes:
+    """
+    Read the schema written by `python -m app.cli build-openapi` when
+    OPENAPI_SCHEMA_PATH points at it, instead of generating it from every
+    route and model on the first request.
+    """
+    if settings.OPENAPI_SCHEMA_PATH:
+        try:
+            with open(settings.OPENAPI_SCHEMA_PATH, "rb") as schema_file:
+                return schema_file.read()
+        except FileNotFoundError:
+            logging.warning("OpenAPI schema %s not found, generating it", settings.OPENAPI_SCHEMA_PATH)
+    return json.dumps(FastAPI.openapi(app), separators=(",", ":")).encode()
+
+openapi_document = OpenAPIDocument(load_openapi_body, "/api/v1/openapi.{version}.json")
+
+def load_openapi_schema() -> dict:
+    if app.openapi_schema is None:
+        app.openapi_schema = json.loads(openapi_document.body)
+    return app.openapi_schema
+
+app.openapi = load_openapi_schema
+
+app.add_route(OPENAPI_URL, openapi_document.serve, include_in_schema=False)
+app.add_route("/api/v1/openapi.{version}.json", openapi_document.serve_versioned, include_in_schema=False)
+
+@app.get("/docs", include_in_schema=False)
+async def swagger_ui() -> HTMLResponse:
+    return get_swagger_ui_html(openapi_url=openapi_document.url, title=f"{app.title} - Swagger UI")
+
+@app.get("/redoc", include_in_schema=False)
+async def redoc() -> HTMLResponse:
+    return get_redoc_html(openapi_url=openapi_document.url, title=f"{app.title} - ReDoc")
+
 @app.on_event("startup")
 async def startup_event():
     max_retries = 5
     retries = 0
-    while retries < max_retries:
-        try:
-            engine = create_async_engine(settings.DATABASE_URL)
-            async with engine.connect() as conn:
-                await conn.execute(text("SELECT 1"))
-            break
-        except OperationalError:
-            retries += 1
-            time.sleep(5)
+    with startup_timer.phase("database probe"):
+        while retries < max_retries:
+            try:
+                async with engine.connect() as conn:
+                    await conn.execute(text("SELECT 1"))
+                break
+            except OperationalError:
+                retries += 1
+                await asyncio.sleep(5)
     if retries == max_retries:
         raise Exception("Could not connect to the database")
+    job_queue.start()
+    if settings.LOOP_WATCHDOG:
+        loop_watchdog.start()
+    if settings.MESSAGE_RETENTION_DAYS and server.maintenance_worker:
+        app.state.compaction_task = asyncio.create_task(run_compaction_loop())
+    if read_router.replica is not None:
+        app.state.replica_health_task = asyncio.create_task(read_router.run_health_checks())
+    app.state.startup_report = startup_timer.log()
+
+@app.on_event("shutdown")
+async def shutdown_event():
+    for name in ("compaction_task", "replica_health_task"):
+        task = getattr(app.state, name, None)
+        if task:
+            task.cancel()
+    await job_queue.drain()
+    await loop_watchdog.stop()
+    shutdown_hash_pool()
 
-# Set all CORS enabled origins
+if settings.QUERY_AUDIT:
+    app.add_middleware(QueryAuditMiddleware)
+app.add_middleware(IdempotencyMiddleware)
+app.add_middleware(ReadYourWritesMiddleware)
+app.add_middleware(ProfilingMiddleware)
+# Outside idempotency, so stored replays are never gzipped.
+app.add_middleware(HTTPCacheMiddleware)
+# Set all CORS enabled origins. Outermost, so the responses the middlewares
+# above build themselves (304s, idempotent replays, 409s and 422s) get the
+# CORS headers too.
 app.add_middleware(
     CORSMiddleware,
     allow_origins=["*"],
@@ -41,4 +126,4 @@ app.add_middleware(
     allow_headers=["*"],
 )
 
-app.include_router(api_router, prefix="/api/v1")
\ No newline at end of file
+app.include_router(api_router, prefix="/api/v1")
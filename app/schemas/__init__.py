@@ -1,5 +1,9 @@
 from .event import EventRead, EventCreate, EventUpdate
 from .fund import FundRead, FundCreate, FundUpdate, FundDeduct, FundSetBalance
 from .message import MessageRead, MessageCreate
-from .token import Token, TokenPayload
-from .user import UserRead, UserCreate, UserUpdate
+from .token import Token, TokenPayload, TokenClaims
+from .user import UserRead, UserCreate, UserUpdate, UserImportError, UserImportResult, UserListItem
+from .search import SearchHit, SearchScope
+from .analytics import BudgetSummaryRead
+from .job import JobQueueStats
+from .debug import LoopLagStats, SlowQuery
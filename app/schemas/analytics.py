@@ -0,0 +1,13 @@
+from pydantic import BaseModel
+from datetime import date
+
+from app.db.models.event import AudienceRole
+
+class BudgetSummaryRead(BaseModel):
+    month: date
+    audience_role: AudienceRole
+    total_budget: float
+    event_count: int
+
+    class Config:
+        from_attributes = True
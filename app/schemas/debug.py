@@ -0,0 +1,14 @@
+from pydantic import BaseModel
+
+class SlowQuery(BaseModel):
+    ms: float
+    endpoint: str
+    statement: str
+
+class LoopLagStats(BaseModel):
+    interval_ms: float
+    ticks: int
+    mean_lag_ms: float
+    max_lag_ms: float
+    blocked: int
+    lag_ms_buckets: dict[str, int]
@@ -12,13 +12,16 @@ class EventBase(BaseModel):
     audience_role: AudienceRole
 
 class EventCreate(EventBase):
-    pass
+    # The fund the budget is taken from; the default fund when unset. It is
+    # fixed once the event exists, since moving it would not move the money.
+    fund_id: Optional[int] = None
 
 class EventUpdate(EventBase):
     pass
 
 class EventRead(EventBase):
     id: int
+    fund_id: Optional[int] = None
 
     class Config:
         from_attributes = True
@@ -1,10 +1,11 @@
-from pydantic import BaseModel
+from pydantic import BaseModel, Field
 
 class FundBase(BaseModel):
     balance: float
 
 class FundCreate(FundBase):
-    pass
+    name: str
+    shard_count: int = Field(1, ge=1, le=64)
 
 class FundUpdate(FundBase):
     pass
@@ -17,6 +18,8 @@ class FundSetBalance(BaseModel):
 
 class FundRead(FundBase):
     id: int
+    name: str
+    shard_count: int
 
     class Config:
         from_attributes = True
@@ -0,0 +1,12 @@
+from pydantic import BaseModel
+
+class JobQueueStats(BaseModel):
+    workers: int
+    queued: int
+    running: int
+    retrying: int
+    enqueued: int
+    completed: int
+    retried: int
+    failed: int
+    max_wait_ms: float
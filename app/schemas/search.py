@@ -0,0 +1,17 @@
+import enum
+from pydantic import BaseModel
+from typing import Optional
+
+from app.schemas.event import EventRead
+from app.schemas.message import MessageRead
+
+class SearchScope(str, enum.Enum):
+    ALL = "all"
+    MESSAGES = "messages"
+    EVENTS = "events"
+
+class SearchHit(BaseModel):
+    kind: str
+    score: float
+    message: Optional[MessageRead] = None
+    event: Optional[EventRead] = None
@@ -1,4 +1,7 @@
 from pydantic import BaseModel
+from typing import Optional
+
+from app.db.models.user import Role
 
 class Token(BaseModel):
     access_token: str
@@ -7,3 +10,8 @@ class Token(BaseModel):
 
 class TokenPayload(BaseModel):
     sub: str
+
+class TokenClaims(TokenPayload):
+    role: Optional[Role] = None
+    active: bool = True
+    ver: int = 0
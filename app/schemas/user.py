@@ -1,5 +1,5 @@
 from pydantic import BaseModel, EmailStr
-from typing import Optional
+from typing import List, Optional
 
 from app.db.models.user import Role
 
@@ -20,3 +20,19 @@ class UserRead(UserBase):
 
     class Config:
         from_attributes = True
+
+class UserListItem(BaseModel):
+    """A row of the admin user listing; only the requested `fields` are set."""
+    id: int
+    username: Optional[str] = None
+    email: Optional[str] = None
+    role: Optional[Role] = None
+    is_active: Optional[bool] = None
+
+class UserImportError(BaseModel):
+    row: int
+    detail: str
+
+class UserImportResult(BaseModel):
+    created: int
+    errors: List[UserImportError]
@@ -1,5 +1,8 @@
+from app.core.server import serve
+
+
 def main():
-    print("Hello from backend!")
+    serve()
 
 
 if __name__ == "__main__":
@@ -0,0 +1,75 @@
+import asyncio
+import os
+import tempfile
+
+# Settings are read on import, so the database is chosen before app is.
+# TEST_DATABASE_URL points the suite at a disposable MySQL database;
+# otherwise it runs on a throwaway SQLite file.
+os.environ["DATABASE_URL"] = os.environ.get(
+    "TEST_DATABASE_URL", f"sqlite+aiosqlite:///{tempfile.mkdtemp()}/test.db"
+)
+# A small, fixed pool, so tests show what holds connections.
+os.environ["DB_MAX_CONNECTIONS"] = "10"
+# Routes over their query_budget or running N+1 queries fail the suite.
+os.environ["QUERY_AUDIT"] = "1"
+os.environ["QUERY_AUDIT_STRICT"] = "1"
+
+import pytest
+from fastapi.testclient import TestClient
+
+from app.core.token_versions import token_versions
+from app.db import search
+from app.db.models import Base
+from app.db.routing import read_router
+from app.db.session import engine
+
+
+def run(coro):
+    """Run `coro` on a fresh loop, releasing the pooled connections bound to it."""
+    async def wrapped():
+        try:
+            return await coro
+        finally:
+            await engine.dispose()
+            await read_router.primary.dispose()
+    return asyncio.run(wrapped())
+
+
+async def reset_schema():
+    async with engine.begin() as conn:
+        await conn.run_sync(Base.metadata.drop_all)
+        await conn.run_sync(Base.metadata.create_all)
+
+
+@pytest.fixture
+def db_schema():
+    run(reset_schema())
+    # Ids start over, so revocations and indexed rows from earlier tests
+    # must not apply.
+    token_versions._versions.clear()
+    search.index = search.InvertedIndex()
+
+
+@pytest.fixture
+def client(db_schema):
+    from app.main import app
+
+    with TestClient(app) as test_client:
+        yield test_client
+
+
+def make_user(client, username: str, role: str) -> tuple[int, dict]:
+    """Register and log in a user; returns its id and auth headers."""
+    response = client.post(
+        "/api/v1/auth/register",
+        json={"username": username, "email": f"{username}@example.com", "password": "pw", "role": role},
+    )
+    assert response.status_code == 200, response.text
+    token = client.post("/api/v1/auth/login", data={"username": username, "password": "pw"}).json()
+    return response.json()["id"], {"Authorization": f"Bearer {token['access_token']}"}
+
+
+def socket_url(user_id: int, headers: dict, protocol: str) -> str:
+    """The chat websocket path for a user logged in with `headers`."""
+    token = headers["Authorization"].removeprefix("Bearer ")
+    return f"/api/v1/chat/ws/{user_id}?token={token}&protocol={protocol}"
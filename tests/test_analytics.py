@@ -0,0 +1,56 @@
+from datetime import date
+
+from sqlalchemy import select
+
+from app.db import analytics
+from app.db.models import AudienceRole, BudgetSummary
+from app.db.session import AsyncSessionLocal
+from tests.conftest import make_user, run
+
+
+def summary(client, headers: dict) -> list[tuple]:
+    response = client.get("/api/v1/analytics/budget", headers=headers)
+    assert response.status_code == 200
+    return [
+        (row["month"], row["audience_role"], row["total_budget"], row["event_count"])
+        for row in response.json()
+        if row["event_count"]
+    ]
+
+
+def test_incremental_summary_matches_a_rebuild(client):
+    _, finance = make_user(client, "fin", "finance")
+    _, manager = make_user(client, "em", "event_manager")
+    client.post("/api/v1/funds/set-balance", headers=finance, json={"balance": 1000})
+    ids = []
+    for day, budget, role in [("2026-07-01", 100, "all"), ("2026-07-20", 50, "all"), ("2026-08-02", 30, "hr")]:
+        response = client.post(
+            "/api/v1/events/",
+            headers=manager,
+            json={"name": "party", "date": f"{day}T10:00:00", "budget": budget, "audience_role": role},
+        )
+        ids.append(response.json()["id"])
+    client.put(
+        f"/api/v1/events/{ids[1]}",
+        headers=manager,
+        json={"name": "party", "date": "2026-08-05T10:00:00", "budget": 70, "audience_role": "hr"},
+    )
+    client.delete(f"/api/v1/events/{ids[0]}", headers=manager)
+
+    incremental = summary(client, finance)
+    assert incremental == [("2026-08-01", "hr", 100, 2)]
+    assert client.post("/api/v1/analytics/budget/rebuild", headers=finance).json() == {"rows": 1}
+    assert summary(client, finance) == incremental
+
+
+def test_increment_creates_then_adds_to_the_row(db_schema):
+    async def increment_twice():
+        async with AsyncSessionLocal() as db:
+            values = {"month": date(2026, 1, 1), "audience_role": AudienceRole.HR, "total_budget": 5.0, "event_count": 1}
+            await analytics._increment_or_create(db, values)
+            await analytics._increment_or_create(db, values)
+            await db.commit()
+            row = (await db.execute(select(BudgetSummary))).scalars().one()
+            return row.total_budget, row.event_count
+
+    assert run(increment_twice()) == (10.0, 2)
@@ -0,0 +1,45 @@
+from sqlalchemy import update
+
+from app.core.token_versions import token_versions
+from app.db.models import User
+from app.db.session import AsyncSessionLocal
+from tests.conftest import make_user, run
+
+
+def test_role_change_applies_to_old_tokens(client):
+    _, admin = make_user(client, "adm", "admin")
+    user_id, finance = make_user(client, "fin", "finance")
+    assert client.get("/api/v1/funds/", headers=finance).status_code == 200
+    response = client.put(
+        f"/api/v1/users/{user_id}",
+        headers=admin,
+        json={"username": "fin", "email": "fin@example.com", "role": "employee"},
+    )
+    assert response.status_code == 200
+    assert client.get("/api/v1/funds/", headers=finance).status_code == 403
+
+
+def test_deactivation_on_another_worker_rejects_old_tokens(client, monkeypatch):
+    user_id, employee = make_user(client, "emp", "employee")
+    assert client.get("/api/v1/events/", headers=employee).status_code == 200
+
+    async def deactivate():
+        async with AsyncSessionLocal() as db:
+            await db.execute(
+                update(User).where(User.id == user_id).values(is_active=False, token_version=User.token_version + 1)
+            )
+            await db.commit()
+
+    run(deactivate())
+    # This worker only learns of the bump on its next refresh.
+    monkeypatch.setattr(token_versions, "refresh_seconds", 0)
+    response = client.get("/api/v1/events/", headers=employee)
+    assert response.status_code == 400
+    assert response.json()["detail"] == "Inactive user"
+
+
+def test_deleted_user_tokens_are_rejected(client):
+    _, admin = make_user(client, "adm", "admin")
+    user_id, employee = make_user(client, "emp", "employee")
+    assert client.delete(f"/api/v1/users/{user_id}", headers=admin).status_code == 204
+    assert client.get("/api/v1/events/", headers=employee).status_code == 404
@@ -0,0 +1,78 @@
+import asyncio
+
+from app import schemas
+from app.api.v1.endpoints import changes
+from app.core.change_feed import EVENTS, ChangeFeed, change_feed
+from app.core.config import settings
+from app.db.models import Role
+from tests.conftest import make_user, run
+
+
+async def read_frames(role: Role, count: int, **resume) -> list[bytes]:
+    """The first `count` frames /changes/stream sends a `role` user."""
+    claims = schemas.TokenClaims(sub="1", role=role)
+    resume = {"topics": None, "last_event_id": None, "after": None, **resume}
+    response = await changes.stream_changes(claims=claims, **resume)
+    frames = []
+    async for frame in response.body_iterator:
+        frames.append(frame)
+        if len(frames) == count:
+            break
+    await response.body_iterator.aclose()
+    return frames
+
+
+def kinds(frames: list[bytes]) -> list[str]:
+    return [
+        line.removeprefix(b"event: ").decode()
+        for frame in frames
+        for line in frame.splitlines()
+        if line.startswith(b"event: ")
+    ]
+
+
+def test_writes_are_streamed_from_where_the_client_left_off(client):
+    _, finance = make_user(client, "fin", "finance")
+    _, manager = make_user(client, "em", "event_manager")
+    start = change_feed.sequence
+    client.post("/api/v1/funds/set-balance", headers=finance, json={"balance": 100})
+    event = client.post(
+        "/api/v1/events/",
+        headers=manager,
+        json={"name": "party", "date": "2026-07-01T10:00:00", "budget": 10, "audience_role": "all"},
+    ).json()
+    client.delete(f"/api/v1/events/{event['id']}", headers=manager)
+
+    manager_frames = run(read_frames(Role.EVENT_MANAGER, 1, last_event_id=start))
+    assert kinds(manager_frames) == ["fund.balance", "event.created", "fund.balance", "event.deleted"]
+    # Employees don't see fund balances.
+    employee_frames = run(read_frames(Role.EMPLOYEE, 1, after=start))
+    assert kinds(employee_frames) == ["event.created", "event.deleted"]
+
+
+def test_unknown_sequence_resets_the_client(monkeypatch):
+    feed = ChangeFeed()
+    monkeypatch.setattr(changes, "change_feed", feed)
+    feed.publish(EVENTS, "event.created", {"id": 1})
+    for stale in (feed.started - 1, feed.sequence + 1):
+        [frame] = run(read_frames(Role.EMPLOYEE, 1, after=stale))
+        assert frame.startswith(b"id: %d\nevent: reset\n" % feed.sequence)
+
+
+def test_idle_stream_sends_keepalives(monkeypatch):
+    monkeypatch.setattr(changes, "change_feed", ChangeFeed())
+    monkeypatch.setattr(settings, "CHANGE_FEED_KEEPALIVE_SECONDS", 0.01)
+    assert run(read_frames(Role.EMPLOYEE, 2)) == [changes.KEEPALIVE_FRAME] * 2
+
+
+def test_live_changes_wake_the_stream(monkeypatch):
+    feed = ChangeFeed()
+    monkeypatch.setattr(changes, "change_feed", feed)
+
+    async def publish_while_following():
+        reader = asyncio.create_task(read_frames(Role.EMPLOYEE, 1))
+        await asyncio.sleep(0.05)
+        feed.publish(EVENTS, "event.updated", {"id": 1})
+        return await asyncio.wait_for(reader, 5)
+
+    assert kinds(run(publish_while_following())) == ["event.updated"]
@@ -0,0 +1,103 @@
+import asyncio
+
+import pytest
+from sqlalchemy import insert
+from starlette.websockets import WebSocketDisconnect
+
+from app.core import notifications
+from app.core.notifications import manager
+from app.core.security import create_access_token
+from app.db.models import Role, User
+from app.db.routing import read_router
+from app.db.session import engine
+from tests.conftest import make_user, reset_schema, run, socket_url
+
+SOCKETS = 1000
+
+
+class Socket:
+    """A websocket client driving the ASGI app directly, without a server."""
+
+    def __init__(self, app, user_id: int):
+        self.inbox: asyncio.Queue = asyncio.Queue()
+        self.outbox: asyncio.Queue = asyncio.Queue()
+        path = f"/api/v1/chat/ws/{user_id}"
+        scope = {
+            "type": "websocket",
+            "asgi": {"version": "3.0"},
+            "scheme": "ws",
+            "path": path,
+            "raw_path": path.encode(),
+            "root_path": "",
+            "query_string": f"token={create_access_token(user_id)}".encode(),
+            "headers": [],
+            "server": ("testserver", 80),
+            "client": ("testclient", user_id),
+            "subprotocols": [],
+            "state": {},
+        }
+        self.inbox.put_nowait({"type": "websocket.connect"})
+        self.task = asyncio.create_task(app(scope, self.inbox.get, self.outbox.put))
+
+    async def accepted(self) -> bool:
+        return (await self.outbox.get())["type"] == "websocket.accept"
+
+    def send(self, text: str):
+        self.inbox.put_nowait({"type": "websocket.receive", "text": text})
+
+    async def receive(self) -> str:
+        return (await asyncio.wait_for(self.outbox.get(), 10))["text"]
+
+    async def close(self):
+        self.inbox.put_nowait({"type": "websocket.disconnect", "code": 1000})
+        await self.task
+
+
+def test_open_sockets_hold_no_connections():
+    from app.main import app
+
+    async def scenario():
+        await reset_schema()
+        async with engine.begin() as conn:
+            await conn.execute(insert(User), [
+                {"id": i, "username": f"u{i}", "email": f"u{i}@example.com", "hashed_password": "-",
+                 "role": Role.EMPLOYEE, "is_active": True, "token_version": 0}
+                for i in range(1, SOCKETS + 1)
+            ])
+        sockets = [Socket(app, user_id) for user_id in range(1, SOCKETS + 1)]
+        try:
+            assert all(await asyncio.gather(*(socket.accepted() for socket in sockets)))
+            assert len(manager.active_connections) == SOCKETS
+            pool = engine.sync_engine.pool
+            # The ORM engine's share of DB_MAX_CONNECTIONS; reads have the rest.
+            assert pool.size() + read_router.primary.sync_engine.pool.size() == 10
+            # Authentication returned every connection to the pool.
+            assert pool.checkedout() == 0
+
+            sockets[0].send("hello")
+            assert await sockets[-1].receive() == "u1: hello"
+            assert await sockets[0].receive() == "u1: hello"
+            assert pool.checkedout() == 0
+        finally:
+            await asyncio.gather(*(socket.close() for socket in sockets))
+        assert not manager.active_connections
+
+    run(scenario())
+
+
+def test_msgpack_frames(client):
+    msgpack = pytest.importorskip("msgpack")
+    user_id, headers = make_user(client, "emp", "employee")
+    with client.websocket_connect(socket_url(user_id, headers, "msgpack")) as socket:
+        socket.send_text("hello")
+        [message] = msgpack.unpackb(socket.receive_bytes())
+    assert (message["sender"], message["content"]) == ("emp", "hello")
+
+
+def test_msgpack_is_refused_without_msgpack(client, monkeypatch):
+    monkeypatch.setattr(notifications, "msgpack", None)
+    user_id, headers = make_user(client, "emp", "employee")
+    with client.websocket_connect(socket_url(user_id, headers, "msgpack")) as socket:
+        with pytest.raises(WebSocketDisconnect) as closed:
+            socket.receive_bytes()
+    assert closed.value.code == 1003
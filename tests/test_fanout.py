@@ -0,0 +1,57 @@
+import asyncio
+import time
+
+import pytest
+
+from app.core import notifications
+from app.core.notifications import PROTOCOL_JSON, PROTOCOL_TEXT, ConnectionManager
+from tests.conftest import run
+
+
+class RecordingSocket:
+    def __init__(self):
+        self.sent = []
+
+    async def accept(self):
+        pass
+
+    async def send(self, message):
+        self.sent.append(message)
+
+
+async def connected(recipients: int, protocol: str) -> tuple[ConnectionManager, list[RecordingSocket]]:
+    manager = ConnectionManager()
+    sockets = [RecordingSocket() for _ in range(recipients)]
+    for user_id, socket in enumerate(sockets):
+        await manager.connect(user_id, socket, protocol)
+    return manager, sockets
+
+
+@pytest.mark.parametrize("recipients", [1_000, 10_000])
+def test_broadcast_encodes_once(recipients, monkeypatch):
+    encodes = []
+    encode_batch = notifications.encode_batch
+
+    def counting_encode(protocol, batch):
+        encodes.append(protocol)
+        return encode_batch(protocol, batch)
+
+    monkeypatch.setattr(notifications, "encode_batch", counting_encode)
+    payload = {"id": 1, "sender_id": 1, "sender": "alice", "role": "ALL", "content": "x" * 200, "timestamp": "2026-01-01T00:00:00"}
+
+    async def scenario():
+        for protocol in (PROTOCOL_TEXT, PROTOCOL_JSON):
+            encodes.clear()
+            manager, sockets = await connected(recipients, protocol)
+            started = time.perf_counter()
+            await manager.publish(payload)
+            await manager.flush()
+            elapsed = time.perf_counter() - started
+            # One frame built for everyone, handed to every socket as is.
+            assert len(encodes) == (0 if protocol == PROTOCOL_TEXT else 1)
+            frame = sockets[0].sent[0]
+            assert all(len(socket.sent) == 1 and socket.sent[0] is frame for socket in sockets)
+            print(f"{protocol} fan-out to {recipients}: {elapsed * 1000:.1f}ms, "
+                  f"{elapsed / recipients * 1e6:.2f}us per socket")
+
+    run(scenario())
@@ -0,0 +1,44 @@
+import asyncio
+
+from app.api.v1.endpoints import funds
+from app.db.routing import read_router
+from tests.conftest import make_user, run
+
+
+def test_duplicate_fund_name_is_rejected(client):
+    _, finance = make_user(client, "fin", "finance")
+    assert client.post("/api/v1/funds/", headers=finance, json={"name": "mkt", "balance": 10}).status_code == 200
+    response = client.post("/api/v1/funds/", headers=finance, json={"name": "mkt", "balance": 10})
+    assert response.status_code == 400
+
+
+def test_event_update_cannot_move_fund(client):
+    _, finance = make_user(client, "fin", "finance")
+    _, manager = make_user(client, "em", "event_manager")
+    client.post("/api/v1/funds/set-balance", headers=finance, json={"balance": 100})
+    other = client.post("/api/v1/funds/", headers=finance, json={"name": "other", "balance": 100}).json()
+    event = client.post(
+        "/api/v1/events/",
+        headers=manager,
+        json={"name": "party", "date": "2026-07-01T10:00:00", "budget": 30, "audience_role": "all"},
+    ).json()
+    response = client.put(
+        f"/api/v1/events/{event['id']}",
+        headers=manager,
+        json={"name": "party", "date": "2026-07-01T10:00:00", "budget": 30, "audience_role": "all", "fund_id": other["id"]},
+    )
+    assert response.status_code == 200
+    assert response.json()["fund_id"] == event["fund_id"]
+
+
+def test_concurrent_first_reads_share_the_default_fund(db_schema):
+    async def read_balance():
+        async with read_router.primary.connect() as conn:
+            return await funds.get_fund_balance(fund_id=None, conn=conn)
+
+    async def first_reads():
+        return await asyncio.gather(read_balance(), read_balance(), return_exceptions=True)
+
+    first, second = run(first_reads())
+    assert not isinstance(first, Exception) and not isinstance(second, Exception), (first, second)
+    assert first["id"] == second["id"]
@@ -0,0 +1,18 @@
+import pytest
+
+from tests.conftest import make_user
+
+
+@pytest.mark.parametrize("accept_encoding", ["gzip", "identity"])
+def test_openapi_varies_on_encoding_once(client, accept_encoding):
+    response = client.get("/api/v1/openapi.json", headers={"Accept-Encoding": accept_encoding})
+    assert response.status_code == 200
+    assert response.headers["vary"] == "Accept-Encoding"
+
+
+def test_unchanged_list_is_not_modified(client):
+    _, employee = make_user(client, "emp", "employee")
+    response = client.get("/api/v1/events/", headers=employee)
+    not_modified = client.get("/api/v1/events/", headers={**employee, "If-None-Match": response.headers["etag"]})
+    assert not_modified.status_code == 304
+    assert not_modified.content == b""
@@ -0,0 +1,105 @@
+import asyncio
+
+import httpx
+
+from app.core.idempotency import IdempotencyMiddleware, IdempotencyStore
+from tests.conftest import make_user, run
+
+ORIGIN = {"Origin": "https://dashboard.example.com"}
+
+
+class Work:
+    """An endpoint counting its runs; it waits for `release` while `hold` is set."""
+
+    def __init__(self, status: int = 201, hold: bool = False):
+        self.status = status
+        self.hold = hold
+        self.calls = 0
+        self.started = asyncio.Event()
+        self.release = asyncio.Event()
+
+    async def __call__(self, scope, receive, send):
+        self.calls += 1
+        self.started.set()
+        if self.hold:
+            await self.release.wait()
+        await send({"type": "http.response.start", "status": self.status, "headers": [(b"content-type", b"application/json")]})
+        await send({"type": "http.response.body", "body": b'{"calls": %d}' % self.calls})
+
+
+def client_for(work: Work) -> httpx.AsyncClient:
+    app = IdempotencyMiddleware(work, IdempotencyStore())
+    return httpx.AsyncClient(transport=httpx.ASGITransport(app=app), base_url="http://test")
+
+
+def post(client: httpx.AsyncClient, key: str = "k1", body: str = "{}"):
+    return client.post("/work", content=body, headers={"Idempotency-Key": key})
+
+
+def test_repeated_key_replays_the_response_with_cors_headers(client):
+    _, finance = make_user(client, "fin", "finance")
+    client.post("/api/v1/funds/set-balance", headers=finance, json={"balance": 100})
+    headers = {**finance, **ORIGIN, "Idempotency-Key": "deduct-1"}
+    first = client.post("/api/v1/funds/deduct", headers=headers, json={"amount": 10})
+    second = client.post("/api/v1/funds/deduct", headers=headers, json={"amount": 10})
+    assert first.json()["balance"] == 90
+    assert second.json() == first.json()
+    assert second.headers["idempotent-replayed"] == "true"
+    assert "access-control-allow-origin" in second.headers
+    assert client.get("/api/v1/funds/balance", headers=finance).json()["balance"] == 90
+
+
+def test_reused_key_for_another_request_is_rejected_with_cors_headers(client):
+    _, finance = make_user(client, "fin", "finance")
+    client.post("/api/v1/funds/set-balance", headers=finance, json={"balance": 100})
+    headers = {**finance, **ORIGIN, "Idempotency-Key": "deduct-1"}
+    client.post("/api/v1/funds/deduct", headers=headers, json={"amount": 10})
+    response = client.post("/api/v1/funds/deduct", headers=headers, json={"amount": 20})
+    assert response.status_code == 422
+    assert "access-control-allow-origin" in response.headers
+
+
+def test_duplicate_while_in_flight_gets_409(db_schema):
+    async def scenario():
+        work = Work(hold=True)
+        async with client_for(work) as client:
+            first = asyncio.create_task(post(client))
+            await work.started.wait()
+            duplicate = await post(client)
+            work.release.set()
+            return duplicate, await first, work.calls
+
+    duplicate, first, calls = run(scenario())
+    assert duplicate.status_code == 409
+    assert first.status_code == 201
+    assert calls == 1
+
+
+def test_server_error_releases_the_key(db_schema):
+    async def scenario():
+        work = Work(status=500)
+        async with client_for(work) as client:
+            failed = await post(client)
+            work.status = 201
+            return failed, await post(client), work.calls
+
+    failed, retried, calls = run(scenario())
+    assert failed.status_code == 500
+    assert retried.status_code == 201
+    assert calls == 2
+
+
+def test_cancelled_request_releases_the_key(db_schema):
+    async def scenario():
+        work = Work(hold=True)
+        async with client_for(work) as client:
+            first = asyncio.create_task(post(client))
+            await work.started.wait()
+            first.cancel()
+            await asyncio.gather(first, return_exceptions=True)
+            work.hold = False
+            return await post(client), work.calls
+
+    retried, calls = run(scenario())
+    assert retried.status_code == 201
+    assert calls == 2
@@ -0,0 +1,118 @@
+import asyncio
+import time
+
+from app.core.jobs import JobQueue
+from tests.conftest import make_user
+
+
+def test_failed_job_is_retried_with_backoff():
+    attempts = []
+
+    async def flaky():
+        attempts.append(time.monotonic())
+        if len(attempts) < 3:
+            raise RuntimeError("boom")
+
+    async def main():
+        queue = JobQueue(workers=2, max_attempts=3, retry_delay=0.05)
+        queue.start()
+        await queue.enqueue(flaky)
+        await queue.drain(5)
+        return queue.stats()
+
+    stats = asyncio.run(main())
+    assert len(attempts) == 3
+    assert (stats["completed"], stats["retried"], stats["failed"]) == (1, 2, 0)
+    first_wait, second_wait = attempts[1] - attempts[0], attempts[2] - attempts[1]
+    assert first_wait >= 0.05
+    assert second_wait >= 0.1
+
+
+def test_job_fails_after_max_attempts():
+    attempts = []
+
+    async def broken():
+        attempts.append(1)
+        raise RuntimeError("always")
+
+    async def main():
+        queue = JobQueue(workers=1, max_attempts=3, retry_delay=0.01)
+        queue.start()
+        await queue.enqueue(broken)
+        await queue.drain(5)
+        return queue.stats()
+
+    stats = asyncio.run(main())
+    assert len(attempts) == 3
+    assert (stats["completed"], stats["retried"], stats["failed"]) == (0, 2, 1)
+
+
+def test_drain_waits_for_queued_jobs_and_pending_retries():
+    done = []
+
+    async def slow(n):
+        await asyncio.sleep(0.01)
+        done.append(n)
+
+    async def fails_once():
+        if "failed" not in done:
+            done.append("failed")
+            raise RuntimeError("boom")
+        done.append("retried")
+
+    async def main():
+        # A queue smaller than the backlog makes enqueue wait for room.
+        queue = JobQueue(workers=2, max_size=2, max_attempts=2, retry_delay=0.05)
+        queue.start()
+        await queue.enqueue(fails_once)
+        for n in range(5):
+            await queue.enqueue(slow, n)
+        await queue.drain(5)
+        return queue
+
+    queue = asyncio.run(main())
+    assert sorted(n for n in done if isinstance(n, int)) == [0, 1, 2, 3, 4]
+    assert "retried" in done
+    assert not queue.started
+    assert queue.stats()["completed"] == 6
+
+
+def test_drain_gives_up_after_timeout():
+    async def stuck():
+        await asyncio.sleep(60)
+
+    async def main():
+        queue = JobQueue(workers=1)
+        queue.start()
+        await queue.enqueue(stuck)
+        started = time.monotonic()
+        await queue.drain(0.1)
+        return queue, time.monotonic() - started
+
+    queue, elapsed = asyncio.run(main())
+    assert elapsed < 5
+    assert not queue.started
+    assert queue.stats()["completed"] == 0
+
+
+def test_jobs_run_inline_before_start():
+    done = []
+
+    async def job():
+        done.append(1)
+
+    async def main():
+        queue = JobQueue()
+        await queue.enqueue(job)
+        assert done == [1]
+
+    asyncio.run(main())
+
+
+def test_stats_are_admin_only(client):
+    _, admin = make_user(client, "adm", "admin")
+    _, employee = make_user(client, "emp", "employee")
+    assert client.get("/api/v1/jobs/stats", headers=employee).status_code == 403
+    response = client.get("/api/v1/jobs/stats", headers=admin)
+    assert response.status_code == 200
+    assert {"queued", "retrying", "completed", "failed"} <= response.json().keys()
@@ -0,0 +1,62 @@
+import asyncio
+import logging
+import time
+
+from app.core.loop_watchdog import LoopWatchdog
+from tests.conftest import make_user
+
+
+def block_loop(seconds: float):
+    time.sleep(seconds)
+
+
+def watch(*stalls: float) -> LoopWatchdog:
+    """A watchdog's view of a loop blocked for each of `stalls` seconds in turn."""
+    async def main():
+        watchdog = LoopWatchdog(interval=10, threshold=50)
+        watchdog.start()
+        for stall in stalls:
+            await asyncio.sleep(0.05)
+            block_loop(stall)
+        await asyncio.sleep(0.05)
+        await watchdog.stop()
+        return watchdog
+
+    return asyncio.run(main())
+
+
+def test_stall_over_threshold_is_logged_once_with_its_stack(caplog):
+    with caplog.at_level(logging.WARNING, logger="app.core.loop_watchdog"):
+        watchdog = watch(0.3)
+
+    [record] = caplog.records
+    assert "Event loop blocked for over" in record.getMessage()
+    assert "block_loop" in record.getMessage()
+    stats = watchdog.stats()
+    assert stats["blocked"] == 1
+    assert stats["max_lag_ms"] >= 250
+
+
+def test_short_stalls_are_not_reported(caplog):
+    with caplog.at_level(logging.WARNING, logger="app.core.loop_watchdog"):
+        watchdog = watch(0.005, 0.005)
+
+    assert not caplog.records
+    assert watchdog.stats()["blocked"] == 0
+
+
+def test_each_stall_is_reported(caplog):
+    with caplog.at_level(logging.WARNING, logger="app.core.loop_watchdog"):
+        watchdog = watch(0.2, 0.2)
+
+    assert len(caplog.records) == 2
+    assert watchdog.stats()["blocked"] == 2
+
+
+def test_loop_stats_are_admin_only(client):
+    _, admin = make_user(client, "adm", "admin")
+    _, employee = make_user(client, "emp", "employee")
+    assert client.get("/api/v1/debug/loop", headers=employee).status_code == 403
+    response = client.get("/api/v1/debug/loop", headers=admin)
+    assert response.status_code == 200
+    assert {"ticks", "max_lag_ms", "blocked", "lag_ms_buckets"} <= response.json().keys()
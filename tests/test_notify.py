@@ -0,0 +1,51 @@
+import json
+
+from tests.conftest import make_user, socket_url
+
+
+def create_event(client, headers: dict, name: str, audience_role: str) -> dict:
+    response = client.post(
+        "/api/v1/events/",
+        headers=headers,
+        json={"name": name, "date": "2026-07-01T10:00:00", "budget": 1, "audience_role": audience_role},
+    )
+    assert response.status_code == 200
+    return response.json()
+
+
+def test_events_reach_only_their_audience(client):
+    _, finance = make_user(client, "fin", "finance")
+    _, manager = make_user(client, "em", "event_manager")
+    hr_id, hr = make_user(client, "hr", "hr")
+    ceo_id, ceo = make_user(client, "ceo", "ceo")
+    client.post("/api/v1/funds/set-balance", headers=finance, json={"balance": 100})
+    with client.websocket_connect(socket_url(hr_id, hr, "text")) as hr_socket, \
+            client.websocket_connect(socket_url(ceo_id, ceo, "json")) as ceo_socket:
+        create_event(client, manager, "review", "hr")
+        create_event(client, manager, "party", "all")
+        lines = []
+        while len(lines) < 2:
+            lines.extend(hr_socket.receive_text().split("\n"))
+        assert [line.split(" on ")[0] for line in lines] == ["event created: review", "event created: party"]
+        # The CEO's first frame skips the HR-only event.
+        [notification] = json.loads(ceo_socket.receive_text())
+        assert (notification["action"], notification["event"]["name"]) == ("created", "party")
+
+
+def test_role_change_reindexes_an_open_socket(client):
+    _, finance = make_user(client, "fin", "finance")
+    _, manager = make_user(client, "em", "event_manager")
+    _, admin = make_user(client, "adm", "admin")
+    ceo_id, ceo = make_user(client, "ceo", "ceo")
+    client.post("/api/v1/funds/set-balance", headers=finance, json={"balance": 100})
+    with client.websocket_connect(socket_url(ceo_id, ceo, "json")) as socket:
+        response = client.put(
+            f"/api/v1/users/{ceo_id}", headers=admin, json={"username": "ceo", "email": "ceo@example.com", "role": "hr"}
+        )
+        assert response.status_code == 200
+        create_event(client, manager, "review", "hr")
+        create_event(client, manager, "party", "all")
+        names = []
+        while "party" not in names:
+            names.extend(notification["event"]["name"] for notification in json.loads(socket.receive_text()))
+        assert names == ["review", "party"]
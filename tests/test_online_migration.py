@@ -0,0 +1,101 @@
+import pytest
+from alembic.migration import MigrationContext
+from alembic.operations import Operations
+from sqlalchemy import create_engine, text
+
+from app.db import online_migration
+from app.db.online_migration import OnlineTableChange
+
+ROWS = 10
+
+
+@pytest.fixture
+def conn(tmp_path):
+    engine = create_engine(f"sqlite:///{tmp_path}/online.db", isolation_level="AUTOCOMMIT")
+    with engine.connect() as connection:
+        connection.execute(text("CREATE TABLE items (id INTEGER PRIMARY KEY, name VARCHAR(50) NOT NULL, qty INTEGER)"))
+        connection.execute(text("CREATE INDEX ix_items_name ON items (name)"))
+        for item_id in range(1, ROWS + 1):
+            connection.execute(text("INSERT INTO items VALUES (:id, :name, :qty)"), {"id": item_id, "name": f"item {item_id}", "qty": item_id})
+        yield connection
+    engine.dispose()
+
+
+def rows(conn, columns: str = "id, name, qty") -> list[tuple]:
+    return [tuple(row) for row in conn.execute(text(f"SELECT {columns} FROM items ORDER BY id"))]
+
+
+def schema(conn) -> list[tuple]:
+    return [tuple(row) for row in conn.execute(text("SELECT type, name, sql FROM sqlite_master ORDER BY name"))]
+
+
+def add_label(conn, **options) -> OnlineTableChange:
+    return OnlineTableChange(
+        conn,
+        "items",
+        alter=["ALTER TABLE {table} ADD COLUMN label VARCHAR(50)"],
+        columns={"label": "UPPER({src}.name)"},
+        batch_size=3,
+        throttle=0,
+        **options,
+    )
+
+
+def test_change_keeps_writes_made_during_the_copy(conn):
+    expected = {row[0]: row for row in rows(conn)}
+    batches = []
+
+    def write_between_batches(table, copied, total, elapsed):
+        batches.append(copied)
+        if len(batches) > 1:
+            return
+        # Rows 1-3 are copied; 4-10 are not yet.
+        conn.execute(text("INSERT INTO items VALUES (11, 'item 11', 11)"))
+        conn.execute(text("UPDATE items SET name = 'renamed', qty = 0 WHERE id IN (2, 8)"))
+        conn.execute(text("DELETE FROM items WHERE id IN (1, 9)"))
+        expected[11] = (11, "item 11", 11)
+        expected[2], expected[8] = (2, "renamed", 0), (8, "renamed", 0)
+        del expected[1], expected[9]
+
+    add_label(conn, progress=write_between_batches).run()
+
+    assert len(batches) > 1
+    assert rows(conn, "id, name, qty, label") == [
+        (*row, row[1].upper()) for _, row in sorted(expected.items())
+    ]
+    objects = {(kind, name) for kind, name, _ in schema(conn)}
+    assert ("index", "ix_items_name") in objects
+    assert not any(kind == "trigger" for kind, _ in objects)
+    assert not {name for _, name in objects} & {"_items_new", "_items_old"}
+
+
+def test_failed_copy_leaves_the_table_as_it_was(conn):
+    before = schema(conn)
+
+    def fail(table, copied, total, elapsed):
+        raise RuntimeError("copy interrupted")
+
+    with pytest.raises(RuntimeError, match="copy interrupted"):
+        add_label(conn, progress=fail).run()
+
+    assert schema(conn) == before
+    conn.execute(text("INSERT INTO items VALUES (11, 'item 11', 11)"))
+    assert len(rows(conn)) == ROWS + 1
+
+
+def test_online_dry_run_leaves_the_table_untouched(conn, monkeypatch):
+    before, before_rows = schema(conn), rows(conn)
+
+    class DryRun:
+        @staticmethod
+        def get_x_argument(as_dictionary=False):
+            return {"online_dry_run": "1"}
+
+    monkeypatch.setattr(online_migration, "alembic_context", DryRun)
+    conn.commit()
+    op = Operations(MigrationContext.configure(conn))
+    with pytest.raises(RuntimeError, match=f"Dry run of the online change to items: ~{ROWS} rows in 4 batches"):
+        online_migration.run_online_change(op, "items", alter=["ALTER TABLE {table} ADD COLUMN label VARCHAR(50)"], batch_size=3)
+
+    assert schema(conn) == before
+    assert rows(conn) == before_rows
@@ -0,0 +1,54 @@
+from app.core import profiling
+from tests.conftest import make_user
+
+
+def test_admin_requests_are_profiled(client):
+    _, admin = make_user(client, "adm", "admin")
+    response = client.get("/api/v1/events/", headers={**admin, "X-Profile": "1"})
+    assert response.status_code == 200
+    profile_id = response.headers["x-profile-id"]
+    assert "x-profile-samples" in response.headers
+
+    profile = client.get(f"/api/v1/debug/profiles/{profile_id}", headers=admin)
+    assert profile.status_code == 200
+    assert profile.headers["x-profile-id"] == profile_id
+    assert client.get("/api/v1/debug/profiles/unknown", headers=admin).status_code == 404
+
+
+def test_other_roles_are_served_unprofiled(client):
+    _, admin = make_user(client, "adm", "admin")
+    _, employee = make_user(client, "emp", "employee")
+    response = client.get("/api/v1/events/", headers={**employee, "X-Profile": "1"})
+    assert response.status_code == 200
+    assert "x-profile-id" not in response.headers
+    assert client.get("/api/v1/events/", headers={"X-Profile": "1"}).status_code == 401
+
+    profile_id = client.get("/api/v1/events/", headers={**admin, "X-Profile": "1"}).headers["x-profile-id"]
+    assert client.get(f"/api/v1/debug/profiles/{profile_id}", headers=employee).status_code == 403
+
+
+def test_demoted_admin_is_served_unprofiled(client):
+    _, admin = make_user(client, "adm", "admin")
+    demoted_id, demoted = make_user(client, "adm2", "admin")
+    response = client.put(
+        f"/api/v1/users/{demoted_id}", headers=admin, json={"username": "adm2", "email": "adm2@example.com", "role": "employee"}
+    )
+    assert response.status_code == 200
+    assert "x-profile-id" not in client.get("/api/v1/events/", headers={**demoted, "X-Profile": "1"}).headers
+
+
+def test_profile_started_during_auth_wins(client, monkeypatch):
+    _, admin = make_user(client, "adm", "admin")
+    authorize = profiling.is_admin_token
+
+    async def racing(authorization):
+        allowed = await authorize(authorization)
+        # Another request starts a profile while this one is authorized.
+        profiling.profiler.start()
+        return allowed
+
+    monkeypatch.setattr(profiling, "is_admin_token", racing)
+    response = client.get("/api/v1/events/", headers={**admin, "X-Profile": "1"})
+    client.portal.call(profiling.profiler.stop)
+    assert response.status_code == 200
+    assert "x-profile-id" not in response.headers
@@ -0,0 +1,58 @@
+import pytest
+from fastapi import Depends, FastAPI
+from fastapi.testclient import TestClient
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.api import deps
+from app.core.config import settings
+from app.db.models import Fund
+from app.db.query_audit import QueryAuditMiddleware, QueryBudgetExceeded
+from app.db.session import AsyncSessionLocal
+from tests.conftest import run
+
+audited = FastAPI()
+
+
+@audited.get("/over-budget", dependencies=[Depends(deps.query_budget(1))])
+async def over_budget(db: AsyncSession = Depends(deps.get_db)):
+    db.add(Fund(name="events"))
+    await db.flush()
+    await db.execute(select(Fund.id))
+    await db.commit()
+
+
+@audited.get("/n-plus-one", dependencies=[Depends(deps.query_budget(10))])
+async def n_plus_one(db: AsyncSession = Depends(deps.get_db)):
+    for fund_id in range(settings.QUERY_AUDIT_REPEAT_THRESHOLD):
+        await db.execute(select(Fund.name).where(Fund.id == fund_id))
+
+
+@pytest.fixture
+def audited_client(db_schema):
+    with TestClient(QueryAuditMiddleware(audited)) as test_client:
+        yield test_client
+
+
+async def fund_count() -> int:
+    async with AsyncSessionLocal() as db:
+        return len((await db.execute(select(Fund.id))).all())
+
+
+def test_over_budget_fails_before_commit(audited_client):
+    with pytest.raises(QueryBudgetExceeded, match="ran 2 statements, budget is 1"):
+        audited_client.get("/over-budget")
+    assert run(fund_count()) == 0
+
+
+def test_n_plus_one_fails(audited_client):
+    with pytest.raises(QueryBudgetExceeded, match="ran the same statement 5 times"):
+        audited_client.get("/n-plus-one")
+
+
+def test_problems_are_reported_outside_strict_mode(audited_client, monkeypatch):
+    monkeypatch.setattr(settings, "QUERY_AUDIT_STRICT", False)
+    response = audited_client.get("/n-plus-one")
+    assert response.status_code == 200
+    assert response.headers["x-query-count"] == "5"
+    assert response.headers["x-query-problems"] == "1"
@@ -0,0 +1,93 @@
+import time
+
+from sqlalchemy import event, select
+from sqlalchemy.orm import Session
+
+from app.core.jobs import job_queue
+from app.core.token_versions import token_versions
+from app.db.models import Event
+from app.db.routing import read_router
+from app.db.session import AsyncSessionLocal
+from tests.conftest import make_user, run
+
+READS = 500
+
+
+def create_event(client) -> int:
+    _, finance = make_user(client, "fin", "finance")
+    _, manager = make_user(client, "em", "event_manager")
+    client.post("/api/v1/funds/set-balance", headers=finance, json={"balance": 100})
+    response = client.post(
+        "/api/v1/events/",
+        headers=manager,
+        json={"name": "party", "date": "2026-07-01T10:00:00", "budget": 30, "audience_role": "all"},
+    )
+    return response.json()["id"]
+
+
+def wait_for_jobs():
+    """Let the writes' background jobs, which open their own sessions, finish."""
+    deadline = time.monotonic() + 5
+    while any(job_queue.stats()[key] for key in ("queued", "running", "retrying")):
+        assert time.monotonic() < deadline
+        time.sleep(0.01)
+
+
+def test_get_routes_open_no_session(client, monkeypatch):
+    event_id = create_event(client)
+    _, employee = make_user(client, "emp", "employee")
+    wait_for_jobs()
+    # The periodic token version refresh has a session of its own.
+    monkeypatch.setattr(token_versions, "refresh_seconds", 3600)
+    run(token_versions.refresh())
+    sessions = []
+
+    def began(session, transaction, connection):
+        sessions.append(session)
+
+    event.listen(Session, "after_begin", began)
+    try:
+        assert client.get(f"/api/v1/events/{event_id}", headers=employee).status_code == 200
+        assert client.get("/api/v1/events/", headers=employee).status_code == 200
+    finally:
+        event.remove(Session, "after_begin", began)
+    assert sessions == []
+
+
+def test_read_path_benchmark(client):
+    """Print the per-read cost of an ORM session against the autocommit read path."""
+    event_id = create_event(client)
+
+    async def orm_reads():
+        for _ in range(READS):
+            async with AsyncSessionLocal() as db:
+                assert (await db.get(Event, event_id)) is not None
+
+    async def core_reads():
+        for _ in range(READS):
+            conn = await read_router.connect()
+            try:
+                row = (await conn.execute(select(Event.__table__).where(Event.id == event_id))).first()
+                assert row is not None
+            finally:
+                await conn.close()
+
+    timings = {}
+    for name, reads in (("orm session", orm_reads), ("autocommit read", core_reads)):
+        started = time.perf_counter()
+        run(reads())
+        timings[name] = (time.perf_counter() - started) / READS
+    for name, seconds in timings.items():
+        print(f"{name}: {seconds * 1e6:.0f}us per read")
+
+    started = time.perf_counter()
+    for _ in range(READS // 5):
+        assert client.get(f"/api/v1/events/{event_id}", headers={"Authorization": "-"}).status_code == 401
+    # Baseline for the GET below: routing and middleware, without a read.
+    baseline = (time.perf_counter() - started) / (READS // 5)
+    _, employee = make_user(client, "emp", "employee")
+    started = time.perf_counter()
+    for _ in range(READS // 5):
+        assert client.get(f"/api/v1/events/{event_id}", headers=employee).status_code == 200
+    per_request = (time.perf_counter() - started) / (READS // 5)
+    print(f"GET /events/{{id}}: {per_request * 1e6:.0f}us per request, {baseline * 1e6:.0f}us rejected unauthenticated")
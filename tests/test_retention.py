@@ -0,0 +1,49 @@
+from datetime import datetime, timedelta
+
+import pytest
+from pydantic import ValidationError
+from sqlalchemy import func, select
+
+from app.core.config import Settings, settings
+from app.db.models import Message, MessageArchive, RecipientRole
+from app.db.retention import compact_messages
+from app.db.session import AsyncSessionLocal
+from tests.conftest import run
+
+NOW = datetime(2026, 7, 1)
+
+
+async def add_messages(role: RecipientRole, age: timedelta, count: int):
+    async with AsyncSessionLocal() as db:
+        db.add_all(
+            Message(recipient_role=role, content=f"message {n}", timestamp=NOW - age)
+            for n in range(count)
+        )
+        await db.commit()
+
+
+async def counts() -> tuple[int, int]:
+    async with AsyncSessionLocal() as db:
+        messages = await db.scalar(select(func.count()).select_from(Message))
+        archived = await db.scalar(select(func.count()).select_from(MessageArchive))
+        return messages, archived
+
+
+def test_compaction_archives_expired_messages_in_batches(db_schema, monkeypatch):
+    monkeypatch.setattr(settings, "MESSAGE_RETENTION_DAYS", {"ALL": 30})
+    monkeypatch.setattr(settings, "MESSAGE_ARCHIVE_BATCH_SIZE", 2)
+    run(add_messages(RecipientRole.ALL, timedelta(days=31), 5))
+    run(add_messages(RecipientRole.ALL, timedelta(days=1), 2))
+    # Roles without a retention period are kept.
+    run(add_messages(RecipientRole.HR, timedelta(days=365), 3))
+
+    moved = run(compact_messages(now=NOW))
+    assert moved == {RecipientRole.ALL: 5}
+    assert run(counts()) == (5, 5)
+    assert run(compact_messages(now=NOW)) == {RecipientRole.ALL: 0}
+
+
+def test_unknown_retention_role_fails_at_startup():
+    with pytest.raises(ValidationError, match="unknown recipient roles"):
+        Settings(MESSAGE_RETENTION_DAYS={"EVERYONE": 30})
+    assert Settings(MESSAGE_RETENTION_DAYS={"hr": 30}).MESSAGE_RETENTION_DAYS == {"HR": 30}
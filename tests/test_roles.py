@@ -0,0 +1,79 @@
+import importlib.util
+from datetime import datetime
+from pathlib import Path
+
+import pytest
+from alembic.migration import MigrationContext
+from alembic.operations import Operations
+from sqlalchemy import create_engine, insert, select, text
+from sqlalchemy.exc import StatementError
+
+from app.db.models import AudienceRole, Event, Message, Role, RoleCode, User
+from app.db.session import engine
+from tests.conftest import make_user, run
+
+MIGRATION = Path(__file__).parent.parent / "alembic" / "versions" / "6a1d9c3f2e47_role_codes.py"
+
+
+def load_migration():
+    spec = importlib.util.spec_from_file_location("role_codes", MIGRATION)
+    module = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(module)
+    return module
+
+
+def test_roles_round_trip_as_shared_codes(client):
+    user_id, headers = make_user(client, "hr", "hr")
+    client.post("/api/v1/chat/send", headers=headers, json={"content": "hi", "recipient_role": "HR"})
+
+    async def read_back():
+        async with engine.connect() as conn:
+            raw = await conn.scalar(text("SELECT role FROM users WHERE id = :id"), {"id": user_id})
+            role = await conn.scalar(select(User.role).where(User.id == user_id))
+            # The same role matches across tables with different enums.
+            matched = await conn.scalar(
+                select(Message.content).join(User, User.role == Message.recipient_role).where(User.id == user_id)
+            )
+            return raw, role, matched
+
+    raw, role, matched = run(read_back())
+    assert raw == RoleCode.HR
+    assert role is Role.HR
+    assert matched == "hi"
+
+
+def test_binds_accept_values_and_refuse_unknown_roles(db_schema):
+    async def insert_events(*roles):
+        async with engine.begin() as conn:
+            for role in roles:
+                await conn.execute(insert(Event), {"name": "e", "date": datetime(2026, 7, 1), "budget": 0, "audience_role": role})
+            return (await conn.execute(select(Event.audience_role))).scalars().all()
+
+    assert run(insert_events("all", AudienceRole.HR)) == [AudienceRole.ALL, AudienceRole.HR]
+    with pytest.raises(StatementError, match="'admin' is not a valid AudienceRole"):
+        run(insert_events("admin"))
+
+
+@pytest.fixture
+def op(tmp_path):
+    legacy = create_engine(f"sqlite:///{tmp_path}/legacy.db")
+    with legacy.connect() as conn:
+        conn.execute(text("CREATE TABLE users (id INTEGER PRIMARY KEY, role VARCHAR(20) NOT NULL)"))
+        conn.execute(text("INSERT INTO users VALUES (1, 'HR'), (2, 'finance'), (3, ' employee ')"))
+        with Operations.context(MigrationContext.configure(conn)) as operations:
+            yield operations
+    legacy.dispose()
+
+
+def test_role_codes_map_legacy_spellings(op):
+    migration = load_migration()
+    migration.check_values([("users", "role")], migration.to_codes)
+    codes = op.get_bind().execute(text(f"SELECT {migration.to_codes('role')} FROM users ORDER BY id")).scalars().all()
+    assert codes == [RoleCode.HR, RoleCode.FINANCE, RoleCode.EMPLOYEE]
+
+
+def test_unmapped_roles_stop_the_migration(op):
+    migration = load_migration()
+    op.get_bind().execute(text("INSERT INTO users VALUES (4, 'manager')"))
+    with pytest.raises(RuntimeError, match=r"users.role holds values with no role mapping: \['manager'\]"):
+        migration.check_values([("users", "role")], migration.to_codes)
@@ -0,0 +1,67 @@
+import pytest
+
+from app.api import deps
+from app.db import routing
+from app.db.models import Base
+from app.db.routing import PIN_COOKIE, ReadRouter, autocommit_engine
+from tests.conftest import make_user
+
+EVENT = {"name": "party", "date": "2026-07-01T10:00:00", "budget": 20, "audience_role": "all"}
+
+
+@pytest.fixture
+def router(client, tmp_path, monkeypatch):
+    """Reads routed to an empty replica that never receives the primary's writes."""
+    replica = autocommit_engine(f"sqlite+aiosqlite:///{tmp_path}/replica.db")
+
+    async def create_schema():
+        async with replica.begin() as conn:
+            await conn.run_sync(Base.metadata.create_all)
+
+    client.portal.call(create_schema)
+    router = ReadRouter(routing.read_router.primary, replica)
+    monkeypatch.setattr(routing, "read_router", router)
+    monkeypatch.setattr(deps, "read_router", router)
+    yield router
+    client.portal.call(replica.dispose)
+
+
+def event_count(client, headers: dict) -> int:
+    response = client.get("/api/v1/events/", headers=headers)
+    assert response.status_code == 200
+    return len(response.json())
+
+
+def test_writer_reads_the_primary_after_a_write(client, router):
+    _, finance = make_user(client, "fin", "finance")
+    _, manager = make_user(client, "em", "event_manager")
+    client.post("/api/v1/funds/set-balance", headers=finance, json={"balance": 100})
+    client.cookies.clear()
+    response = client.post("/api/v1/events/", headers=manager, json=EVENT)
+    assert PIN_COOKIE in response.cookies
+    assert event_count(client, manager) == 1
+    # On another worker only the cookie pins the writer.
+    router._pinned.clear()
+    assert event_count(client, manager) == 1
+
+    client.cookies.clear()
+    _, employee = make_user(client, "emp", "employee")
+    client.cookies.clear()
+    assert event_count(client, employee) == 0
+
+
+def test_reads_fall_back_to_the_primary_when_the_replica_is_down(client, router):
+    _, finance = make_user(client, "fin", "finance")
+    _, manager = make_user(client, "em", "event_manager")
+    client.post("/api/v1/funds/set-balance", headers=finance, json={"balance": 100})
+    client.post("/api/v1/events/", headers=manager, json=EVENT)
+    client.cookies.clear()
+    router._pinned.clear()
+
+    class Unreachable:
+        async def connect(self):
+            raise OSError("replica down")
+
+    router.replica = Unreachable()
+    assert event_count(client, manager) == 1
+    assert router.replica_healthy is False
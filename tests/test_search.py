@@ -0,0 +1,49 @@
+from datetime import datetime
+
+from sqlalchemy import delete
+
+from app.db.models import Message, RecipientRole
+from app.db.session import AsyncSessionLocal
+from tests.conftest import make_user, run
+
+
+def send(client, headers: dict, content: str, role: str = "ALL"):
+    response = client.post("/api/v1/chat/send", headers=headers, json={"recipient_role": role, "content": content})
+    assert response.status_code == 200
+
+
+def contents(client, headers: dict, query: str, **params) -> list[str]:
+    response = client.get("/api/v1/search/", headers=headers, params={"q": query, "scope": "messages", **params})
+    assert response.status_code == 200
+    return [hit["message"]["content"] for hit in response.json()]
+
+
+def test_messages_are_searched_within_the_callers_roles(client):
+    _, employee = make_user(client, "emp", "employee")
+    _, finance = make_user(client, "fin", "finance")
+    send(client, employee, "party on friday")
+    send(client, employee, "party budget for finance", role="FINANCE")
+    send(client, employee, "party budget for hr", role="HR")
+
+    assert contents(client, employee, "party") == ["party on friday"]
+    assert sorted(contents(client, finance, "party")) == ["party budget for finance", "party on friday"]
+
+
+def test_rolled_back_and_deleted_messages_are_not_found(client):
+    _, employee = make_user(client, "emp", "employee")
+    for n in range(3):
+        send(client, employee, f"standup {n}")
+    assert len(contents(client, employee, "standup")) == 3
+
+    async def write_behind_the_index():
+        async with AsyncSessionLocal() as db:
+            db.add(Message(recipient_role=RecipientRole.ALL, content="standup ghost", timestamp=datetime.utcnow()))
+            await db.flush()
+            await db.rollback()
+        async with AsyncSessionLocal() as db:
+            await db.execute(delete(Message).where(Message.content == "standup 2"))
+            await db.commit()
+
+    run(write_behind_the_index())
+    # The deleted hit ranks first; the page is still filled past it.
+    assert contents(client, employee, "standup", limit=2) == ["standup 1", "standup 0"]
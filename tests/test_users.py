@@ -0,0 +1,39 @@
+from app.api.v1.endpoints import users
+from app.core.security import get_password_hash
+from app.db.models import User
+from app.db.session import AsyncSessionLocal, engine
+from tests.conftest import make_user
+
+
+def import_rows(*names: str) -> list[dict]:
+    return [{"username": name, "email": f"{name}@example.com", "password": "pw", "role": "employee"} for name in names]
+
+
+def test_import_reports_invalid_and_duplicate_rows(client):
+    _, admin = make_user(client, "adm", "admin")
+    rows = import_rows("ann", "bob", "adm", "bob")
+    rows.append({"username": "eve", "email": "not an email", "password": "pw", "role": "employee"})
+    response = client.post("/api/v1/users/import", headers=admin, json=rows)
+    assert response.status_code == 200
+    assert response.json()["created"] == 2
+    assert [error["row"] for error in response.json()["errors"]] == [2, 3, 4]
+
+
+def test_import_hashes_without_a_connection_and_survives_a_concurrent_create(client, monkeypatch):
+    _, admin = make_user(client, "adm", "admin")
+    hash_passwords = users.hash_passwords
+
+    async def racing_hash_passwords(passwords):
+        assert engine.pool.checkedout() == 0
+        # Another request creates one of the imported users meanwhile.
+        async with AsyncSessionLocal() as db:
+            db.add(User(username="bob", email="bob@example.com", hashed_password=get_password_hash("pw"), role="employee"))
+            await db.commit()
+        return await hash_passwords(passwords)
+
+    monkeypatch.setattr(users, "hash_passwords", racing_hash_passwords)
+    response = client.post("/api/v1/users/import", headers=admin, json=import_rows("ann", "bob", "cat"))
+    assert response.status_code == 200
+    assert response.json()["created"] == 2
+    assert [error["row"] for error in response.json()["errors"]] == [1]
+    assert client.post("/api/v1/auth/login", data={"username": "cat", "password": "pw"}).status_code == 200